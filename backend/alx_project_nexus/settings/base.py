@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
 
 # GDAL Configuration - MUST be done before any Django imports
@@ -87,6 +87,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'utils.middleware.RequestMetricsMiddleware',
+    'utils.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,13 +124,13 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'utils.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'utils.metrics.TimedJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -190,6 +192,8 @@ SIMPLE_JWT = {
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'api.v1.serializers.accounts.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.v1.serializers.accounts.ClaimsTokenRefreshSerializer',
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
     
@@ -200,6 +204,227 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Redis (optional - used for the event broker and caching when configured)
+REDIS_URL = config('REDIS_URL', default='')
+
+# Real-time order streaming (server-sent events, served through asgi.py)
+EVENT_BROKER_BACKEND = config(
+    'EVENT_BROKER_BACKEND',
+    default='utils.realtime.RedisBroker' if REDIS_URL else 'utils.realtime.InMemoryBroker'
+)
+EVENT_STREAM_KEEPALIVE_SECONDS = config('EVENT_STREAM_KEEPALIVE_SECONDS', default=15, cast=int)
+EVENT_STREAM_MAX_SECONDS = config('EVENT_STREAM_MAX_SECONDS', default=300, cast=int)
+EVENT_STREAM_RETRY_MS = config('EVENT_STREAM_RETRY_MS', default=3000, cast=int)
+
+# Anonymous shopper carts (cache-backed, identified by a signed cookie)
+GUEST_CART_COOKIE_NAME = 'guest_cart'
+GUEST_CART_TTL = config('GUEST_CART_TTL', default=60 * 60 * 24 * 7, cast=int)
+GUEST_CART_MAX_ITEMS = config('GUEST_CART_MAX_ITEMS', default=100, cast=int)
+
+# Cart price drift: 'reprice' updates cart items when product prices change,
+# 'flag' keeps the captured price and marks the item for the customer to accept
+CART_PRICE_DRIFT_POLICY = config('CART_PRICE_DRIFT_POLICY', default='reprice')
+CART_REPRICE_CHUNK_SIZE = config('CART_REPRICE_CHUNK_SIZE', default=1000, cast=int)
+
+# Authenticated users are built from JWT claims; full User rows are cached
+# per process and invalidated on User/Business changes
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+AUTH_TOKEN_REVOCATION_CHECK = config('AUTH_TOKEN_REVOCATION_CHECK', default=True, cast=bool)
+
+# Request metrics (utils/middleware.py) exported at /health/metrics/ to
+# requests bearing METRICS_TOKEN; with no token set only DEBUG serves them
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=10, cast=int)
+METRICS_RESPONSE_HEADERS = config('METRICS_RESPONSE_HEADERS', default=False, cast=bool)
+
+# Maximum SQL queries per endpoint ("ViewClass.action"). Requests over budget
+# are logged; with QUERY_BUDGET_ENFORCE (used in tests) they raise instead.
+QUERY_BUDGETS = {
+    'CartViewSet.retrieve': 6,
+    'CartViewSet.batch': 10,
+    'CartViewSet.accept_prices': 4,
+    'GuestCartViewSet.retrieve': 2,
+    'GuestCartViewSet.batch': 2,
+    # get_object, lock, UPDATE, search vector UPDATE, ledger INSERT (a low
+    # stock alert adds the owner lookup)
+    'ProductViewSet.update_stock': 6,
+    'ProductViewSet.toggle_featured': 4,
+    # get_object, view totals, stock/price history
+    'ProductViewSet.analytics': 3,
+    'BusinessOrderEventListView.get': 2,
+}
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=None, cast=lambda v: int(v) if v else None)
+QUERY_BUDGET_ENFORCE = config('QUERY_BUDGET_ENFORCE', default=False, cast=bool)
+
+# Database connections
+#   pool:       connections are borrowed from a per-process pool for every
+#               request (ASGI and runserver start a new thread per request,
+#               so per-thread persistent connections are never reused there).
+#               Order event streams hand theirs back after each read rather
+#               than holding one for the life of the stream
+#   persistent: each worker thread keeps its connection for DB_CONN_MAX_AGE
+#               seconds, health-checked before reuse (gthread workers)
+#   pgbouncer:  connect through a transaction-pooling PgBouncer: no
+#               server-side cursors and no session state kept by Django
+#   none:       new connection for every request
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='pool')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=5, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+DB_POOL_MAX_LIFETIME = config('DB_POOL_MAX_LIFETIME', default=1800, cast=int)
+
+def database_settings(entry, mode=None):
+    """Apply the DB_CONNECTION_MODE connection handling to a DATABASES entry"""
+    mode = mode or DB_CONNECTION_MODE
+    entry = dict(entry)
+    options = dict(entry.get('OPTIONS', {}))
+    options.setdefault('connect_timeout', DB_CONNECT_TIMEOUT)
+    # TCP keepalives let idle pooled/persistent connections survive NAT timeouts
+    options.setdefault('keepalives', 1)
+    options.setdefault('keepalives_idle', 60)
+    entry['OPTIONS'] = options
+
+    if mode == 'pool':
+        entry['ENGINE'] = 'utils.db_backends.postgis_pool'
+        entry['CONN_MAX_AGE'] = 0  # return the connection to the pool after each request
+        entry['POOL'] = {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': DB_POOL_TIMEOUT,
+            'MAX_LIFETIME': DB_POOL_MAX_LIFETIME,
+        }
+    elif mode == 'persistent':
+        entry['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+        entry['CONN_HEALTH_CHECKS'] = True
+    elif mode == 'pgbouncer':
+        # PgBouncer owns the long-lived (TLS) connections to PostgreSQL.
+        # psycopg2 never creates server-side prepared statements, so only
+        # named cursors have to go. Give the database role a fixed timezone
+        # so Django never needs a session-level SET TIME ZONE.
+        entry['CONN_MAX_AGE'] = 0
+        entry['DISABLE_SERVER_SIDE_CURSORS'] = True
+    else:
+        entry['CONN_MAX_AGE'] = 0
+    return entry
+
+# Read replica: set DB_REPLICA_HOST to add a 'replica' database (see
+# utils/db_router.py). Pointing it at the primary works for local testing.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter']
+# Clients that wrote read from the primary for this long (covers replica lag)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+REPLICA_PIN_COOKIE = 'db_primary'
+
+def replica_database_settings(primary):
+    """DATABASES entry for the replica, defaulting to the primary's credentials"""
+    return dict(
+        primary,
+        NAME=config('DB_REPLICA_NAME', default=primary['NAME']),
+        USER=config('DB_REPLICA_USER', default=primary['USER']),
+        PASSWORD=config('DB_REPLICA_PASSWORD', default=primary['PASSWORD']),
+        HOST=DB_REPLICA_HOST,
+        PORT=config('DB_REPLICA_PORT', default=primary['PORT']),
+        # Tests run against the primary's test database
+        TEST={'MIRROR': 'default'},
+    )
+
+# Health probes (/health/live/ and /health/ready/)
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2, cast=float)
+HEALTH_CHECK_CACHE_SECONDS = config('HEALTH_CHECK_CACHE_SECONDS', default=5, cast=int)
+HEALTH_MIGRATIONS_CACHE_SECONDS = config('HEALTH_MIGRATIONS_CACHE_SECONDS', default=60, cast=int)
+HEALTH_QUEUE_BACKLOG_WARNING = config('HEALTH_QUEUE_BACKLOG_WARNING', default=1000, cast=int)
+# Any URL answering HEAD requests; defaults to the Cloudinary delivery host
+HEALTH_STORAGE_CHECK_URL = config(
+    'HEALTH_STORAGE_CHECK_URL',
+    default=(
+        f"https://res.cloudinary.com/{config('CLOUDINARY_CLOUD_NAME', default='')}/"
+        if config('CLOUDINARY_CLOUD_NAME', default='') else ''
+    )
+)
+
+# Delivery for businesses without delivery zones (utils/delivery.py)
+DELIVERY_DEFAULT_FEE = config('DELIVERY_DEFAULT_FEE', default='5.00')
+DELIVERY_DEFAULT_RADIUS_KM = config('DELIVERY_DEFAULT_RADIUS_KM', default=10, cast=float)
+
+# Homepage businesses-with-products endpoint (default and maximum page sizes)
+WITH_PRODUCTS_BUSINESS_LIMIT = config('WITH_PRODUCTS_BUSINESS_LIMIT', default=10, cast=int)
+WITH_PRODUCTS_MAX_BUSINESSES = config('WITH_PRODUCTS_MAX_BUSINESSES', default=50, cast=int)
+WITH_PRODUCTS_PER_BUSINESS = config('WITH_PRODUCTS_PER_BUSINESS', default=4, cast=int)
+WITH_PRODUCTS_MAX_PER_BUSINESS = config('WITH_PRODUCTS_MAX_PER_BUSINESS', default=12, cast=int)
+
+# Business owner dashboard KPIs are cached per owner for this many seconds
+DASHBOARD_CACHE_SECONDS = config('DASHBOARD_CACHE_SECONDS', default=30, cast=int)
+
+# Async fan-out views (apps/*/async_views.py): queries run concurrently per
+# process; keep below DB_POOL_MAX_SIZE so sync requests still get connections
+ASYNC_DB_CONCURRENCY = config('ASYNC_DB_CONCURRENCY', default=8, cast=int)
+
+# Gazetteer geocoding results (utils/geocoding.py); load_places invalidates them
+GEOCODE_CACHE_SECONDS = config('GEOCODE_CACHE_SECONDS', default=86400, cast=int)
+# Largest autocomplete page (places/autocomplete/?limit=)
+PLACE_AUTOCOMPLETE_MAX_RESULTS = config('PLACE_AUTOCOMPLETE_MAX_RESULTS', default=20, cast=int)
+
+# Type-ahead suggestions (utils/suggest.py): how often workers check the
+# shared change journal, how long journal entries live, how far a worker may
+# fall behind before reloading the snapshot, how long a missing journal entry
+# is waited for, and how often the snapshot is republished. The journal lives
+# in the Django cache, so workers only share it when REDIS_URL is set;
+# otherwise each worker rebuilds every SUGGEST_SNAPSHOT_SECONDS instead
+SUGGEST_SYNC_SECONDS = config('SUGGEST_SYNC_SECONDS', default=2, cast=float)
+SUGGEST_JOURNAL_SECONDS = config('SUGGEST_JOURNAL_SECONDS', default=3600, cast=int)
+SUGGEST_JOURNAL_MAX = config('SUGGEST_JOURNAL_MAX', default=5000, cast=int)
+SUGGEST_GAP_SECONDS = config('SUGGEST_GAP_SECONDS', default=10, cast=float)
+SUGGEST_SNAPSHOT_SECONDS = config('SUGGEST_SNAPSHOT_SECONDS', default=300, cast=int)
+SUGGEST_MAX_RESULTS = config('SUGGEST_MAX_RESULTS', default=10, cast=int)
+
+# Product facet counts (?facets=true on product list/search, utils/facets.py)
+PRODUCT_FACETS_CACHE_SECONDS = config('PRODUCT_FACETS_CACHE_SECONDS', default=60, cast=int)
+# Lower bounds of the price histogram buckets (Rand); the last bucket is open-ended
+PRODUCT_FACET_PRICE_BOUNDARIES = config(
+    'PRODUCT_FACET_PRICE_BOUNDARIES',
+    default='0,50,100,250,500,1000,2500',
+    cast=Csv(cast=float)
+)
+
+# Products-near-me search (products/nearby/, utils/search.py): share of the
+# score from text relevance (the rest comes from closeness), largest radius
+# and page size
+PRODUCT_NEARBY_TEXT_WEIGHT = config('PRODUCT_NEARBY_TEXT_WEIGHT', default=0.6, cast=float)
+PRODUCT_NEARBY_MAX_RADIUS_KM = config('PRODUCT_NEARBY_MAX_RADIUS_KM', default=50, cast=float)
+PRODUCT_NEARBY_MAX_LIMIT = config('PRODUCT_NEARBY_MAX_LIMIT', default=50, cast=int)
+
+# Product and business view counters (utils/view_counter.py): views are
+# buffered per process and pushed to the store every VIEW_COUNTER_PUSH_SECONDS
+# or once VIEW_COUNTER_MAX_KEYS objects are buffered; run flush_view_counts
+# every few minutes to copy the totals into DailyViewCount. The in-memory
+# store is per process and only allowed with DEBUG
+VIEW_COUNTER_BACKEND = config(
+    'VIEW_COUNTER_BACKEND',
+    default='utils.view_counter.RedisViewStore' if REDIS_URL else 'utils.view_counter.InMemoryViewStore'
+)
+VIEW_COUNTER_PUSH_SECONDS = config('VIEW_COUNTER_PUSH_SECONDS', default=5, cast=float)
+VIEW_COUNTER_MAX_KEYS = config('VIEW_COUNTER_MAX_KEYS', default=1000, cast=int)
+
+# Stock and price history on product analytics (utils/inventory.py): longest
+# window (?days=) and most chart points (?points=) a request may ask for
+INVENTORY_HISTORY_MAX_DAYS = config('INVENTORY_HISTORY_MAX_DAYS', default=365, cast=int)
+INVENTORY_HISTORY_MAX_POINTS = config('INVENTORY_HISTORY_MAX_POINTS', default=200, cast=int)
+
+# Popular-product leaderboards (products/popular/, utils/leaderboard.py).
+# Scores grow by 2 ** (half-lives since LEADERBOARD_EPOCH), so move the epoch
+# forward (and run rebuild_leaderboards) every few years, well before
+# 1000 half-lives have passed
+LEADERBOARD_BACKEND = config(
+    'LEADERBOARD_BACKEND',
+    default='utils.leaderboard.RedisLeaderboardStore' if REDIS_URL else 'utils.leaderboard.InMemoryLeaderboardStore'
+)
+LEADERBOARD_EPOCH = config('LEADERBOARD_EPOCH', default='2026-01-01')
+LEADERBOARD_HALF_LIFE_DAYS = config('LEADERBOARD_HALF_LIFE_DAYS', default=7, cast=float)
+LEADERBOARD_MAX_MEMBERS = config('LEADERBOARD_MAX_MEMBERS', default=500, cast=int)
+LEADERBOARD_REBUILD_DAYS = config('LEADERBOARD_REBUILD_DAYS', default=90, cast=int)
+LEADERBOARD_MAX_LIMIT = config('LEADERBOARD_MAX_LIMIT', default=50, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Africa/Johannesburg'
@@ -19,18 +19,24 @@ MIDDLEWARE.insert(0, 'debug_toolbar.middleware.DebugToolbarMiddleware')
 
 INTERNAL_IPS = ['127.0.0.1']
 
+# Expose X-Query-Count / Server-Timing on every response
+METRICS_RESPONSE_HEADERS = True
+
 # Database
 DATABASES = {
-    'default': {
+    'default': database_settings({
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
         'NAME': config('DB_NAME', default='alx_project_nexus_dev'),
         'USER': config('DB_USER', default='postgres'),
         'PASSWORD': config('DB_PASSWORD', default='password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
-    }
+    })
 }
 
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = replica_database_settings(DATABASES['default'])
+
 # SUPABASE (commented out)
 # DATABASES = {
 #     'default': {  
@@ -83,7 +89,7 @@ STATICFILES_DIRS = [
 # Cache
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'utils.cache_backends.InstrumentedLocMemCache',
     }
 }
 
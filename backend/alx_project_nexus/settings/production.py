@@ -24,7 +24,7 @@ CORS_ALLOWED_ORIGINS = [origin.strip() for origin in cors_origins.split(',') if
 
 # Database
 DATABASES = {
-    'default': {
+    'default': database_settings({
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
@@ -34,9 +34,12 @@ DATABASES = {
         'OPTIONS': {
             'sslmode': 'require',
         },
-    }
+    })
 }
 
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = replica_database_settings(DATABASES['default'])
+
 # Security headers
 SECURE_HSTS_SECONDS = 31536000  # 1 year
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
@@ -60,17 +63,14 @@ redis_url = config('REDIS_URL', default='')
 if redis_url:
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'BACKEND': 'utils.cache_backends.InstrumentedRedisCache',
             'LOCATION': redis_url,
-            'OPTIONS': {
-                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-            }
         }
     }
 else:
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'BACKEND': 'utils.cache_backends.InstrumentedLocMemCache',
         }
     }
 
@@ -6,4 +6,7 @@ from . import views
 urlpatterns = [
     path('', views.health_check, name='health_check'),
     path('db/', views.database_check, name='database_check'),
+    path('live/', views.liveness, name='liveness'),
+    path('ready/', views.readiness, name='readiness'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
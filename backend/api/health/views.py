@@ -1,8 +1,12 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
 import datetime
+import hmac
+
+from utils.health import STATUS_FAIL, liveness_report, readiness_report
+from utils.metrics import registry, render_prometheus, summarize
 
 def health_check(request):
     """Basic health check endpoint"""
@@ -39,4 +43,45 @@ def database_check(request):
         'database': db_status,
         'cache': cache_status,
         'timestamp': datetime.datetime.now().isoformat()
-    })
\ No newline at end of file
+    })
+
+def liveness(request):
+    """Liveness probe: the process is up and serving requests"""
+    report = liveness_report()
+    report['timestamp'] = datetime.datetime.now().isoformat()
+    return JsonResponse(report)
+
+def readiness(request):
+    """
+    Readiness probe: database, PostGIS, migrations, cache, task queue and
+    media storage, each with its latency. Returns 503 when a critical check
+    fails. Results are cached for HEALTH_CHECK_CACHE_SECONDS.
+    """
+    report, cached = readiness_report()
+    response = JsonResponse(
+        dict(report, cached=cached),
+        status=503 if report['status'] == STATUS_FAIL else 200
+    )
+    response['Cache-Control'] = 'no-store'
+    return response
+
+def metrics(request):
+    """
+    Per-endpoint request metrics in Prometheus text format, or a JSON summary
+    with ?format=json. Requires the METRICS_TOKEN bearer token; without one
+    configured the metrics are only served when DEBUG is on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            return JsonResponse({'error': 'Metrics are disabled: METRICS_TOKEN is not set'}, status=403)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    
+    snapshot = registry.snapshot()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'endpoints': summarize(snapshot),
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+    return HttpResponse(render_prometheus(snapshot), content_type='text/plain; version=0.0.4')
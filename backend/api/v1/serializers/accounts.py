@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth import get_user_model
 from apps.accounts.models import UserProfile
+from utils.authentication import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -99,6 +101,15 @@ class DashboardStatsSerializer(serializers.Serializer):
     monthly_revenue = serializers.FloatField(required=False)
     featured_businesses = serializers.IntegerField(required=False)
     verified_businesses = serializers.IntegerField(required=False)
+    inactive_businesses = serializers.IntegerField(required=False)
+    pending_verification = serializers.IntegerField(required=False)
+    rejected_businesses = serializers.IntegerField(required=False)
+    low_stock_products = serializers.IntegerField(required=False)
+    out_of_stock_products = serializers.IntegerField(required=False)
+    pending_orders = serializers.IntegerField(required=False)
+    orders_in_progress = serializers.IntegerField(required=False)
+    today_orders = serializers.IntegerField(required=False)
+    today_revenue = serializers.FloatField(required=False)
     
     # Customer stats
     total_spent = serializers.FloatField(required=False)
@@ -111,4 +122,12 @@ class UserBusinessesResponseSerializer(serializers.Serializer):
 
 class ProfileUpdateResponseSerializer(serializers.Serializer):
     user = UserSerializer()
-    message = serializers.CharField()
\ No newline at end of file
+    message = serializers.CharField()
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair whose access token carries user_type, is_staff and business_ids claims"""
+    token_class = ClaimsRefreshToken
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that re-reads user claims into the new access token"""
+    token_class = ClaimsRefreshToken
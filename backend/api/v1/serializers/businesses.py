@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from rest_framework_gis.fields import GeometryField
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 from drf_spectacular.utils import extend_schema_field
-from apps.businesses.models import Business, BusinessCategory, BusinessImage
+from apps.businesses.models import Business, BusinessCategory, BusinessHours, BusinessImage, DeliveryZone
 
 class BusinessCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,6 +16,29 @@ class BusinessImageSerializer(serializers.ModelSerializer):
         model = BusinessImage
         fields = ['id', 'image', 'is_primary', 'created_at']
 
+class BusinessHoursSerializer(serializers.ModelSerializer):
+    weekday_display = serializers.CharField(source='get_weekday_display', read_only=True)
+    
+    class Meta:
+        model = BusinessHours
+        fields = ['weekday', 'weekday_display', 'opens_at', 'closes_at']
+
+class BusinessHoursScheduleSerializer(serializers.Serializer):
+    """A full weekly schedule; replaces the business's existing hours"""
+    MAX_PERIODS_PER_DAY = 4
+    
+    hours = BusinessHoursSerializer(many=True)
+    
+    def validate_hours(self, value):
+        per_day = {}
+        for period in value:
+            per_day[period['weekday']] = per_day.get(period['weekday'], 0) + 1
+        if any(count > self.MAX_PERIODS_PER_DAY for count in per_day.values()):
+            raise serializers.ValidationError(
+                f"At most {self.MAX_PERIODS_PER_DAY} opening periods per day"
+            )
+        return value
+
 class BusinessListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for business listings"""
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -70,6 +95,7 @@ class BusinessDetailSerializer(serializers.ModelSerializer):
     owner = serializers.StringRelatedField(read_only=True)
     category = BusinessCategorySerializer(read_only=True)
     images = BusinessImageSerializer(many=True, read_only=True)
+    hours = BusinessHoursSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
     total_reviews = serializers.SerializerMethodField()
     product_count = serializers.SerializerMethodField()
@@ -83,7 +109,7 @@ class BusinessDetailSerializer(serializers.ModelSerializer):
             'category', 'phone_number', 'email', 'whatsapp_number',
             'address', 'city', 'province', 'postal_code',
             'registration_number', 'tax_number', 'verification_status',
-            'is_active', 'is_featured', 'opens_at', 'closes_at',
+            'is_active', 'is_featured', 'opens_at', 'closes_at', 'hours',
             'logo', 'cover_image', 'images', 'average_rating',
             'total_reviews', 'product_count', 'latitude', 'longitude',
             'created_at', 'updated_at'
@@ -152,9 +178,15 @@ class BusinessGeoJSONSerializer(GeoFeatureModelSerializer):
         ]
 
 class BusinessCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating businesses"""
-    latitude = serializers.FloatField(write_only=True)
-    longitude = serializers.FloatField(write_only=True)
+    """
+    Serializer for creating businesses. Without latitude/longitude the
+    business is placed at the centroid of its gazetteer ``place`` (or of the
+    place geocoded from its address and city); missing city/province are
+    filled in from the gazetteer.
+    """
+    latitude = serializers.FloatField(write_only=True, required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(write_only=True, required=False, min_value=-180, max_value=180)
+    place = serializers.SlugField(write_only=True, required=False, help_text="Gazetteer place slug")
     logo = serializers.ImageField(required=False, allow_null=True)
     cover_image = serializers.ImageField(required=False, allow_null=True)
     
@@ -166,16 +198,56 @@ class BusinessCreateSerializer(serializers.ModelSerializer):
             'address', 'city', 'province', 'postal_code',
             'registration_number', 'tax_number',
             'opens_at', 'closes_at', 'logo', 'cover_image',
-            'latitude', 'longitude'
+            'latitude', 'longitude', 'place'
         ]
+        extra_kwargs = {
+            'city': {'required': False},
+            'province': {'required': False},
+        }
     
-    def create(self, validated_data):
-        # Extract coordinates and create Point
+    def validate(self, data):
         from django.contrib.gis.geos import Point
-        lat = validated_data.pop('latitude')
-        lon = validated_data.pop('longitude')
-        validated_data['location'] = Point(lon, lat)
+        from apps.locations.models import Place
+        from utils.geocoding import GeocodingService
         
+        lat = data.pop('latitude', None)
+        lon = data.pop('longitude', None)
+        slug = data.pop('place', None)
+        if (lat is None) != (lon is None):
+            raise serializers.ValidationError("Provide both latitude and longitude, or neither")
+        
+        if slug:
+            place = Place.objects.defer('boundary').filter(slug=slug).first()
+            if place is None:
+                raise serializers.ValidationError({'place': "Unknown place"})
+            found = GeocodingService.describe(place)
+        elif lat is None:
+            query = ', '.join(part for part in (data.get('address'), data.get('city')) if part)
+            found = GeocodingService.forward(query)
+            if found is None:
+                raise serializers.ValidationError(
+                    "Could not locate this address; provide latitude and longitude or a place"
+                )
+        else:
+            found = None
+        
+        if lat is None:
+            lat, lon = found['latitude'], found['longitude']
+        data['location'] = Point(lon, lat, srid=4326)
+        
+        if not (data.get('city') and data.get('province')):
+            found = found or GeocodingService.reverse(data['location'])
+            if found:
+                if not data.get('city') and found['place_type'] != 'province':
+                    data['city'] = found['city'] or found['name']
+                if not data.get('province'):
+                    data['province'] = found['province']
+        for field in ('city', 'province'):
+            if not data.get(field):
+                raise serializers.ValidationError({field: "This field is required."})
+        return data
+    
+    def create(self, validated_data):
         # Set owner from request user
         validated_data['owner'] = self.context['request'].user
         return super().create(validated_data)
@@ -187,11 +259,90 @@ class BusinessWithProductsSerializer(BusinessListSerializer):
     class Meta(BusinessListSerializer.Meta):
         fields = BusinessListSerializer.Meta.fields + ['featured_products']
     
+    @staticmethod
+    def featured_products_prefetch(per_business):
+        """
+        Prefetches loading the newest ``per_business`` featured products of
+        every business, with their primary images, in one query each. Django
+        filters sliced prefetches with ROW_NUMBER() OVER (PARTITION BY business).
+        """
+        from django.db.models import Prefetch
+        from api.v1.serializers.products import primary_image_prefetch
+        from apps.products.models import Product
+        
+        featured = Product.objects.filter(
+            status='active',
+            is_featured=True
+        ).select_related('category').order_by('-created_at')[:per_business]
+        return [
+            Prefetch('products', queryset=featured, to_attr='featured_product_list'),
+            primary_image_prefetch('featured_product_list__images'),
+        ]
+    
     @extend_schema_field(serializers.ListField(child=serializers.DictField()))
     def get_featured_products(self, obj):
         from api.v1.serializers.products import ProductListSerializer  # Local import
-        featured_products = obj.products.filter(
-            status='active', 
-            is_featured=True
-        )[:4]
-        return ProductListSerializer(featured_products, many=True, context=self.context).data
\ No newline at end of file
+        featured_products = getattr(obj, 'featured_product_list', None)
+        if featured_products is None:
+            featured_products = obj.products.filter(
+                status='active', 
+                is_featured=True
+            )[:4]
+        return ProductListSerializer(featured_products, many=True, context=self.context).data
+
+
+class DeliveryZoneSerializer(serializers.ModelSerializer):
+    """
+    A delivery zone is either a GeoJSON (Multi)Polygon ``area`` or a
+    ``radius_km`` ring around the business, whose area is computed on save
+    """
+    area = GeometryField(required=False, allow_null=True)
+    
+    class Meta:
+        model = DeliveryZone
+        fields = [
+            'id', 'name', 'area', 'radius_km', 'fee', 'min_order_amount',
+            'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate_area(self, value):
+        if value is None:
+            return value
+        if isinstance(value, Polygon):
+            value = MultiPolygon(value, srid=value.srid)
+        if not isinstance(value, MultiPolygon):
+            raise serializers.ValidationError("Area must be a Polygon or MultiPolygon")
+        if not value.valid:
+            raise serializers.ValidationError(f"Invalid area: {value.valid_reason}")
+        if value.srid is None:
+            value.srid = 4326
+        return value
+    
+    def validate(self, data):
+        area = data.get('area', getattr(self.instance, 'area', None))
+        radius_km = data.get('radius_km', getattr(self.instance, 'radius_km', None))
+        if 'radius_km' in data and radius_km is not None:
+            # A ring replaces any drawn area
+            data['area'] = None
+            area = None
+        elif 'area' in data and area is not None:
+            data['radius_km'] = None
+            radius_km = None
+        if area is None and radius_km is None:
+            raise serializers.ValidationError("Provide either an area or a radius_km")
+        if radius_km is not None and radius_km <= 0:
+            raise serializers.ValidationError({'radius_km': "Must be greater than zero"})
+        return data
+
+
+class DeliveryQuoteSerializer(serializers.Serializer):
+    business_id = serializers.IntegerField()
+    business_name = serializers.CharField()
+    delivers = serializers.BooleanField()
+    zone_id = serializers.IntegerField(allow_null=True)
+    zone_name = serializers.CharField(allow_null=True)
+    fee = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    min_order_amount = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    distance_km = serializers.FloatField()
+    meets_minimum = serializers.BooleanField(required=False)
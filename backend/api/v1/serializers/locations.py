@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
+from apps.locations.models import Place
+
+class PlaceSerializer(serializers.ModelSerializer):
+    """Gazetteer entry without its boundary"""
+    label = serializers.CharField(source='__str__', read_only=True)
+    latitude = serializers.SerializerMethodField()
+    longitude = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Place
+        fields = ['id', 'name', 'slug', 'label', 'place_type', 'city', 'province', 'latitude', 'longitude']
+    
+    @extend_schema_field(serializers.FloatField())
+    def get_latitude(self, obj):
+        return obj.centroid.y
+    
+    @extend_schema_field(serializers.FloatField())
+    def get_longitude(self, obj):
+        return obj.centroid.x
+
+class GeocodeResultSerializer(serializers.Serializer):
+    slug = serializers.SlugField()
+    name = serializers.CharField()
+    place_type = serializers.CharField()
+    city = serializers.CharField(allow_blank=True)
+    province = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
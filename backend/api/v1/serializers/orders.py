@@ -3,7 +3,7 @@ from drf_spectacular.utils import extend_schema_field
 from django.contrib.auth import get_user_model
 from apps.orders.models import (
     Cart, CartItem, Order, OrderItem, OrderStatusHistory, 
-    DeliveryInfo, OrderRating
+    DeliveryInfo, OrderRating, OrderEvent
 )
 from api.v1.serializers.products import ProductListSerializer
 from api.v1.serializers.businesses import BusinessListSerializer
@@ -17,6 +17,10 @@ class CartItemSerializer(serializers.ModelSerializer):
     business_name = serializers.CharField(source='product.business.name', read_only=True)
     business_slug = serializers.CharField(source='product.business.slug', read_only=True)
     is_available = serializers.SerializerMethodField()
+    current_price = serializers.DecimalField(
+        source='product.price', max_digits=10, decimal_places=2, read_only=True
+    )
+    price_changed = serializers.SerializerMethodField()
     
     class Meta:
         model = CartItem
@@ -24,9 +28,13 @@ class CartItemSerializer(serializers.ModelSerializer):
             'id', 'product', 'product_name', 'product_image', 
             'business_name', 'business_slug', 'quantity', 
             'unit_price', 'total_price', 'notes', 'is_available',
-            'created_at', 'updated_at'
+            'current_price', 'previous_unit_price', 'price_changed',
+            'price_changed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'unit_price', 'total_price', 'previous_unit_price',
+            'price_changed_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'unit_price', 'total_price', 'created_at', 'updated_at']
     
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_product_image(self, obj):
@@ -40,18 +48,23 @@ class CartItemSerializer(serializers.ModelSerializer):
     @extend_schema_field(serializers.BooleanField())
     def get_is_available(self, obj):
         return obj.product.status == 'active' and obj.product.is_in_stock
+    
+    @extend_schema_field(serializers.BooleanField())
+    def get_price_changed(self, obj):
+        return obj.price_changed_at is not None or obj.unit_price != obj.product.price
 
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total_items = serializers.ReadOnlyField()
     total_amount = serializers.ReadOnlyField()
     businesses = serializers.SerializerMethodField()
+    price_changes = serializers.SerializerMethodField()
     
     class Meta:
         model = Cart
         fields = [
             'id', 'user', 'items', 'total_items', 'total_amount', 
-            'businesses', 'created_at', 'updated_at'
+            'businesses', 'price_changes', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
     
@@ -67,6 +80,14 @@ class CartSerializer(serializers.ModelSerializer):
             }
             for business in businesses
         ]
+    
+    @extend_schema_field(serializers.IntegerField())
+    def get_price_changes(self, obj):
+        """Number of items whose price changed since they were added"""
+        return sum(
+            1 for item in obj.items.all()
+            if item.price_changed_at is not None or item.unit_price != item.product.price
+        )
 
 class AddToCartSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
@@ -87,6 +108,30 @@ class UpdateCartItemSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1)
     notes = serializers.CharField(max_length=500, required=False, allow_blank=True)
 
+class CartOperationSerializer(serializers.Serializer):
+    OPERATIONS = (
+        ('add', 'Add quantity'),
+        ('set', 'Set quantity'),
+        ('remove', 'Remove item'),
+    )
+    
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+    notes = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if data['op'] == 'add':
+            if data.get('quantity', 1) < 1:
+                raise serializers.ValidationError({'quantity': "Quantity must be at least 1"})
+            data.setdefault('quantity', 1)
+        elif data['op'] == 'set' and 'quantity' not in data:
+            raise serializers.ValidationError({'quantity': "Quantity is required for set"})
+        return data
+
+class BatchCartSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
+
 # Order Serializers
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.ReadOnlyField()
@@ -210,12 +255,19 @@ class CreateOrderSerializer(serializers.ModelSerializer):
     def validate(self, data):
         # Validate delivery method requirements
         if data['delivery_method'] == 'delivery':
-            required_fields = ['delivery_address', 'delivery_latitude', 'delivery_longitude']
-            for field in required_fields:
-                if not data.get(field):
+            if not data.get('delivery_address'):
+                raise serializers.ValidationError("Delivery Address is required for delivery orders")
+            
+            # Without coordinates, deliver to the gazetteer place named in the address
+            if data.get('delivery_latitude') is None or data.get('delivery_longitude') is None:
+                from utils.geocoding import GeocodingService
+                found = GeocodingService.forward(data['delivery_address'])
+                if found is None:
                     raise serializers.ValidationError(
-                        f"{field.replace('_', ' ').title()} is required for delivery orders"
+                        "Could not locate the delivery address; provide delivery latitude and longitude"
                     )
+                data['delivery_latitude'] = found['latitude']
+                data['delivery_longitude'] = found['longitude']
         return data
     
     def create(self, validated_data):
@@ -240,14 +292,36 @@ class CreateOrderSerializer(serializers.ModelSerializer):
         if not cart_items.exists():
             raise serializers.ValidationError("No items in cart for this business")
         
+        # Never check out at stale prices: reprice silently, or ask the
+        # customer to review flagged items first
+        from django.conf import settings
+        from utils.order_helpers import CartRepricingService
+        if settings.CART_PRICE_DRIFT_POLICY == CartRepricingService.POLICY_FLAG:
+            if CartRepricingService.drifted_items(cart_items).exists():
+                raise serializers.ValidationError(
+                    "Prices of some items in your cart have changed. Please review your cart."
+                )
+        else:
+            CartRepricingService.reprice(cart_items)
+        
         # Calculate totals
         subtotal = sum(item.total_price for item in cart_items)
         validated_data['subtotal'] = subtotal
         
-        # Calculate fees (you can customize this logic)
+        # Delivery is priced from the business's delivery zones
         delivery_fee = Decimal('0.00')
         if validated_data['delivery_method'] == 'delivery':
-            delivery_fee = Decimal('5.00')  # Fixed delivery fee
+            from utils.delivery import DeliveryZoneService
+            quote = DeliveryZoneService.quote(
+                [business.id], validated_data['delivery_location']
+            ).get(business.id)
+            if not quote or not quote['delivers']:
+                raise serializers.ValidationError("This business does not deliver to your address")
+            if subtotal < quote['min_order_amount']:
+                raise serializers.ValidationError(
+                    f"Delivery to your address needs a minimum order of R{quote['min_order_amount']}"
+                )
+            delivery_fee = quote['fee']
         
         validated_data['delivery_fee'] = delivery_fee
         validated_data['service_fee'] = subtotal * Decimal('0.05')  # 5% service fee
@@ -273,6 +347,15 @@ class CreateOrderSerializer(serializers.ModelSerializer):
                 notes=cart_item.notes
             )
         
+        # Take the stock now; fails the whole checkout if any item ran out
+        from utils.inventory import InventoryLedgerService
+        try:
+            InventoryLedgerService.reserve(
+                order, [(cart_item.product, cart_item.quantity) for cart_item in cart_items]
+            )
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        
         # Clear cart items for this business
         cart_items.delete()
         
@@ -319,4 +402,12 @@ class CreateOrderRatingSerializer(serializers.ModelSerializer):
         validated_data['order'] = order
         validated_data['customer'] = self.context['request'].user
         validated_data['business'] = order.business
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='get_event_type_display', read_only=True)
+    
+    class Meta:
+        model = OrderEvent
+        fields = ['id', 'type', 'business', 'order', 'payload', 'created_at']
+        read_only_fields = fields
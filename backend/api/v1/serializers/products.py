@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from api.v1.serializers.businesses import BusinessListSerializer
@@ -62,6 +63,15 @@ class ProductImageSerializer(serializers.ModelSerializer):
                 fetch_format='auto'
             )
         return None
+def primary_image_prefetch(lookup='images'):
+    """
+    Prefetch only the primary image of each product into ``primary_images``,
+    which ProductListSerializer.get_primary_image uses instead of a query
+    per product
+    """
+    return Prefetch(lookup, queryset=ProductImage.objects.filter(is_primary=True), to_attr='primary_images')
+
+
 class ProductListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for product listings"""
     business_name = serializers.CharField(source='business.name', read_only=True)
@@ -82,7 +92,11 @@ class ProductListSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_images = getattr(obj, 'primary_images', None)
+        if primary_images is not None:
+            primary_image = primary_images[0] if primary_images else None
+        else:
+            primary_image = obj.images.filter(is_primary=True).first()
         if primary_image and primary_image.image:
             public_id = str(primary_image.image)
             if '/upload/' in public_id:
@@ -115,6 +129,25 @@ class ProductListSerializer(serializers.ModelSerializer):
         # Default to True if no stock tracking
         return True
 
+class NearbyProductSerializer(ProductListSerializer):
+    """Product listing with its distance from the search location and its blended score"""
+    distance_km = serializers.SerializerMethodField()
+    score = serializers.FloatField(read_only=True)
+    
+    class Meta(ProductListSerializer.Meta):
+        fields = ProductListSerializer.Meta.fields + ['distance_km', 'score']
+    
+    @extend_schema_field(serializers.FloatField())
+    def get_distance_km(self, obj):
+        return round(obj.distance_m / 1000, 2)
+
+class PopularProductSerializer(ProductListSerializer):
+    """Product listing with its leaderboard popularity (decayed quantity sold)"""
+    popularity = serializers.FloatField(read_only=True)
+    
+    class Meta(ProductListSerializer.Meta):
+        fields = ProductListSerializer.Meta.fields + ['popularity']
+
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Full product details"""
     business = serializers.StringRelatedField(read_only=True)
@@ -166,4 +199,13 @@ class ProductCreateSerializer(serializers.ModelSerializer):
             # Fallback to user's first business
             validated_data['business'] = self.context['request'].user.businesses.first()
         
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class SuggestionSerializer(serializers.Serializer):
+    """Type-ahead suggestion (utils/suggest.py)"""
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField()
+    label = serializers.CharField()
+    slug = serializers.CharField()
+    context = serializers.CharField(help_text="Business name for products, city for businesses")
+    business_id = serializers.IntegerField(allow_null=True)
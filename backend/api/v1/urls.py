@@ -13,11 +13,16 @@ from drf_spectacular.views import (
 
 # Import ViewSets
 from apps.accounts.views import UserViewSet
-from apps.businesses.views import BusinessViewSet, BusinessCategoryViewSet
-from apps.products.views import ProductViewSet, ProductCategoryViewSet
+from apps.businesses.views import BusinessViewSet, BusinessCategoryViewSet, DeliveryZoneViewSet
+from apps.locations.views import PlaceViewSet
+from apps.products.views import ProductViewSet, ProductCategoryViewSet, SuggestView
 from apps.orders.views import (
-    BusinessOrderAnalyticsView, CartViewSet, OrderViewSet, DeliveryInfoViewSet, OrderRatingViewSet
+    BusinessOrderAnalyticsView, BusinessOrderEventListView, CartViewSet, GuestCartViewSet, OrderViewSet,
+    DeliveryInfoViewSet, OrderRatingViewSet
 )
+from apps.orders.streams import business_order_stream, order_status_stream
+from apps.accounts.async_views import dashboard_stats as async_dashboard_stats
+from apps.businesses.async_views import businesses_with_products as async_businesses_with_products
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -29,6 +34,9 @@ router.register(r'users', UserViewSet, basename='user')
 router.register(r'businesses', BusinessViewSet, basename='business')
 router.register(r'business-categories', BusinessCategoryViewSet, basename='businesscategory')
 
+# Place gazetteer endpoints (autocomplete, geocode, reverse)
+router.register(r'places', PlaceViewSet, basename='place')
+
 # Product endpoints  
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'categories', ProductCategoryViewSet, basename='category')  # Changed from 'product-categories'
@@ -59,17 +67,26 @@ urlpatterns = [
     path('auth/logout/', UserViewSet.as_view({'post': 'logout'}), name='user_logout'),
     path('auth/me/', UserViewSet.as_view({'get': 'me', 'put': 'me', 'patch': 'me'}), name='user_profile'),
     path('auth/change-password/', UserViewSet.as_view({'post': 'change_password'}), name='change_password'),
+    path('async/users/dashboard-stats/', async_dashboard_stats, name='async_dashboard_stats'),
     
     # Business specific endpoints
     path('businesses/nearby/', BusinessViewSet.as_view({'get': 'nearby'}), name='businesses_nearby'),
     path('businesses/featured/', BusinessViewSet.as_view({'get': 'featured'}), name='businesses_featured'),
     path('businesses/with-products/', BusinessViewSet.as_view({'get': 'with_products'}), name='businesses_with_products'),
+    path('async/businesses/with-products/', async_businesses_with_products, name='async_businesses_with_products'),
     path('businesses/<int:pk>/toggle-featured/', BusinessViewSet.as_view({'post': 'toggle_featured'}), name='business_toggle_featured'),
     path('businesses/<int:business_id>/products/', ProductViewSet.as_view({'get': 'list', 'post': 'create'}), name='business_products'),
+    path('businesses/<int:business_id>/delivery-zones/', DeliveryZoneViewSet.as_view({'get': 'list', 'post': 'create'}), name='business_delivery_zones'),
+    path('businesses/<int:business_id>/delivery-zones/<int:pk>/', DeliveryZoneViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+    }), name='business_delivery_zone_detail'),
     
     # Product specific endpoints - CLEANED UP
     path('products/featured/', ProductViewSet.as_view({'get': 'featured'}), name='products_featured'),
     path('products/search/', ProductViewSet.as_view({'get': 'search'}), name='products_search'),
+    path('products/nearby/', ProductViewSet.as_view({'get': 'nearby'}), name='products_nearby'),
+    path('products/popular/', ProductViewSet.as_view({'get': 'popular'}), name='products_popular'),
+    path('suggest/', SuggestView.as_view(), name='suggest'),
     # REMOVED: path('products/by-category/<slug:category_slug>/', ...) - This is now redundant!
     
     # Category endpoints with products - NEW CLEAN APPROACH
@@ -77,10 +94,16 @@ urlpatterns = [
     
     # Order specific endpoints
     path('analytics/business/<int:business_id>/', BusinessOrderAnalyticsView.as_view(), name='business-order-analytics'),
+    path('orders/<uuid:order_id>/stream/', order_status_stream, name='order-stream'),
+    path('businesses/<int:business_id>/order-events/', BusinessOrderEventListView.as_view(), name='business-order-events'),
+    path('businesses/<int:business_id>/order-events/stream/', business_order_stream, name='business-order-events-stream'),
     
     # Cart endpoints (singleton pattern)
     path('cart/', CartViewSet.as_view({'get': 'retrieve'}), name='cart-detail'),
     path('cart/add-item/', CartViewSet.as_view({'post': 'add_item'}), name='cart-add-item'),
+    path('cart/batch/', CartViewSet.as_view({'post': 'batch'}), name='cart-batch'),
+    path('cart/accept-prices/', CartViewSet.as_view({'post': 'accept_prices'}), name='cart-accept-prices'),
+    path('cart/delivery-quote/', CartViewSet.as_view({'get': 'delivery_quote'}), name='cart-delivery-quote'),
     path('cart/items/<int:item_id>/', CartViewSet.as_view({
         'patch': 'update_item', 
         'delete': 'remove_item'
@@ -88,5 +111,12 @@ urlpatterns = [
     path('cart/clear/', CartViewSet.as_view({'delete': 'clear'}), name='cart-clear'),
     path('cart/clear-business/<int:business_id>/', CartViewSet.as_view({
         'delete': 'clear_business'
-    }), name='cart-clear-business')
+    }), name='cart-clear-business'),
+    
+    # Guest cart endpoints (anonymous, cookie identified)
+    path('guest-cart/', GuestCartViewSet.as_view({
+        'get': 'retrieve',
+        'delete': 'clear'
+    }), name='guest-cart-detail'),
+    path('guest-cart/batch/', GuestCartViewSet.as_view({'post': 'batch'}), name='guest-cart-batch'),
 ]
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Async version of UserViewSet.dashboard_stats. The three KPI aggregates of
+OwnerDashboardService are independent queries and run concurrently
+(utils/async_db.py). See apps/businesses/async_views.py.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from utils.async_db import gather_queries
+from utils.authentication import authenticate_request
+from utils.dashboard import OwnerDashboardService
+
+
+async def dashboard_stats(request):
+    """Async UserViewSet.dashboard_stats: the owner aggregates run concurrently"""
+    user = await sync_to_async(authenticate_request)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    if user.user_type != 'business_owner':
+        return JsonResponse({
+            'total_orders': 0,
+            'total_spent': 0.0,
+            'favorite_businesses': 0,
+            'reviews_written': 0,
+        })
+
+    stats = await sync_to_async(OwnerDashboardService.get_cached)(user.id)
+    if stats is None:
+        parts = await gather_queries(
+            (OwnerDashboardService.business_stats, user.id),
+            (OwnerDashboardService.product_stats, user.id),
+            (OwnerDashboardService.order_stats, user.id),
+        )
+        stats = await sync_to_async(OwnerDashboardService.store)(user.id, *parts)
+    return JsonResponse(stats)
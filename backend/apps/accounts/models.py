@@ -26,9 +26,22 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Fields access tokens carry or depend on; changing any revokes them
+    TOKEN_STATE_FIELDS = ('is_active', 'is_staff', 'is_superuser', 'user_type')
+
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored token state so saves can tell whether it changed
+        instance._loaded_token_state = instance.token_state()
+        return instance
+
+    def token_state(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_STATE_FIELDS)
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
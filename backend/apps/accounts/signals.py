@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import User
+from utils.authentication import invalidate_cached_user, revoke_user_tokens
+
+@receiver(post_save, sender=User)
+def refresh_cached_user(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the cached row so the next request sees the change"""
+    invalidate_cached_user(instance.pk)
+    
+    # Access tokens carry the staff flag and user type and are validated
+    # without a database hit, so a deactivated or demoted account would
+    # otherwise keep its old rights until its token expires
+    state = instance.token_state()
+    previous_state = getattr(instance, '_loaded_token_state', None)
+    instance._loaded_token_state = state
+    if created:
+        return
+    if update_fields is not None and not set(update_fields) & set(User.TOKEN_STATE_FIELDS):
+        return
+    if not instance.is_active or previous_state != state:
+        revoke_user_tokens(instance.pk)
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+    revoke_user_tokens(instance.pk)
@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
@@ -16,6 +17,9 @@ from api.v1.serializers.accounts import (
     DashboardStatsSerializer, UserBusinessesResponseSerializer,
     ProfileUpdateResponseSerializer
 )
+from utils.authentication import ClaimsRefreshToken
+from utils.dashboard import OwnerDashboardService
+from utils.order_helpers import GuestCartService
 
 User = get_user_model()
 
@@ -186,7 +190,10 @@ class UserViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
+            
+            # Carry over anything the user added to their cart while anonymous
+            merged_items = GuestCartService.merge_into_user_cart(request, user)
             
             response_data = {
                 'user': UserSerializer(user, context={'request': request}).data,
@@ -197,7 +204,10 @@ class UserViewSet(viewsets.ModelViewSet):
                 'message': 'Login successful'
             }
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            response = Response(response_data, status=status.HTTP_200_OK)
+            if merged_items:
+                response.delete_cookie(settings.GUEST_CART_COOKIE_NAME)
+            return response
         else:
             return Response(
                 {'error': 'Invalid username or password'}, 
@@ -322,8 +332,13 @@ class UserViewSet(viewsets.ModelViewSet):
     def my_businesses(self, request):
         """Get current user's businesses"""
         from api.v1.serializers.businesses import BusinessListSerializer
+        from apps.businesses.models import Business
         
-        businesses = request.user.businesses.filter(is_active=True)
+        # One query; filtering on the id avoids loading the user row
+        businesses = list(
+            Business.objects.filter(owner_id=request.user.id, is_active=True)
+            .select_related('category')
+        )
         serializer = BusinessListSerializer(
             businesses, 
             many=True, 
@@ -331,13 +346,13 @@ class UserViewSet(viewsets.ModelViewSet):
         )
         
         return Response({
-            'count': businesses.count(),
+            'count': len(businesses),
             'businesses': serializer.data
         })
     
     @extend_schema(
         summary="Get user dashboard stats",
-        description="Get dashboard statistics for business owners",
+        description="Get dashboard statistics for business owners (cached for a short time)",
         tags=["Users"],
         responses={
             200: DashboardStatsSerializer
@@ -349,24 +364,7 @@ class UserViewSet(viewsets.ModelViewSet):
         user = request.user
         
         if user.user_type == 'business_owner':
-            businesses = user.businesses.filter(is_active=True)
-            total_businesses = businesses.count()
-            
-            # Calculate total products across all businesses
-            total_products = sum(
-                business.products.filter(status='active').count() 
-                for business in businesses
-            )
-            
-            # Basic stats (implement order tracking as needed)
-            stats = {
-                'total_businesses': total_businesses,
-                'total_products': total_products,
-                'total_orders': 0,  # Implement when order system is ready
-                'monthly_revenue': 0.0,  # Implement when order system is ready
-                'featured_businesses': businesses.filter(is_featured=True).count(),
-                'verified_businesses': businesses.filter(verification_status='verified').count(),
-            }
+            stats = OwnerDashboardService.get_stats(user.id)
         else:
             # Customer stats
             stats = {
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.gis.admin import GISModelAdmin
 from django.utils.html import format_html
 from django.db.models import Avg, Count
-from .models import Business, BusinessCategory, BusinessImage
+from .models import Business, BusinessCategory, BusinessHours, BusinessImage, DeliveryZone
 
 @admin.register(BusinessCategory)
 class BusinessCategoryAdmin(admin.ModelAdmin):
@@ -16,10 +16,28 @@ class BusinessImageInline(admin.TabularInline):
     extra = 1
     fields = ['image', 'is_primary']
 
+class BusinessHoursInline(admin.TabularInline):
+    model = BusinessHours
+    extra = 0
+    fields = ['weekday', 'opens_at', 'closes_at']
+
+class DeliveryZoneInline(admin.TabularInline):
+    model = DeliveryZone
+    extra = 0
+    # Areas are edited on the delivery zone admin page (map widget)
+    fields = ['name', 'radius_km', 'fee', 'min_order_amount', 'is_active']
+
+@admin.register(DeliveryZone)
+class DeliveryZoneAdmin(GISModelAdmin):
+    list_display = ['name', 'business', 'radius_km', 'fee', 'min_order_amount', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['name', 'business__name']
+    raw_id_fields = ['business']
+
 @admin.register(Business)
 class BusinessAdmin(GISModelAdmin):
     """Business admin with map support"""
-    inlines = [BusinessImageInline]
+    inlines = [BusinessImageInline, BusinessHoursInline, DeliveryZoneInline]
     list_display = [
         'name', 'owner', 'business_type', 'category', 'city', 
         'verification_status', 'is_active', 'is_featured', 'get_total_reviews', 
@@ -0,0 +1,45 @@
+"""
+Async versions of read-heavy endpoints. They return the same payloads as
+their DRF counterparts, but run their queries on worker threads
+(utils/async_db.py), so the event loop keeps serving other requests.
+
+Like the order streams these are plain async Django views, and they only pay
+off when the project is served through asgi.py (GUNICORN_PROFILE=asgi).
+"""
+from django.conf import settings
+from django.http import JsonResponse
+
+from api.v1.serializers.businesses import BusinessWithProductsSerializer
+from apps.businesses.models import Business
+from utils.async_db import run_query
+
+
+def _businesses_with_products(limit, per_business, context):
+    businesses = Business.objects.filter(is_active=True).select_related(
+        'category', 'owner'
+    ).prefetch_related(
+        *BusinessWithProductsSerializer.featured_products_prefetch(per_business)
+    ).order_by('-is_featured', '-created_at')[:limit]
+    return BusinessWithProductsSerializer(businesses, many=True, context=context).data
+
+
+async def businesses_with_products(request):
+    """
+    Async BusinessViewSet.with_products: the page and every business's
+    featured products (one windowed query) load off the event loop
+    """
+    try:
+        limit = int(request.GET.get('limit', settings.WITH_PRODUCTS_BUSINESS_LIMIT))
+        per_business = int(request.GET.get('products', settings.WITH_PRODUCTS_PER_BUSINESS))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'limit and products must be integers'}, status=400)
+    limit = max(1, min(limit, settings.WITH_PRODUCTS_MAX_BUSINESSES))
+    per_business = max(1, min(per_business, settings.WITH_PRODUCTS_MAX_PER_BUSINESS))
+
+    business_data = await run_query(_businesses_with_products, limit, per_business, {'request': request})
+    return JsonResponse(business_data, safe=False)
+
+
+# Served from the read replica (see ReplicaRoutingMiddleware)
+businesses_with_products.replica_reads = True
+
@@ -0,0 +1,271 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+from apps.businesses.models import Business
+from apps.products.models import Product
+from apps.orders.models import Order
+from concurrent.futures import ThreadPoolExecutor
+import json
+import math
+import random
+import time
+
+from utils.data_generator import PRODUCT_WORDS, TOWNSHIPS
+from .seed_benchmark_data import benchmark_generator
+
+User = get_user_model()
+
+API = '/api/v1'
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class QueryTally:
+    """``connection.execute_wrapper`` that counts the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure throughput, p50/p95 latency and query counts of the API hot paths '
+        'against the dataset created by seed_benchmark_data'
+    )
+
+    SCENARIOS = ['product_list', 'product_search', 'with_products', 'nearby', 'cart_add', 'checkout', 'analytics']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel clients per scenario')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=self.SCENARIOS,
+            help='Scenario to run (repeatable, default all)'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for request parameters')
+        parser.add_argument('--host', default='localhost', help='Host header sent with requests')
+        parser.add_argument('--label', default='', help='Free text stored with the results')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='JSON file of a previous run to compare against')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.load_fixtures()
+
+        results = {}
+        for name in options['scenario'] or self.SCENARIOS:
+            self.stdout.write(f"Running {name}...")
+            results[name] = self.run_scenario(name)
+
+        report = {
+            'label': options['label'],
+            'started_at': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'concurrency': options['concurrency'],
+            'dataset': {
+                'businesses': Business.objects.count(),
+                'products': Product.objects.count(),
+                'orders': Order.objects.count(),
+            },
+            'scenarios': results,
+        }
+
+        self.print_report(results)
+        if options['compare']:
+            self.print_comparison(results, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def load_fixtures(self):
+        from utils.authentication import ClaimsRefreshToken
+
+        generator = benchmark_generator()
+        customer = generator.generated_customers().order_by('id').first()
+        business = (
+            generator.generated_businesses().filter(products__isnull=False)
+            .select_related('owner').order_by('id').first()
+        )
+        if customer is None or business is None:
+            raise CommandError('No benchmark data found, run seed_benchmark_data first')
+
+        self.customer_token = str(ClaimsRefreshToken.for_user(customer).access_token)
+        self.owner_token = str(ClaimsRefreshToken.for_user(business.owner).access_token)
+        self.business_id = business.id
+        self.product_ids = list(
+            Product.objects.filter(
+                business=business, status='active', stock_quantity__gt=100
+            ).values_list('id', flat=True)[:50]
+        )
+        if not self.product_ids:
+            raise CommandError(f'Business {business.id} has no products in stock to order')
+        self.pages = max(1, min(Product.objects.filter(status='active').count() // 20, 50))
+
+    def client(self):
+        return Client(HTTP_HOST=self.options['host'])
+
+    def auth(self, token):
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    # Each scenario returns (setup, request): setup runs untimed before the
+    # request, both take the Client; request returns the response
+
+    def scenario_product_list(self):
+        page = self.random.randint(1, self.pages)
+        return None, lambda client: client.get(f'{API}/products/', {'page': page})
+
+    def scenario_product_search(self):
+        query = self.random.choice(self.random.choice(list(PRODUCT_WORDS.values())))
+        return None, lambda client: client.get(f'{API}/products/search/', {'q': query})
+
+    def scenario_with_products(self):
+        return None, lambda client: client.get(f'{API}/businesses/with-products/')
+
+    def scenario_nearby(self):
+        _, _, _, lat, lon, spread = self.random.choice(TOWNSHIPS)
+        params = {
+            'lat': lat + self.random.uniform(-spread, spread),
+            'lon': lon + self.random.uniform(-spread, spread),
+            'radius': 5,
+        }
+        return None, lambda client: client.get(f'{API}/businesses/nearby/', params)
+
+    def add_to_cart(self, client, product_id):
+        return client.post(
+            f'{API}/cart/add-item/',
+            {'product_id': product_id, 'quantity': 1},
+            content_type='application/json',
+            **self.auth(self.customer_token)
+        )
+
+    def scenario_cart_add(self):
+        product_id = self.random.choice(self.product_ids)
+        return None, lambda client: self.add_to_cart(client, product_id)
+
+    def scenario_checkout(self):
+        product_id = self.random.choice(self.product_ids)
+        payload = {
+            'business': self.business_id,
+            'delivery_method': 'pickup',
+            'customer_name': 'Bench Customer',
+            'customer_phone': '+27600000000',
+        }
+        return (
+            lambda client: self.add_to_cart(client, product_id),
+            lambda client: client.post(
+                f'{API}/orders/', payload, content_type='application/json', **self.auth(self.customer_token)
+            )
+        )
+
+    def scenario_analytics(self):
+        return None, lambda client: client.get(
+            f'{API}/analytics/business/{self.business_id}/', **self.auth(self.owner_token)
+        )
+
+    def run_requests(self, name, count):
+        """Issue ``count`` requests on this thread's connection; returns samples"""
+        client = self.client()
+        tally = QueryTally()
+        samples = []
+        try:
+            with connection.execute_wrapper(tally):
+                for _ in range(count):
+                    setup, request = getattr(self, f'scenario_{name}')()
+                    if setup is not None:
+                        setup(client)
+                    tally.count = 0
+                    started = time.perf_counter()
+                    response = request(client)
+                    samples.append((time.perf_counter() - started, tally.count, response.status_code))
+        finally:
+            # Worker threads open their own connections
+            connections.close_all()
+        return samples
+
+    def run_scenario(self, name):
+        options = self.options
+        self.run_requests(name, options['warmup'])
+
+        workers = max(1, options['concurrency'])
+        shares = [options['iterations'] // workers + (i < options['iterations'] % workers) for i in range(workers)]
+        started = time.perf_counter()
+        if workers == 1:
+            samples = self.run_requests(name, shares[0])
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                samples = [
+                    sample
+                    for batch in pool.map(lambda share: self.run_requests(name, share), shares)
+                    for sample in batch
+                ]
+        elapsed = time.perf_counter() - started
+
+        latencies = [sample[0] * 1000 for sample in samples]
+        queries = [sample[1] for sample in samples]
+        errors = sum(1 for sample in samples if sample[2] >= 400)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+                'p50': round(percentile(latencies, 0.50), 2) if latencies else None,
+                'p95': round(percentile(latencies, 0.95), 2) if latencies else None,
+                'max': round(max(latencies), 2) if latencies else None,
+            },
+            'queries': {
+                'p50': percentile(queries, 0.50),
+                'max': max(queries) if queries else None,
+            },
+        }
+
+    def print_report(self, results):
+        self.stdout.write(
+            f"\n{'scenario':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'errors':>8}"
+        )
+        for name, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:<16}{result['throughput_rps'] or 0:>9.1f}{latency['p50'] or 0:>9.1f}"
+                f"{latency['p95'] or 0:>9.1f}{result['queries']['p50'] or 0:>9}{result['errors']:>8}"
+            )
+
+    def print_comparison(self, results, path):
+        try:
+            with open(path) as handle:
+                baseline = json.load(handle)['scenarios']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Could not read baseline {path}: {e}')
+
+        self.stdout.write(f"\nCompared to {path}:")
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            changes = []
+            for label, before, after in (
+                ('p50', previous['latency_ms']['p50'], result['latency_ms']['p50']),
+                ('p95', previous['latency_ms']['p95'], result['latency_ms']['p95']),
+            ):
+                if before and after is not None:
+                    changes.append(f"{label} {(after - before) / before * 100:+.1f}%")
+            changes.append(f"queries {previous['queries']['p50']} -> {result['queries']['p50']}")
+            self.stdout.write(f"  {name:<16}" + ', '.join(changes))
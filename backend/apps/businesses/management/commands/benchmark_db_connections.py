@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+
+from .benchmark_api import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the cost of opening a new database connection per request with '
+        'reusing one through the configured connection handling (DB_CONNECTION_MODE)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Run requests on this many threads, one request per new thread as under ASGI'
+        )
+        parser.add_argument('--database', default='default', help='Database alias')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        results = {
+            'new_connection': self.measure(self.new_connection_request, options),
+            'configured': self.measure(self.configured_request, options),
+        }
+
+        wrapper = connections[alias]
+        self.stdout.write(
+            f"\nengine={wrapper.settings_dict['ENGINE']} "
+            f"CONN_MAX_AGE={wrapper.settings_dict['CONN_MAX_AGE']}"
+        )
+        self.stdout.write(f"{'mode':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<16}{result['throughput_rps']:>9.1f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            )
+        if hasattr(wrapper, 'pool_stats'):
+            self.stdout.write(f"pool: {wrapper.pool_stats()}")
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'engine': wrapper.settings_dict['ENGINE'], 'modes': results}, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def new_connection_request(self, alias):
+        """What every request paid before: connect (TCP + TLS + auth), query, disconnect"""
+        wrapper = connections[alias]
+        params = wrapper.get_connection_params()
+        raw = wrapper.Database.connect(**params)
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        finally:
+            raw.close()
+
+    def configured_request(self, alias):
+        """A request through Django: connect, query, close_old_connections at the end"""
+        wrapper = connections[alias]
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        wrapper.close_if_unusable_or_obsolete()
+
+    def measure(self, request, options):
+        alias = options['database']
+
+        def timed():
+            started = time.perf_counter()
+            request(alias)
+            return (time.perf_counter() - started) * 1000
+
+        # Warm up the configured pool/persistent connection like a running worker
+        request(alias)
+
+        started = time.perf_counter()
+        if options['threads'] > 1:
+            def on_new_thread():
+                # ASGI runs each request on a fresh thread, so thread-local
+                # connections are never reused; emulate that here
+                with ThreadPoolExecutor(max_workers=1) as single:
+                    latency = single.submit(timed).result()
+                    single.submit(connections.close_all).result()
+                return latency
+
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                latencies = list(pool.map(lambda _: on_new_thread(), range(options['requests'])))
+        else:
+            latencies = [timed() for _ in range(options['requests'])]
+        elapsed = time.perf_counter() - started
+
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+        }
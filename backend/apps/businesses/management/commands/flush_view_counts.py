@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from utils.view_counter import ViewCounterService
+
+class Command(BaseCommand):
+    help = 'Copy buffered product and business view totals into DailyViewCount (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--day',
+            action='append',
+            help='Day to flush (YYYY-MM-DD, repeatable); defaults to today and yesterday'
+        )
+
+    def handle(self, *args, **options):
+        days = None
+        if options['day']:
+            try:
+                days = [date.fromisoformat(day) for day in options['day']]
+            except ValueError as exc:
+                raise CommandError(f"Invalid --day: {exc}")
+
+        written = ViewCounterService.flush(days)
+        self.stdout.write(self.style.SUCCESS(f"Flushed view counts for {written} products and businesses"))
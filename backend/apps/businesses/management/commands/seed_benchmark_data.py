@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from utils.data_generator import SyntheticDataGenerator
+
+BENCH_PREFIX = 'bench_'
+BENCH_ORDER_PREFIX = 'BEN-'
+
+
+def benchmark_generator(**kwargs):
+    """Generator for benchmark data, shared with benchmark_api"""
+    return SyntheticDataGenerator(prefix=BENCH_PREFIX, order_prefix=BENCH_ORDER_PREFIX, **kwargs)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset with bulk inserts for benchmark_api'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=10000, help='Number of businesses')
+        parser.add_argument('--products', type=int, default=500000, help='Number of products')
+        parser.add_argument('--orders', type=int, default=1000000, help='Number of orders')
+        parser.add_argument('--customers', type=int, default=20000, help='Number of customers placing orders')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT statement')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated benchmark data first'
+        )
+
+    def handle(self, *args, **options):
+        generator = benchmark_generator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write
+        )
+
+        if options['clear']:
+            self.stdout.write('Clearing benchmark data...')
+            generator.clear()
+
+        counts = generator.generate(
+            businesses=options['businesses'],
+            products=options['products'],
+            orders=options['orders'],
+            customers=options['customers']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Benchmark dataset ready: {counts['businesses']} businesses, "
+                f"{counts['products']} products, {counts['orders']} orders "
+                f"(password for {BENCH_PREFIX} users: '{generator.PASSWORD}')"
+            )
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:40
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0002_businessimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('area', django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326)),
+                ('radius_km', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_order_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_zones', to='businesses.business')),
+            ],
+            options={
+                'ordering': ['business', 'fee'],
+                'indexes': [models.Index(fields=['business', 'is_active'], name='businesses__busines_ff284c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0003_deliveryzone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('opens_at', models.TimeField()),
+                ('closes_at', models.TimeField()),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hours', to='businesses.business')),
+            ],
+            options={
+                'verbose_name_plural': 'Business hours',
+                'ordering': ['business', 'weekday', 'opens_at'],
+                'indexes': [
+                    models.Index(fields=['weekday', 'opens_at', 'closes_at'], name='businesses__weekday_7f19de_idx'),
+                    models.Index(fields=['business', 'weekday'], name='businesses__busines_668f86_idx'),
+                ],
+            },
+        ),
+    ]
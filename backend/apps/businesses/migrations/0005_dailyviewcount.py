@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-19 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0004_businesshours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyViewCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('business', 'Business')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_visitors', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id', 'day'), name='daily_view_count_unique')],
+            },
+        ),
+    ]
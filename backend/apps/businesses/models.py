@@ -100,6 +100,18 @@ class Business(models.Model):
         models.Index(fields=['created_at']),
     ]
         
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored owner so saves can detect ownership transfers
+        instance._loaded_owner_id = instance.__dict__.get('owner_id')
+        # ... and location, so ring delivery zones only move when it does
+        location = instance.__dict__.get('location')
+        instance._loaded_location = location.clone() if location is not None else None
+        # ... and what its products' suggestions depend on
+        instance._loaded_suggestion = (instance.__dict__.get('name'), instance.__dict__.get('is_active'))
+        return instance
+    
     @property
     def average_rating(self):
         return self.reviews.aggregate(avg=Avg('rating'))['avg'] or 0.0
@@ -160,6 +172,69 @@ class BusinessImage(models.Model):
 
     class Meta:
         ordering = ['-is_primary', 'id']
+
+
+class BusinessHours(models.Model):
+    """
+    Weekly opening hours, one row per opening period (a day may have
+    several). A period whose closes_at is not after opens_at runs past
+    midnight; equal times mean open all day. Businesses without rows use
+    Business.opens_at / closes_at for every day.
+    """
+    WEEKDAYS = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='hours')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    opens_at = models.TimeField()
+    closes_at = models.TimeField()
+
+    class Meta:
+        verbose_name_plural = "Business hours"
+        ordering = ['business', 'weekday', 'opens_at']
+        indexes = [
+            # "Open at this weekday and time" scans one weekday's periods
+            models.Index(fields=['weekday', 'opens_at', 'closes_at']),
+            models.Index(fields=['business', 'weekday']),
+        ]
+
+    def __str__(self):
+        return f"{self.business.name} - {self.get_weekday_display()} {self.opens_at}-{self.closes_at}"
+
+
+class DeliveryZone(models.Model):
+    """
+    Area a business delivers to and the fee it charges there. The area is
+    drawn by the owner, or is a ring of ``radius_km`` around the business that
+    DeliveryZoneService (utils/delivery.py) keeps in sync with its location.
+    Where zones of a business overlap the smallest one applies, so concentric
+    rings form fee tiers.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='delivery_zones')
+    name = models.CharField(max_length=100)
+    area = models.MultiPolygonField(null=True, blank=True)
+    radius_km = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    fee = models.DecimalField(max_digits=10, decimal_places=2)
+    min_order_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['business', 'fee']
+        indexes = [
+            models.Index(fields=['business', 'is_active']),
+        ]
+
+    def __str__(self):
+        return f"{self.business.name} - {self.name}"
         
 
 
@@ -177,4 +252,30 @@ class BusinessManager(models.Manager):
         return BusinessQuerySet(self.model, using=self._db).with_stats()
     
     def with_stats(self):
-        return self.get_queryset().with_stats()
\ No newline at end of file
+        return self.get_queryset().with_stats()
+
+class DailyViewCount(models.Model):
+    """
+    Page views of a product or business per day (Africa/Johannesburg).
+    Rows are only written by ``manage.py flush_view_counts`` from the view
+    counter buffer (utils/view_counter.py), never on the request path.
+    """
+    KINDS = (
+        ('product', 'Product'),
+        ('business', 'Business'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Upsert target; also serves "views of X since day D"
+            models.UniqueConstraint(fields=['kind', 'object_id', 'day'], name='daily_view_count_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} on {self.day}: {self.views}"
@@ -1,6 +1,6 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Business
+from .models import Business, BusinessCategory, DeliveryZone
 from django.utils.text import slugify
 from django.utils.crypto import get_random_string
 
@@ -25,3 +25,89 @@ def set_business_slug(sender, instance, **kwargs):
 
         # Fallback to random suffix
         instance.slug = f"{base_slug}-{get_random_string(6).lower()}"
+
+@receiver(post_save, sender=Business)
+def refresh_owner_auth(sender, instance, created, **kwargs):
+    """
+    Owned business ids travel in access token claims. New businesses are
+    picked up at the next token refresh; a previous owner must not keep
+    access, so their current tokens are revoked on transfer.
+    """
+    from utils.authentication import invalidate_cached_user, revoke_user_tokens
+    from utils.dashboard import OwnerDashboardService
+    
+    invalidate_cached_user(instance.owner_id)
+    OwnerDashboardService.invalidate(instance.owner_id)
+    previous_owner_id = getattr(instance, '_loaded_owner_id', None)
+    if previous_owner_id is not None and previous_owner_id != instance.owner_id:
+        invalidate_cached_user(previous_owner_id)
+        revoke_user_tokens(previous_owner_id)
+    instance._loaded_owner_id = instance.owner_id
+
+@receiver(post_save, sender=Business)
+def move_delivery_rings(sender, instance, created, **kwargs):
+    """Ring delivery zones follow the business location"""
+    previous_location = getattr(instance, '_loaded_location', None)
+    if not created and (previous_location is None or previous_location != instance.location):
+        from utils.delivery import DeliveryZoneService
+        DeliveryZoneService.refresh_rings(business_id=instance.id)
+    instance._loaded_location = instance.location.clone() if instance.location is not None else None
+
+@receiver(post_save, sender=DeliveryZone)
+def build_delivery_ring(sender, instance, **kwargs):
+    if instance.radius_km is not None:
+        from utils.delivery import DeliveryZoneService
+        DeliveryZoneService.refresh_rings(zone_id=instance.id)
+
+@receiver(post_delete, sender=Business)
+def forget_deleted_business(sender, instance, **kwargs):
+    from utils.authentication import invalidate_cached_user
+    from utils.dashboard import OwnerDashboardService
+    invalidate_cached_user(instance.owner_id)
+    OwnerDashboardService.invalidate(instance.owner_id)
+
+@receiver(post_save, sender=Business)
+def update_business_suggestion(sender, instance, created, **kwargs):
+    """
+    A deactivated business takes its products out of the suggestions; a
+    reactivated or renamed one puts them back with its current name.
+    """
+    from apps.products.models import Product
+    from utils.suggest import Suggestion, SuggestService
+    previous = getattr(instance, '_loaded_suggestion', None)
+    instance._loaded_suggestion = (instance.name, instance.is_active)
+    if instance.is_active:
+        SuggestService.record_on_commit('upsert', Suggestion(
+            'business', instance.pk, instance.name, instance.slug, instance.city, instance.pk, None
+        ))
+        if not created and previous != instance._loaded_suggestion:
+            SuggestService.record_on_commit('business_products', (instance.pk, [
+                Suggestion('product', product_id, name, slug, instance.name, instance.pk, None)
+                for product_id, name, slug in Product.objects.filter(
+                    business_id=instance.pk, status='active'
+                ).values_list('id', 'name', 'slug')
+            ]))
+    else:
+        SuggestService.record_on_commit('delete', ('business', instance.pk))
+        SuggestService.record_on_commit('drop_business', instance.pk)
+
+@receiver(post_delete, sender=Business)
+def remove_business_suggestion(sender, instance, **kwargs):
+    from utils.suggest import SuggestService
+    SuggestService.record_on_commit('delete', ('business', instance.pk))
+    SuggestService.record_on_commit('drop_business', instance.pk)
+
+@receiver(post_save, sender=BusinessCategory)
+def update_business_category_suggestion(sender, instance, **kwargs):
+    from utils.suggest import Suggestion, SuggestService
+    if instance.is_active:
+        SuggestService.record_on_commit('upsert', Suggestion(
+            'business_category', instance.pk, instance.name, instance.slug, '', None, None
+        ))
+    else:
+        SuggestService.record_on_commit('delete', ('business_category', instance.pk))
+
+@receiver(post_delete, sender=BusinessCategory)
+def remove_business_category_suggestion(sender, instance, **kwargs):
+    from utils.suggest import SuggestService
+    SuggestService.record_on_commit('delete', ('business_category', instance.pk))
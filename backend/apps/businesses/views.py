@@ -1,17 +1,28 @@
 from rest_framework import viewsets, filters, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import transaction
 from django.contrib.gis.measure import Distance
+from django.contrib.gis.db.models.functions import Distance as GeoDistance
 from django.contrib.gis.geos import Point
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
-from apps.businesses.models import Business, BusinessCategory
+from apps.businesses.models import Business, BusinessCategory, BusinessHours, DeliveryZone
+from utils.delivery import DeliveryZoneService
+from utils.geocoding import GeocodingService
+from utils.helpers import bounding_degrees
+from utils.opening_hours import OpeningHoursService
+from utils.permissions import IsObjectBusinessOwner, owns_business
+from utils.view_counter import ViewCounterService
 from api.v1.serializers.businesses import (
     BusinessListSerializer, BusinessDetailSerializer, 
     BusinessCreateSerializer, BusinessCategorySerializer,
-    BusinessWithProductsSerializer
+    BusinessWithProductsSerializer, DeliveryZoneSerializer,
+    BusinessHoursSerializer, BusinessHoursScheduleSerializer
 )
 
 @extend_schema_view(
@@ -36,6 +47,7 @@ class BusinessCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = BusinessCategorySerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
+    replica_actions = ['list', 'retrieve']
 
 @extend_schema_view(
     list=extend_schema(
@@ -81,6 +93,30 @@ class BusinessCategoryViewSet(viewsets.ReadOnlyModelViewSet):
                 description='Order results by field',
                 enum=['name', '-name', 'created_at', '-created_at', 'average_rating', '-average_rating']
             ),
+            OpenApiParameter(
+                name='place',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses inside this gazetteer place (slug, see places/autocomplete/)'
+            ),
+            OpenApiParameter(
+                name='delivers_to',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses delivering to this "latitude,longitude"'
+            ),
+            OpenApiParameter(
+                name='open_now',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses open now (South African time)'
+            ),
+            OpenApiParameter(
+                name='opens_within',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses that are closed but open within this many minutes'
+            ),
         ]
     ),
     retrieve=extend_schema(
@@ -122,6 +158,8 @@ class BusinessViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at', 'average_rating']
     ordering = ['-is_featured', '-created_at']
     lookup_field = 'slug'
+    # Read-only actions served from the read replica (utils/db_router.py)
+    replica_actions = ['list', 'retrieve', 'nearby', 'featured', 'with_products', 'stats']
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -139,7 +177,7 @@ class BusinessViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         else:
             # Update, delete only for business owners
-            return [permissions.IsAuthenticated()]
+            return [permissions.IsAuthenticated(), IsObjectBusinessOwner()]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -147,7 +185,30 @@ class BusinessViewSet(viewsets.ModelViewSet):
         # Filter by owner for non-public actions
         if self.action not in ['list', 'retrieve', 'nearby', 'featured', 'with_products']:
             if self.request.user.is_authenticated:
-                queryset = queryset.filter(owner=self.request.user)
+                queryset = queryset.filter(owner_id=self.request.user.id)
+        
+        delivers_to = self.request.query_params.get('delivers_to')
+        if delivers_to and self.action == 'list':
+            point = DeliveryZoneService.parse_point(delivers_to)
+            if point is None:
+                raise ValidationError({'delivers_to': 'Expected "latitude,longitude"'})
+            queryset = DeliveryZoneService.delivering_to(queryset, point)
+        
+        place = self.request.query_params.get('place')
+        if place and self.action in ['list', 'nearby']:
+            within_place = GeocodingService.within_place_q(place)
+            if within_place is None:
+                raise ValidationError({'place': 'Unknown place'})
+            queryset = queryset.filter(within_place)
+        
+        if self.action in ['list', 'nearby']:
+            try:
+                queryset = OpeningHoursService.filter_queryset(queryset, self.request.query_params)
+            except ValueError:
+                raise ValidationError({'opens_within': 'Expected a positive number of minutes'})
+        
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('hours')
         
         return queryset.select_related('category', 'owner').prefetch_related('images')
     
@@ -160,6 +221,12 @@ class BusinessViewSet(viewsets.ModelViewSet):
         
         return context
     
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Buffered in memory; flush_view_counts writes the daily totals
+        ViewCounterService.record(request, 'business', response.data['id'])
+        return response
+    
     @extend_schema(
         summary="Get nearby businesses",
         description="Find businesses near a specific location",
@@ -186,6 +253,24 @@ class BusinessViewSet(viewsets.ModelViewSet):
                 description='Search radius in kilometers (default: 10)',
                 default=10
             ),
+            OpenApiParameter(
+                name='place',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses inside this gazetteer place (slug)'
+            ),
+            OpenApiParameter(
+                name='open_now',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses open now (South African time)'
+            ),
+            OpenApiParameter(
+                name='opens_within',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Only businesses that are closed but open within this many minutes'
+            ),
         ],
         examples=[
             OpenApiExample(
@@ -210,10 +295,16 @@ class BusinessViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            user_location = Point(float(lon), float(lat))
+            user_location = Point(float(lon), float(lat), srid=4326)
+            radius_km = float(radius)
+            # dwithin in degrees uses the location index; distance_lte then
+            # applies the exact radius
             nearby_businesses = self.get_queryset().filter(
-                location__distance_lte=(user_location, Distance(km=int(radius)))
-            ).distance(user_location).order_by('distance')
+                location__dwithin=(user_location, bounding_degrees(user_location, radius_km)),
+                location__distance_lte=(user_location, Distance(km=radius_km))
+            ).annotate(
+                distance=GeoDistance('location', user_location)
+            ).order_by('distance')
             
             # Add user location to context for distance calculation
             context = self.get_serializer_context()
@@ -253,13 +344,31 @@ class BusinessViewSet(viewsets.ModelViewSet):
     
     @extend_schema(
         summary="Get businesses with featured products",
-        description="Retrieve businesses along with their featured products (limited to 10 businesses for performance)",
-        tags=["Businesses"]
+        description="Retrieve businesses along with their newest featured products. Businesses and products are each loaded in a single query.",
+        tags=["Businesses"],
+        parameters=[
+            OpenApiParameter('limit', OpenApiTypes.INT, description='Number of businesses (default 10, max 50)'),
+            OpenApiParameter('products', OpenApiTypes.INT, description='Featured products per business (default 4, max 12)'),
+        ]
     )
     @action(detail=False, methods=['get'])
     def with_products(self, request):
         """Get businesses with their featured products"""
-        businesses = self.get_queryset()[:10]  # Limit for performance
+        try:
+            limit = int(request.query_params.get('limit', settings.WITH_PRODUCTS_BUSINESS_LIMIT))
+            per_business = int(request.query_params.get('products', settings.WITH_PRODUCTS_PER_BUSINESS))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'limit and products must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, settings.WITH_PRODUCTS_MAX_BUSINESSES))
+        per_business = max(1, min(per_business, settings.WITH_PRODUCTS_MAX_PER_BUSINESS))
+        
+        # The business images prefetched by get_queryset are not serialized here
+        businesses = self.get_queryset().prefetch_related(None).prefetch_related(
+            *BusinessWithProductsSerializer.featured_products_prefetch(per_business)
+        )[:limit]
         serializer = self.get_serializer(businesses, many=True)
         return Response(serializer.data)
     
@@ -309,6 +418,32 @@ class BusinessViewSet(viewsets.ModelViewSet):
             'is_featured': business.is_featured
         })
     
+    @extend_schema(
+        summary="Set opening hours",
+        description=(
+            "Replace the weekly opening hours (owner only). Weekdays run from 0 (Monday) "
+            "to 6 (Sunday); a period closing at or before its opening time runs past midnight."
+        ),
+        tags=["Businesses"],
+        request=BusinessHoursScheduleSerializer,
+        responses={200: BusinessHoursSerializer(many=True)}
+    )
+    @action(detail=True, methods=['put'], url_path='hours')
+    def set_hours(self, request, slug=None):
+        """Replace the business's weekly opening hours"""
+        business = self.get_object()
+        serializer = BusinessHoursScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            business.hours.all().delete()
+            hours = BusinessHours.objects.bulk_create([
+                BusinessHours(business=business, **period)
+                for period in serializer.validated_data['hours']
+            ])
+        hours.sort(key=lambda period: (period.weekday, period.opens_at))
+        return Response(BusinessHoursSerializer(hours, many=True).data)
+    
     @extend_schema(
         summary="Get business statistics",
         description="Get detailed statistics for a business (owner only)",
@@ -322,29 +457,31 @@ class BusinessViewSet(viewsets.ModelViewSet):
                     'total_reviews': {'type': 'integer'},
                     'average_rating': {'type': 'number'},
                     'views_this_month': {'type': 'integer'},
+                    'views_this_week': {'type': 'integer'},
+                    'views_today': {'type': 'integer'},
+                    'unique_visitors_today': {'type': 'integer', 'nullable': True},
                 }
             }
         }
     )
-    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['get'])
     def stats(self, request, slug=None):
         """Get business statistics (owner only)"""
         business = self.get_object()
         
-        # Check if user is the owner
-        if business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         stats = {
             'total_products': business.products.count(),
             'active_products': business.products.filter(status='active').count(),
             'total_reviews': getattr(business, 'reviews', None) and business.reviews.count() or 0,
             'average_rating': 0,  # Calculate from reviews if available
-            'views_this_month': 0,  # Implement view tracking if needed
         }
+        views = ViewCounterService.counts('business', business.id)
+        stats.update({
+            'views_this_month': views['views_this_month'],
+            'views_this_week': views['views_this_week'],
+            'views_today': views['views_today'],
+            'unique_visitors_today': views['unique_visitors_today'],
+        })
         
         # Calculate average rating if reviews exist
         if hasattr(business, 'reviews') and business.reviews.exists():
@@ -352,4 +489,57 @@ class BusinessViewSet(viewsets.ModelViewSet):
             avg_rating = business.reviews.aggregate(avg=Avg('rating'))['avg']
             stats['average_rating'] = round(avg_rating, 1) if avg_rating else 0
         
-        return Response(stats)
\ No newline at end of file
+        return Response(stats)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List delivery zones",
+        description="Delivery zones of a business with their fees and minimum order amounts",
+        tags=["Delivery Zones"]
+    ),
+    retrieve=extend_schema(summary="Get delivery zone", tags=["Delivery Zones"]),
+    create=extend_schema(
+        summary="Create delivery zone",
+        description="Add a GeoJSON area or a radius ring (radius_km) the business delivers to (owners only)",
+        tags=["Delivery Zones"]
+    ),
+    update=extend_schema(summary="Update delivery zone", tags=["Delivery Zones"]),
+    partial_update=extend_schema(summary="Partially update delivery zone", tags=["Delivery Zones"]),
+    destroy=extend_schema(summary="Delete delivery zone", tags=["Delivery Zones"]),
+)
+class DeliveryZoneViewSet(viewsets.ModelViewSet):
+    """
+    Delivery zones of one business. Anyone can list them; only the owner
+    can change them.
+    """
+    serializer_class = DeliveryZoneSerializer
+    pagination_class = None
+    replica_actions = ['list', 'retrieve']
+    
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve']:
+            return [permissions.AllowAny()]
+        return [permissions.IsAuthenticated()]
+    
+    def get_queryset(self):
+        return DeliveryZone.objects.filter(business_id=self.kwargs['business_id'])
+    
+    def check_owner(self):
+        if not (self.request.user.is_staff or owns_business(self.request, int(self.kwargs['business_id']))):
+            raise PermissionDenied("Only the business owner can manage delivery zones")
+    
+    def perform_create(self, serializer):
+        self.check_owner()
+        zone = serializer.save(business_id=self.kwargs['business_id'])
+        # Ring areas are computed in the database on save
+        zone.refresh_from_db(fields=['area'])
+    
+    def perform_update(self, serializer):
+        self.check_owner()
+        zone = serializer.save()
+        zone.refresh_from_db(fields=['area'])
+    
+    def perform_destroy(self, instance):
+        self.check_owner()
+        instance.delete()
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from django.contrib.gis.admin import GISModelAdmin
+from utils.geocoding import GeocodingService
+from .models import Place
 
-# Register your models here.
+@admin.register(Place)
+class PlaceAdmin(GISModelAdmin):
+    list_display = ['name', 'place_type', 'city', 'province', 'parent']
+    list_filter = ['place_type', 'province']
+    search_fields = ['name', 'city']
+    prepopulated_fields = {'slug': ('name',)}
+    raw_id_fields = ['parent']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        GeocodingService.clear_cache()
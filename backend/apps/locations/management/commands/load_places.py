@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+from django.contrib.gis.geos import GEOSGeometry, MultiPolygon, Point
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from apps.locations.models import Place
+from utils.geocoding import GeocodingService
+
+DEFAULT_DATASET = Path(__file__).resolve().parents[2] / 'data' / 'places.json'
+
+# Approximate boundary for places that only have a centroid and a radius
+RADIUS_BOUNDARY_SQL = """
+    UPDATE locations_place
+    SET boundary = ST_Multi(ST_Buffer(centroid::geography, %s * 1000.0, 'quad_segs=16')::geometry)
+    WHERE id = %s
+"""
+
+
+class Command(BaseCommand):
+    help = 'Load (or refresh) the place gazetteer from a JSON dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=str(DEFAULT_DATASET),
+            help='JSON list of places (defaults to the bundled dataset)'
+        )
+
+    def _boundary(self, entry):
+        geometry = entry.get('boundary')
+        if not geometry:
+            return None
+        boundary = GEOSGeometry(json.dumps(geometry), srid=4326)
+        if boundary.geom_type == 'Polygon':
+            boundary = MultiPolygon(boundary, srid=4326)
+        if boundary.geom_type != 'MultiPolygon':
+            raise CommandError(f"{entry['name']}: boundary must be a Polygon or MultiPolygon")
+        return boundary
+
+    def handle(self, *args, **options):
+        try:
+            entries = json.loads(Path(options['path']).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+
+        places = {}
+        with transaction.atomic():
+            for entry in entries:
+                boundary = self._boundary(entry)
+                place, _ = Place.objects.update_or_create(
+                    slug=entry.get('slug') or slugify(entry['name']),
+                    defaults={
+                        'name': entry['name'],
+                        'place_type': entry['type'],
+                        'city': entry.get('city', ''),
+                        'province': entry['province'],
+                        'centroid': Point(entry['lon'], entry['lat'], srid=4326),
+                        'boundary': boundary,
+                    }
+                )
+                places[entry['name']] = place
+
+                if boundary is None and entry.get('radius_km'):
+                    with connection.cursor() as cursor:
+                        cursor.execute(RADIUS_BOUNDARY_SQL, [entry['radius_km'], place.id])
+
+            for entry in entries:
+                parent = places.get(entry.get('parent'))
+                Place.objects.filter(id=places[entry['name']].id).update(parent=parent)
+
+        GeocodingService.clear_cache()
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(places)} places"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.3 on 2026-10-19 14:05
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150)),
+                ('slug', models.SlugField(max_length=150, unique=True)),
+                ('place_type', models.CharField(choices=[('province', 'Province'), ('city', 'City'), ('township', 'Township'), ('suburb', 'Suburb')], max_length=20)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('province', models.CharField(max_length=100)),
+                ('centroid', django.contrib.gis.db.models.fields.PointField(srid=4326)),
+                ('boundary', django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326)),
+                ('search_name', models.CharField(editable=False, max_length=150)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='locations.place')),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [
+                    models.Index(fields=['search_name'], name='place_search_prefix_idx', opclasses=['varchar_pattern_ops']),
+                    django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='place_search_trgm_idx', opclasses=['gin_trgm_ops']),
+                    models.Index(fields=['place_type'], name='locations_p_place_t_cf079d_idx'),
+                ],
+            },
+        ),
+    ]
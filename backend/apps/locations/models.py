@@ -1,3 +1,52 @@
-from django.db import models
+from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GinIndex
 
-# Create your models here.
+from utils.helpers import normalize_search_text
+
+
+def normalize_place_name(value):
+    """Normalized place name stored in Place.search_name"""
+    return normalize_search_text(value)
+
+
+class Place(models.Model):
+    """
+    Gazetteer entry: a province, city, township or suburb with its centroid
+    and, where known, its boundary. Loaded with ``manage.py load_places``.
+    """
+    PLACE_TYPES = (
+        ('province', 'Province'),
+        ('city', 'City'),
+        ('township', 'Township'),
+        ('suburb', 'Suburb'),
+    )
+
+    name = models.CharField(max_length=150)
+    slug = models.SlugField(max_length=150, unique=True)
+    place_type = models.CharField(max_length=20, choices=PLACE_TYPES)
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
+    city = models.CharField(max_length=100, blank=True)
+    province = models.CharField(max_length=100)
+    centroid = models.PointField()
+    boundary = models.MultiPolygonField(null=True, blank=True)
+    # normalize_place_name(name), kept in sync by save() and the loader
+    search_name = models.CharField(max_length=150, editable=False)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Prefix autocomplete: search_name LIKE 'sow%'
+            models.Index(fields=['search_name'], name='place_search_prefix_idx', opclasses=['varchar_pattern_ops']),
+            # Misspellings: trigram similarity
+            GinIndex(fields=['search_name'], name='place_search_trgm_idx', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['place_type']),
+        ]
+
+    def __str__(self):
+        if self.place_type in ('township', 'suburb') and self.city:
+            return f"{self.name}, {self.city}"
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_place_name(self.name)
+        super().save(*args, **kwargs)
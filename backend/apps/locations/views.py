@@ -1,3 +1,119 @@
-from django.shortcuts import render
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.conf import settings
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
-# Create your views here.
+from apps.locations.models import Place
+from utils.delivery import DeliveryZoneService
+from utils.geocoding import GeocodingService
+from api.v1.serializers.locations import PlaceSerializer, GeocodeResultSerializer
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List places",
+        description="Gazetteer of provinces, cities, townships and suburbs",
+        tags=["Places"],
+        parameters=[
+            OpenApiParameter(
+                name='place_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Filter by place type',
+                enum=['province', 'city', 'township', 'suburb']
+            ),
+        ]
+    ),
+    retrieve=extend_schema(
+        summary="Get place details",
+        tags=["Places"]
+    ),
+)
+class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the place gazetteer.
+    
+    Provides autocomplete and geocoding over apps.locations.Place.
+    """
+    queryset = Place.objects.defer('boundary')
+    serializer_class = PlaceSerializer
+    permission_classes = [permissions.AllowAny]
+    lookup_field = 'slug'
+    replica_actions = ['list', 'retrieve', 'autocomplete', 'geocode', 'reverse']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        place_type = self.request.query_params.get('place_type')
+        if place_type and self.action == 'list':
+            queryset = queryset.filter(place_type=place_type)
+        return queryset
+    
+    @extend_schema(
+        summary="Autocomplete place names",
+        description="Places whose name starts with q, followed by close misspellings",
+        tags=["Places"],
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(
+                name='place_type',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=['province', 'city', 'township', 'suburb']
+            ),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, default=10),
+        ],
+        responses=PlaceSerializer(many=True)
+    )
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.PLACE_AUTOCOMPLETE_MAX_RESULTS))
+        
+        places = GeocodingService.autocomplete(
+            request.query_params.get('q', ''),
+            limit=limit,
+            place_type=request.query_params.get('place_type')
+        )
+        return Response(PlaceSerializer(places, many=True).data)
+    
+    @extend_schema(
+        summary="Geocode an address",
+        description="Best matching place for a free-text address",
+        tags=["Places"],
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True),
+        ],
+        responses=GeocodeResultSerializer
+    )
+    @action(detail=False, methods=['get'])
+    def geocode(self, request):
+        result = GeocodingService.forward(request.query_params.get('q', ''))
+        if result is None:
+            return Response({'error': 'No matching place'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(GeocodeResultSerializer(result).data)
+    
+    @extend_schema(
+        summary="Reverse geocode a point",
+        description="The smallest place containing the point",
+        tags=["Places"],
+        parameters=[
+            OpenApiParameter(name='lat', type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(name='lon', type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY, required=True),
+        ],
+        responses=GeocodeResultSerializer
+    )
+    @action(detail=False, methods=['get'])
+    def reverse(self, request):
+        point = DeliveryZoneService.parse_point(
+            f"{request.query_params.get('lat', '')},{request.query_params.get('lon', '')}"
+        )
+        if point is None:
+            return Response({'error': 'Invalid coordinates'}, status=status.HTTP_400_BAD_REQUEST)
+        result = GeocodingService.reverse(point)
+        if result is None:
+            return Response({'error': 'No place contains this point'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(GeocodeResultSerializer(result).data)
@@ -9,6 +9,7 @@ from apps.orders.models import (
     Cart, CartItem, Order, OrderItem, OrderStatusHistory, 
     DeliveryInfo, OrderRating
 )
+from utils.leaderboard import LeaderboardService
 
 
 class CartItemInline(admin.TabularInline):
@@ -269,6 +270,7 @@ class OrderAdmin(admin.ModelAdmin):
                 notes='Status updated via admin',
                 created_by=request.user
             )
+            LeaderboardService.record_order_on_commit(order.pk)
             count += 1
         
         self.message_user(request, f'{count} orders marked as completed.')
@@ -1,40 +1,50 @@
-
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from apps.orders.models import CartItem
-from decimal import Decimal
+from utils.order_helpers import CartRepricingService
 
 class Command(BaseCommand):
-    help = 'Fix cart items with None unit_price'
+    help = 'Fix cart items with None unit_price and reprice items whose product price changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy',
+            choices=[CartRepricingService.POLICY_REPRICE, CartRepricingService.POLICY_FLAG],
+            help='Override settings.CART_PRICE_DRIFT_POLICY'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Number of cart items updated per statement'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many items have drifted'
+        )
 
     def handle(self, *args, **options):
-        with transaction.atomic():
-            # Find cart items with None unit_price
-            problem_items = CartItem.objects.filter(unit_price__isnull=True)
-            
-            self.stdout.write(f"Found {problem_items.count()} cart items with None unit_price")
-            
-            fixed_count = 0
-            removed_count = 0
-            
-            for item in problem_items:
-                try:
-                    if item.product.price is not None:
-                        # Fix the price
-                        item.unit_price = item.product.price
-                        item.save()
-                        fixed_count += 1
-                        self.stdout.write(f"Fixed item {item.id}: {item.product.name} - ${item.unit_price}")
-                    else:
-                        # Product has no price, remove the cart item or set to 0
-                        self.stdout.write(f"Product {item.product.name} has no price. Removing cart item {item.id}")
-                        item.delete()
-                        removed_count += 1
-                except Exception as e:
-                    self.stdout.write(f"Error processing item {item.id}: {e}")
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Fixed {fixed_count} items, removed {removed_count} items"
-                )
-            )
\ No newline at end of file
+        missing = CartItem.objects.filter(unit_price__isnull=True).count()
+        drifted = CartRepricingService.drifted_items().count()
+
+        self.stdout.write(f"Found {missing} cart items with None unit_price")
+        self.stdout.write(f"Found {drifted} cart items whose price differs from the product price")
+
+        if options['dry_run'] or not drifted:
+            return
+
+        # Items without a price are always repriced; they have no price to keep
+        fixed_count = CartRepricingService.reprice(
+            CartItem.objects.filter(unit_price__isnull=True),
+            policy=CartRepricingService.POLICY_REPRICE,
+            chunk_size=options['chunk_size']
+        )
+        updated_count = CartRepricingService.reprice(
+            policy=options['policy'],
+            chunk_size=options['chunk_size']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fixed {fixed_count} items, updated {updated_count} drifted items"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from utils.leaderboard import LeaderboardService
+
+class Command(BaseCommand):
+    help = 'Rebuild the popular-product leaderboards from completed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only count orders completed in the last N days (default: LEADERBOARD_REBUILD_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is not None and days < 1:
+            raise CommandError("--days must be at least 1")
+
+        boards = LeaderboardService.rebuild(days)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {boards} leaderboards"))
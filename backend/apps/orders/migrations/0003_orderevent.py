@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0002_businessimage'),
+        ('orders', '0002_alter_cartitem_unit_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.PositiveSmallIntegerField(choices=[(1, 'order.created'), (2, 'order.cancelled'), (3, 'order.rated')])),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='order_events', to='businesses.business')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='orders.order')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['business', 'id'], name='orders_orde_busines_68b6bd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_orderevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='previous_unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='price_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
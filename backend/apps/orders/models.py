@@ -31,6 +31,22 @@ class Cart(models.Model):
     def businesses(self):
         """Get all businesses in this cart"""
         return set(item.product.business for item in self.items.all())
+    
+    def summary(self):
+        """Item count, quantity and amount totals computed in a single query"""
+        totals = self.items.aggregate(
+            item_count=models.Count('id'),
+            total_items=models.Sum('quantity'),
+            total_amount=models.Sum(
+                models.F('quantity') * models.F('unit_price'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
+        return {
+            'item_count': totals['item_count'],
+            'total_items': totals['total_items'] or 0,
+            'total_amount': str(totals['total_amount'] or Decimal('0.00'))
+        }
 
 class CartItem(models.Model):
     """Individual items in a shopping cart"""
@@ -39,6 +55,11 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     notes = models.TextField(blank=True, help_text="Special instructions for this item")
+    
+    # Price drift tracking, maintained by CartRepricingService
+    previous_unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_changed_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -280,6 +301,41 @@ class OrderRating(models.Model):
     def __str__(self):
         return f"{self.overall_rating}⭐ - {self.order.order_number}"
 
+class OrderEvent(models.Model):
+    """
+    Append-only log of business-facing order events.
+    The auto-incrementing id doubles as the resumable cursor (Last-Event-ID)
+    for the business owner event stream.
+    """
+    ORDER_CREATED = 1
+    ORDER_CANCELLED = 2
+    ORDER_RATED = 3
+    
+    EVENT_TYPES = (
+        (ORDER_CREATED, 'order.created'),
+        (ORDER_CANCELLED, 'order.cancelled'),
+        (ORDER_RATED, 'order.rated'),
+    )
+    
+    business = models.ForeignKey(
+        'businesses.Business', on_delete=models.CASCADE,
+        related_name='order_events', db_index=False
+    )
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    event_type = models.PositiveSmallIntegerField(choices=EVENT_TYPES)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Covers "events for business X after cursor N"
+            models.Index(fields=['business', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_event_type_display()} #{self.id}"
+
 # Custom managers
 class OrderQuerySet(models.QuerySet):
     def for_customer(self, user):
@@ -0,0 +1,173 @@
+"""
+Server-sent event streams for orders.
+
+These are plain async Django views rather than DRF viewsets: DRF has no async
+support, and a long-lived stream must not hold a sync worker thread. They are
+only useful when the project is served through asgi.py.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+
+from apps.businesses.models import Business
+from apps.orders.models import Order
+from utils.authentication import authenticate_request
+from utils.order_helpers import OrderEventService
+from utils.realtime import (
+    business_channel, format_sse, format_sse_comment, get_broker, order_channel
+)
+
+# Replayed events are read from the event table in pages of this size
+REPLAY_BATCH_SIZE = 200
+
+
+def _db(func):
+    """
+    ``sync_to_async`` for database work in a stream view. The thread's
+    connections are closed (handed back to the pool, in pool mode) as soon as
+    ``func`` returns instead of at request_finished, which for a stream comes
+    up to EVENT_STREAM_MAX_SECONDS later and would hold a pool slot meanwhile.
+    """
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return sync_to_async(run)
+
+
+def _authenticate(request):
+    return authenticate_request(request, allow_query_token=True)
+
+
+def _get_order_for_user(order_id, user):
+    return Order.objects.filter(
+        Q(customer_id=user.id) | Q(business__owner_id=user.id),
+        id=order_id
+    ).only('id').first()
+
+
+def _load_snapshot(order_id):
+    order = Order.objects.select_related('delivery_info').get(id=order_id)
+    return OrderEventService.order_snapshot(order)
+
+
+def _stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+async def _order_events(order_id):
+    keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+    deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+
+    async with get_broker().subscribe(order_channel(order_id)) as subscription:
+        # Subscribe before taking the snapshot so no transition is missed
+        snapshot = await _db(_load_snapshot)(order_id)
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+        yield format_sse(snapshot, event='snapshot')
+
+        if snapshot['status'] in OrderEventService.TERMINAL_STATUSES:
+            return
+
+        while time.monotonic() < deadline:
+            message = await subscription.get(timeout=keepalive)
+            if message is None:
+                yield format_sse_comment()
+                continue
+
+            yield format_sse(message, event=message.get('type'))
+
+            if message.get('status') in OrderEventService.TERMINAL_STATUSES:
+                return
+
+
+async def order_status_stream(request, order_id):
+    """
+    Stream status and delivery updates for a single order.
+
+    Emits a ``snapshot`` event on connect, then ``order.status`` and
+    ``delivery.updated`` events. The stream ends once the order reaches a
+    terminal status, or after EVENT_STREAM_MAX_SECONDS (clients reconnect).
+    """
+    user = await _db(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    order = await _db(_get_order_for_user)(order_id, user)
+    if order is None:
+        return JsonResponse({'error': 'Order not found'}, status=404)
+
+    return _stream_response(_order_events(order.id))
+
+
+def _user_owns_business(user, business_id):
+    if business_id in getattr(user, 'business_ids', ()):
+        return True
+    return Business.objects.filter(id=business_id, owner_id=user.id).exists()
+
+
+def _last_event_id(request):
+    """Resume cursor from the Last-Event-ID header (sent by EventSource on reconnect) or query"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _business_events(business_id, last_event_id):
+    keepalive = settings.EVENT_STREAM_KEEPALIVE_SECONDS
+    deadline = time.monotonic() + settings.EVENT_STREAM_MAX_SECONDS
+
+    async with get_broker().subscribe(business_channel(business_id)) as subscription:
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+
+        # Replay anything committed after the client's cursor. Live messages
+        # that arrive meanwhile are queued and de-duplicated by id below.
+        if last_event_id is not None:
+            while True:
+                events = await _db(OrderEventService.events_after)(
+                    business_id, last_event_id, REPLAY_BATCH_SIZE
+                )
+                for event in events:
+                    message = OrderEventService.event_message(event)
+                    yield format_sse(message, event=message['type'], event_id=event.id)
+                    last_event_id = event.id
+                if len(events) < REPLAY_BATCH_SIZE:
+                    break
+
+        while time.monotonic() < deadline:
+            message = await subscription.get(timeout=keepalive)
+            if message is None:
+                yield format_sse_comment()
+                continue
+
+            if last_event_id is not None and message['id'] <= last_event_id:
+                continue
+            last_event_id = message['id']
+            yield format_sse(message, event=message['type'], event_id=message['id'])
+
+
+async def business_order_stream(request, business_id):
+    """
+    Stream order.created / order.cancelled / order.rated events for a business.
+
+    Each event carries its OrderEvent id, so a reconnecting EventSource resumes
+    from Last-Event-ID without losing events. Without a cursor the stream only
+    delivers new events.
+    """
+    user = await _db(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    if not await _db(_user_owns_business)(user, business_id):
+        return JsonResponse({'error': 'Business not found'}, status=404)
+
+    return _stream_response(_business_events(business_id, _last_event_id(request)))
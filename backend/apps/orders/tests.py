@@ -1,3 +1,130 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.businesses.models import Business
+from apps.orders.models import Cart, CartItem, Order, OrderEvent
+from apps.products.models import Product
+
+User = get_user_model()
+
+
+class OrderEventAPITests(APITestCase):
+    """Checkout and cancellation record business feed events"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', user_type='business_owner'
+        )
+        self.customer = User.objects.create_user(
+            username='customer', email='customer@example.com', password='pass12345'
+        )
+        self.business = Business.objects.create(
+            owner=self.owner,
+            name='Mama Spaza',
+            description='Corner shop',
+            business_type='spaza_shop',
+            phone_number='0110000000',
+            location=Point(27.854, -26.2485, srid=4326),
+            address='1 Vilakazi Street',
+            city='Soweto',
+            province='Gauteng',
+        )
+        self.product = Product.objects.create(
+            business=self.business,
+            name='White Bread',
+            description='Loaf',
+            price=Decimal('18.99'),
+            stock_quantity=10,
+        )
+        cart = Cart.objects.create(user=self.customer)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2, unit_price=self.product.price)
+        self.client.force_authenticate(self.customer)
+
+    def create_order(self):
+        return self.client.post(reverse('order-list'), {
+            'business': self.business.id,
+            'delivery_method': 'pickup',
+            'customer_name': 'Thandi',
+            'customer_phone': '0820000000',
+        }, format='json')
+
+    def test_create_records_order_created_event(self):
+        response = self.create_order()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        order = Order.objects.get(customer=self.customer)
+        event = OrderEvent.objects.get(order=order)
+        self.assertEqual(event.event_type, OrderEvent.ORDER_CREATED)
+        self.assertEqual(event.payload['total_amount'], str(order.total_amount))
+        self.assertEqual(event.payload['item_count'], 1)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 8)
+
+    def test_cancel_records_order_cancelled_event(self):
+        self.create_order()
+        order = Order.objects.get(customer=self.customer)
+
+        response = self.client.post(reverse('order-cancel', args=[order.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.assertEqual(
+            list(OrderEvent.objects.filter(order=order).values_list('event_type', flat=True)),
+            [OrderEvent.ORDER_CREATED, OrderEvent.ORDER_CANCELLED]
+        )
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 10)
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True, METRICS_RESPONSE_HEADERS=True)
+class GuestCartQueryBudgetTests(APITestCase):
+    """Guest cart reads stay within their QUERY_BUDGETS entry (over budget raises)"""
+
+    def setUp(self):
+        owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass12345', user_type='business_owner'
+        )
+        business = Business.objects.create(
+            owner=owner,
+            name='Mama Spaza',
+            description='Corner shop',
+            business_type='spaza_shop',
+            phone_number='0110000000',
+            location=Point(27.854, -26.2485, srid=4326),
+            address='1 Vilakazi Street',
+            city='Soweto',
+            province='Gauteng',
+        )
+        self.products = [
+            Product.objects.create(
+                business=business,
+                name=f'Item {number}',
+                description='Loaf',
+                price=Decimal('18.99'),
+                stock_quantity=10,
+            )
+            for number in range(5)
+        ]
+
+    def test_retrieve_stays_within_budget(self):
+        response = self.client.post(reverse('guest-cart-batch'), {
+            'operations': [{'op': 'add', 'product_id': product.id, 'quantity': 1} for product in self.products]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertLessEqual(int(response['X-Query-Count']), settings.QUERY_BUDGETS['GuestCartViewSet.batch'])
+
+        response = self.client.get(reverse('guest-cart-detail'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(len(response.data['data']['items']), len(self.products))
+        self.assertLessEqual(int(response['X-Query-Count']), settings.QUERY_BUDGETS['GuestCartViewSet.retrieve'])
@@ -1,25 +1,37 @@
+from decimal import Decimal
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import ModelViewSet, ViewSet
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.db.models import DecimalField, F, Sum
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.openapi import OpenApiTypes
 
 from apps.orders.models import (
     Cart, CartItem, Order, OrderItem, OrderStatusHistory, 
-    DeliveryInfo, OrderRating
+    DeliveryInfo, OrderRating, OrderEvent
 )
 from apps.products.models import Product
 from api.v1.serializers.orders import (
     CartSerializer, CartItemSerializer, AddToCartSerializer, UpdateCartItemSerializer,
+    BatchCartSerializer,
     OrderListSerializer, OrderDetailSerializer, CreateOrderSerializer,
     UpdateOrderStatusSerializer, OrderRatingSerializer, CreateOrderRatingSerializer,
-    DeliveryInfoSerializer
+    DeliveryInfoSerializer, OrderEventSerializer
+)
+from utils.permissions import IsOwnerOrReadOnly, IsBusinessOwnerOrReadOnly, owns_business
+from api.v1.serializers.businesses import DeliveryQuoteSerializer
+from utils.delivery import DeliveryZoneService
+from utils.inventory import InventoryLedgerService
+from utils.leaderboard import LeaderboardService
+from utils.order_helpers import (
+    CartRepricingService, CartService, GuestCartService, OrderEventService
 )
-from utils.permissions import IsOwnerOrReadOnly, IsBusinessOwnerOrReadOnly
 
 
 class CartViewSet(ModelViewSet):
@@ -30,14 +42,14 @@ class CartViewSet(ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user).prefetch_related(
+        return Cart.objects.filter(user_id=self.request.user.id).prefetch_related(
             'items__product__business',
             'items__product__images'
         )
     
     def get_object(self):
         # Get or create cart for current user
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
+        cart, created = Cart.objects.get_or_create(user_id=self.request.user.id)
         return cart
     
     def create_success_response(self, data=None, message="Operation successful", status_code=status.HTTP_200_OK):
@@ -462,6 +474,162 @@ class CartViewSet(ModelViewSet):
                 errors={'detail': [str(e)]}
             )
 
+    
+    @extend_schema(
+        summary="Apply a batch of cart changes",
+        description=(
+            "Apply add/set/remove operations in one transaction. Operations on the "
+            "same product are applied in order; 'set' with quantity 0 removes the item. "
+            "If any operation is invalid nothing is changed."
+        ),
+        request=BatchCartSerializer,
+        responses={
+            200: {
+                'description': 'Cart updated successfully',
+                'example': {
+                    'success': True,
+                    'message': 'Cart updated (3 operations applied)',
+                    'data': {
+                        'items': [
+                            {'product_id': 12, 'quantity': 2, 'unit_price': '15.99', 'removed': False},
+                            {'product_id': 7, 'quantity': 0, 'removed': True}
+                        ],
+                        'cart_summary': {
+                            'item_count': 1,
+                            'total_items': 2,
+                            'total_amount': '31.98'
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Validation error',
+                'example': {
+                    'success': False,
+                    'message': 'Invalid cart operations',
+                    'errors': {
+                        'operations': {'1': ['Product not found or inactive']}
+                    }
+                }
+            }
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def batch(self, request, pk=None):
+        serializer = BatchCartSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.create_error_response(
+                message="Invalid cart operations",
+                errors=serializer.errors
+            )
+        
+        cart = self.get_object()
+        operations = serializer.validated_data['operations']
+        results, errors = CartService.apply_batch(cart, operations)
+        
+        if errors:
+            return self.create_error_response(
+                message="Invalid cart operations",
+                errors={'operations': errors}
+            )
+        
+        return self.create_success_response(
+            data={
+                'items': results,
+                'cart_summary': cart.summary()
+            },
+            message=f"Cart updated ({len(operations)} operations applied)"
+        )
+
+    
+    @extend_schema(
+        summary="Accept current prices",
+        description="Move every cart item to the product's current price and clear price-change flags",
+        responses={
+            200: {
+                'description': 'Prices accepted',
+                'example': {
+                    'success': True,
+                    'message': 'Accepted current prices for 2 items',
+                    'data': {
+                        'items_repriced': 2,
+                        'cart_summary': {
+                            'item_count': 3,
+                            'total_items': 4,
+                            'total_amount': '58.96'
+                        }
+                    }
+                }
+            }
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def accept_prices(self, request, pk=None):
+        cart = self.get_object()
+        repriced = CartRepricingService.accept_prices(cart)
+        return self.create_success_response(
+            data={
+                'items_repriced': repriced,
+                'cart_summary': cart.summary()
+            },
+            message=f"Accepted current prices for {repriced} items"
+        )
+    
+    @extend_schema(
+        summary="Quote delivery for the cart",
+        description="Delivery fee to a point for every business in the cart, priced from the businesses' delivery zones in one query",
+        parameters=[
+            OpenApiParameter('lat', OpenApiTypes.FLOAT, required=True, description='Delivery latitude'),
+            OpenApiParameter('lon', OpenApiTypes.FLOAT, required=True, description='Delivery longitude'),
+        ],
+        responses={
+            200: {
+                'description': 'Delivery quotes',
+                'example': {
+                    'success': True,
+                    'message': 'Delivery quoted for 2 businesses',
+                    'data': {
+                        'quotes': [
+                            {
+                                'business_id': 3, 'business_name': 'Mama Thandi Spaza', 'delivers': True,
+                                'zone_id': 7, 'zone_name': 'Within 3 km', 'fee': '10.00',
+                                'min_order_amount': '50.00', 'distance_km': 1.84, 'meets_minimum': True
+                            }
+                        ],
+                        'total_delivery_fee': '10.00'
+                    }
+                }
+            }
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def delivery_quote(self, request):
+        point = DeliveryZoneService.parse_point(
+            f"{request.query_params.get('lat', '')},{request.query_params.get('lon', '')}"
+        )
+        if point is None:
+            return self.create_error_response(message="Valid lat and lon are required")
+        
+        subtotals = {
+            row['product__business_id']: row['subtotal'] or Decimal('0.00')
+            for row in CartItem.objects.filter(cart__user_id=request.user.id)
+            .values('product__business_id')
+            .annotate(subtotal=Sum(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ))
+        }
+        quotes = DeliveryZoneService.quote(subtotals.keys(), point, subtotals=subtotals)
+        results = DeliveryQuoteSerializer(quotes.values(), many=True).data
+        total_fee = sum((quote['fee'] for quote in quotes.values() if quote['delivers']), Decimal('0.00'))
+        return self.create_success_response(
+            data={
+                'quotes': results,
+                'total_delivery_fee': str(total_fee)
+            },
+            message=f"Delivery quoted for {len(results)} businesses"
+        )
+
 
 # Additional utility class for consistent responses across the entire orders app
 class StandardResponseMixin:
@@ -512,6 +680,86 @@ class StandardResponseMixin:
         )
 
 
+class GuestCartViewSet(StandardResponseMixin, ViewSet):
+    """
+    Cart for anonymous shoppers, kept in the cache and identified by a signed
+    cookie. Items are merged into the user's cart on login.
+    
+    Every write re-signs the token and re-sets the cookie, so like the cached
+    items they expire GUEST_CART_TTL after the last change, not after the
+    first one.
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def _respond(self, request, token, items, message, renew=False):
+        data = GuestCartService.describe(items)
+        signed_token = GuestCartService.sign_token(token) if token else None
+        data['token'] = signed_token
+        response = self.create_success_response(data=data, message=message)
+        
+        if renew and items:
+            response.set_cookie(
+                settings.GUEST_CART_COOKIE_NAME,
+                signed_token,
+                max_age=settings.GUEST_CART_TTL,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure()
+            )
+        elif token and not items:
+            response.delete_cookie(settings.GUEST_CART_COOKIE_NAME)
+        return response
+    
+    @extend_schema(
+        summary="Get guest cart",
+        description="Retrieve the anonymous shopper's cart with current prices",
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def retrieve(self, request):
+        token = GuestCartService.get_token(request)
+        items = GuestCartService.get_items(token)
+        return self._respond(request, token, items, "Cart retrieved successfully")
+    
+    @extend_schema(
+        summary="Apply a batch of guest cart changes",
+        description=(
+            "Apply add/set/remove operations to the guest cart. A cart and its "
+            "cookie are created on the first write."
+        ),
+        request=BatchCartSerializer,
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def batch(self, request):
+        serializer = BatchCartSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.create_validation_error_response(serializer.errors)
+        
+        token = GuestCartService.get_token(request)
+        if token is None:
+            token = GuestCartService.new_token()
+        
+        items = GuestCartService.get_items(token)
+        errors = GuestCartService.apply_operations(items, serializer.validated_data['operations'])
+        if errors:
+            return self.create_error_response(
+                message="Invalid cart operations",
+                errors={'operations': errors}
+            )
+        
+        GuestCartService.save_items(token, items)
+        return self._respond(request, token, items, "Cart updated successfully", renew=True)
+    
+    @extend_schema(
+        summary="Clear guest cart",
+        responses={200: OpenApiTypes.OBJECT}
+    )
+    def clear(self, request):
+        token = GuestCartService.get_token(request)
+        if token:
+            GuestCartService.save_items(token, {})
+        return self._respond(request, token, {}, "Cart cleared successfully")
+
+
 class OrderViewSet(StandardResponseMixin, ModelViewSet):
     """
     ViewSet for managing orders with consistent response patterns
@@ -525,12 +773,12 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
         if user.user_type == 'business_owner':
             # Business owners see orders for their businesses
             return Order.objects.filter(
-                business__owner=user
+                business__owner_id=user.id
             ).select_related('customer', 'business').prefetch_related('items')
         else:
             # Customers see their own orders
             return Order.objects.filter(
-                customer=user
+                customer_id=user.id
             ).select_related('customer', 'business').prefetch_related('items')
     
     def get_serializer_class(self):
@@ -604,6 +852,12 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
                     notes='Order created',
                     created_by=request.user
                 )
+                
+                OrderEventService.record_business_event(
+                    order,
+                    OrderEvent.ORDER_CREATED,
+                    item_count=order.items.count()
+                )
             
             response_serializer = OrderDetailSerializer(order, context={'request': request})
             return self.create_success_response(
@@ -627,7 +881,7 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
         order = self.get_object()
         
         # Check permissions
-        if request.user.user_type != 'business_owner' or order.business.owner != request.user:
+        if request.user.user_type != 'business_owner' or not owns_business(request, order.business_id):
             return self.create_permission_denied_response(
                 "Only business owners can update order status"
             )
@@ -656,6 +910,13 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
                     notes=notes or f'Status changed from {old_status} to {new_status}',
                     created_by=request.user
                 )
+                
+                OrderEventService.publish_status_change(order, old_status)
+                if new_status == 'cancelled':
+                    InventoryLedgerService.release(order)
+                    OrderEventService.record_business_event(order, OrderEvent.ORDER_CANCELLED)
+                elif new_status == 'completed':
+                    LeaderboardService.record_order_on_commit(order.pk)
             
             response_serializer = OrderDetailSerializer(order, context={'request': request})
             return self.create_success_response(
@@ -684,16 +945,18 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
             )
         
         # Check permissions (customer can cancel their own order, business owner can cancel any order)
-        if not (order.customer == request.user or 
-                (request.user.user_type == 'business_owner' and order.business.owner == request.user)):
+        if not (order.customer_id == request.user.id or 
+                (request.user.user_type == 'business_owner' and owns_business(request, order.business_id))):
             return self.create_permission_denied_response(
                 "You do not have permission to cancel this order"
             )
         
         try:
             with transaction.atomic():
+                old_status = order.status
                 order.status = 'cancelled'
                 order.save()
+                InventoryLedgerService.release(order)
                 
                 OrderStatusHistory.objects.create(
                     order=order,
@@ -701,6 +964,13 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
                     notes=f'Order cancelled by {request.user.username}',
                     created_by=request.user
                 )
+                
+                OrderEventService.publish_status_change(order, old_status)
+                OrderEventService.record_business_event(
+                    order,
+                    OrderEvent.ORDER_CANCELLED,
+                    cancelled_by=request.user.username
+                )
             
             response_serializer = OrderDetailSerializer(order, context={'request': request})
             return self.create_success_response(
@@ -723,7 +993,7 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
         order = self.get_object()
         
         # Check if user is the customer and order is completed
-        if order.customer != request.user:
+        if order.customer_id != request.user.id:
             return self.create_permission_denied_response(
                 "Only the customer can rate the order"
             )
@@ -750,7 +1020,15 @@ class OrderViewSet(StandardResponseMixin, ModelViewSet):
             return self.create_validation_error_response(serializer.errors)
         
         try:
-            rating = serializer.save()
+            with transaction.atomic():
+                rating = serializer.save()
+                OrderEventService.record_business_event(
+                    order,
+                    OrderEvent.ORDER_RATED,
+                    overall_rating=rating.overall_rating,
+                    review_text=rating.review_text
+                )
+            
             response_serializer = OrderRatingSerializer(rating, context={'request': request})
             return self.create_success_response(
                 data=response_serializer.data,
@@ -775,13 +1053,17 @@ class DeliveryInfoViewSet(StandardResponseMixin, ModelViewSet):
         user = self.request.user
         if user.user_type == 'business_owner':
             return DeliveryInfo.objects.filter(
-                order__business__owner=user
+                order__business__owner_id=user.id
             ).select_related('order')
         else:
             return DeliveryInfo.objects.filter(
-                order__customer=user
+                order__customer_id=user.id
             ).select_related('order')
     
+    def perform_update(self, serializer):
+        delivery_info = serializer.save()
+        OrderEventService.publish_delivery_update(delivery_info)
+    
     @extend_schema(
         summary="Update delivery information",
         description="Update delivery details (business owners only)"
@@ -790,7 +1072,7 @@ class DeliveryInfoViewSet(StandardResponseMixin, ModelViewSet):
         delivery_info = self.get_object()
         
         # Check if user is business owner
-        if request.user.user_type != 'business_owner' or delivery_info.order.business.owner != request.user:
+        if request.user.user_type != 'business_owner' or not owns_business(request, delivery_info.order.business_id):
             return self.create_permission_denied_response(
                 "Only business owners can update delivery information"
             )
@@ -822,12 +1104,12 @@ class OrderRatingViewSet(StandardResponseMixin, ModelViewSet):
         if user.user_type == 'business_owner':
             # Business owners see ratings for their businesses
             return OrderRating.objects.filter(
-                business__owner=user
+                business__owner_id=user.id
             ).select_related('customer', 'order', 'business')
         else:
             # Customers see their own ratings
             return OrderRating.objects.filter(
-                customer=user
+                customer_id=user.id
             ).select_related('customer', 'order', 'business')
     
     @extend_schema(
@@ -847,12 +1129,50 @@ class OrderRatingViewSet(StandardResponseMixin, ModelViewSet):
         )
 
 
+class BusinessOrderEventListView(StandardResponseMixin, generics.GenericAPIView):
+    """
+    Catch-up feed of order events for a business owner.
+    Returns events after the given cursor; the live equivalent is the
+    /businesses/{id}/order-events/stream/ server-sent event endpoint.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = OrderEventSerializer
+    
+    @extend_schema(
+        summary="List business order events",
+        description="Order created/cancelled/rated events after a cursor (event id)",
+        parameters=[
+            OpenApiParameter('after', OpenApiTypes.INT, description='Return events with an id greater than this'),
+            OpenApiParameter('limit', OpenApiTypes.INT, description='Maximum number of events (default 100, max 500)'),
+        ]
+    )
+    def get(self, request, business_id=None):
+        if not owns_business(request, business_id):
+            return self.create_not_found_response("Business")
+        
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = min(int(request.query_params.get('limit', 100)), 500)
+        except (TypeError, ValueError):
+            return self.create_error_response(message="after and limit must be integers")
+        
+        events = OrderEventService.events_after(business_id, after, limit)
+        return self.create_success_response(
+            data={
+                'events': self.get_serializer(events, many=True).data,
+                'last_event_id': events[-1].id if events else after,
+            },
+            message="Order events retrieved successfully"
+        )
+
+
 # Business Analytics Views
 class BusinessOrderAnalyticsView(StandardResponseMixin, generics.GenericAPIView):
     """
     Get order analytics for business owners with consistent response patterns
     """
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ['get']
     
     @extend_schema(
         summary="Get business order analytics",
@@ -903,7 +1223,7 @@ class BusinessOrderAnalyticsView(StandardResponseMixin, generics.GenericAPIView)
         try:
             # Get business
             from apps.businesses.models import Business
-            business = get_object_or_404(Business, id=business_id, owner=user)
+            business = get_object_or_404(Business, id=business_id, owner_id=user.id)
             
             # Date filters
             now = timezone.now()
@@ -944,15 +1264,22 @@ class BusinessOrderAnalyticsView(StandardResponseMixin, generics.GenericAPIView)
                 avg=Avg('overall_rating')
             )['avg'] or 0
             
-            # Popular products
-            popular_products = OrderItem.objects.filter(
-                order__business=business
-            ).values(
-                'product__name'
+            # Popular products: ranked by the business's leaderboard when a
+            # shared one is populated, otherwise by all-time quantity sold
+            popular = {}
+            if LeaderboardService.is_shared():
+                popular = dict(LeaderboardService.top('business', business.id, limit=10))
+            item_totals = OrderItem.objects.filter(order__business=business)
+            if popular:
+                item_totals = item_totals.filter(product_id__in=popular)
+            popular_products = item_totals.values(
+                'product_id', 'product__name'
             ).annotate(
                 total_quantity=Sum('quantity'),
                 total_orders=Count('order', distinct=True)
             ).order_by('-total_quantity')[:10]
+            if popular:
+                popular_products = sorted(popular_products, key=lambda item: -popular[item['product_id']])
             
             analytics_data = {
                 'business_id': business.id,
@@ -987,9 +1314,13 @@ class BusinessOrderAnalyticsView(StandardResponseMixin, generics.GenericAPIView)
                 ],
                 'popular_products': [
                     {
+                        'product_id': item['product_id'],
                         'product_name': item['product__name'],
                         'total_quantity': item['total_quantity'],
-                        'total_orders': item['total_orders']
+                        'total_orders': item['total_orders'],
+                        'popularity': (
+                            round(popular[item['product_id']], 2) if item['product_id'] in popular else None
+                        )
                     }
                     for item in popular_products
                 ]
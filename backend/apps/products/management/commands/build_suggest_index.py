@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from utils.suggest import SuggestService
+
+class Command(BaseCommand):
+    help = 'Rebuild the shared type-ahead suggestion snapshot (refreshes popularity)'
+
+    def handle(self, *args, **options):
+        index = SuggestService.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Suggestion index rebuilt: {len(index.suggestions)} suggestions, "
+                f"{len(index.entries)} prefix keys"
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(
+                condition=models.Q(('is_featured', True), ('status', 'active')),
+                fields=['business', '-created_at'],
+                name='product_featured_newest_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-19 15:20
+
+from django.db import migrations
+
+# Products saved through the ORM never got a search vector (the signal's
+# UPDATE referenced a joined field and failed); match utils/data_generator.py
+BACKFILL_SQL = """
+    UPDATE products_product AS product
+    SET search_vector = setweight(to_tsvector(coalesce(product.name, '')), 'A')
+        || setweight(to_tsvector(coalesce(product.description, '')), 'B')
+        || setweight(to_tsvector(coalesce(category.name, '')), 'B')
+    FROM products_product AS source
+    LEFT JOIN products_productcategory AS category ON category.id = source.category_id
+    WHERE product.id = source.id
+      AND product.search_vector IS NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_featured_newest_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-19 16:20
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_backfill_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.PositiveSmallIntegerField(choices=[(1, 'Stock set'), (2, 'Stock added'), (3, 'Stock removed'), (4, 'Reserved at checkout'), (5, 'Released by cancellation'), (6, 'Product edited'), (7, 'Product created')])),
+                ('stock_delta', models.IntegerField(default=0)),
+                ('stock_after', models.IntegerField()),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('order_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='products.product')),
+            ],
+            options={
+                'indexes': [
+                    django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='inventory_ledger_time_brin'),
+                    models.Index(fields=['product', 'created_at'], name='inventory_ledger_product_idx'),
+                    models.Index(condition=models.Q(('order_id__isnull', False)), fields=['order_id'], name='inventory_ledger_order_idx'),
+                ],
+            },
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.contrib.gis.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from apps.businesses.models import Business
 from django.contrib.postgres.search import SearchVectorField
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
 import uuid
 
 class ProductCategory(models.Model):
@@ -69,11 +70,36 @@ class Product(models.Model):
             models.Index(fields=['is_featured']),
             models.Index(fields=['created_at']),
             GinIndex(fields=['search_vector']), 
+            # Newest featured products per business (with_products top-N)
+            models.Index(
+                fields=['business', '-created_at'],
+                condition=models.Q(status='active', is_featured=True),
+                name='product_featured_newest_idx',
+            ),
         ]
     
     def __str__(self):
         return f"{self.name} - {self.business.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored price so saves can tell whether it changed
+        instance._loaded_price = instance.__dict__.get('price')
+        # ... and the fields the type-ahead suggestion is built from
+        instance._loaded_suggestion = instance.suggestion_state()
+        return instance
+    
+    def suggestion_state(self):
+        """Fields shown in (or deciding) this product's type-ahead suggestion"""
+        return tuple(self.__dict__.get(field) for field in ('name', 'slug', 'status', 'business_id'))
+    
+    @property
+    def price_changed(self):
+        """True if price differs from the value loaded from the database"""
+        loaded_price = getattr(self, '_loaded_price', None)
+        return loaded_price is not None and loaded_price != self.price
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.generate_unique_slug()
@@ -201,4 +227,54 @@ class ProductImage(models.Model):
         ordering = ['sort_order']
     
     def __str__(self):
-        return f"{self.product.name} - Image"
\ No newline at end of file
+        return f"{self.product.name} - Image"
+
+class InventoryLedgerEntry(models.Model):
+    """
+    Append-only history of a product's stock and price. Rows are never
+    updated; each write path adds its entries with one bulk insert
+    (utils/inventory.py).
+    """
+    STOCK_SET = 1
+    STOCK_ADDED = 2
+    STOCK_REMOVED = 3
+    RESERVED = 4
+    RELEASED = 5
+    EDITED = 6
+    CREATED = 7
+
+    REASONS = (
+        (STOCK_SET, 'Stock set'),
+        (STOCK_ADDED, 'Stock added'),
+        (STOCK_REMOVED, 'Stock removed'),
+        (RESERVED, 'Reserved at checkout'),
+        (RELEASED, 'Released by cancellation'),
+        (EDITED, 'Product edited'),
+        (CREATED, 'Product created'),
+    )
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name='ledger_entries', db_index=False
+    )
+    reason = models.PositiveSmallIntegerField(choices=REASONS)
+    stock_delta = models.IntegerField(default=0)
+    stock_after = models.IntegerField()
+    # Only set when the price changed (and on creation)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    order_id = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Rows arrive in time order, so a BRIN index stays tiny
+            BrinIndex(fields=['created_at'], name='inventory_ledger_time_brin'),
+            models.Index(fields=['product', 'created_at'], name='inventory_ledger_product_idx'),
+            models.Index(
+                fields=['order_id'],
+                condition=models.Q(order_id__isnull=False),
+                name='inventory_ledger_order_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.get_reason_display()} {self.stock_delta:+d}"
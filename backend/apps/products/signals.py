@@ -1,10 +1,11 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.text import slugify
 from django.utils.crypto import get_random_string
-from .models import Product
+from .models import Product, ProductCategory
 import logging
 
 logger = logging.getLogger(__name__)
@@ -84,12 +85,16 @@ def update_search_index(sender, instance, **kwargs):
         from django.contrib.postgres.search import SearchVector
         from django.contrib.postgres.indexes import GinIndex
         
-        # Update search vector if using PostgreSQL
+        from django.db.models import Value
+        
+        # Update search vector if using PostgreSQL. UPDATE cannot reference
+        # joined fields, so the category name is passed in as a value
+        category_name = instance.category.name if instance.category_id else ''
         Product.objects.filter(pk=instance.pk).update(
             search_vector=(
                 SearchVector('name', weight='A') +
                 SearchVector('description', weight='B') +
-                SearchVector('category__name', weight='B')
+                SearchVector(Value(category_name), weight='B')
             )
         )
         
@@ -100,4 +105,68 @@ def update_search_index(sender, instance, **kwargs):
         logger.debug(f"Search index updated for product {instance.pk}")
         
     except Exception as e:
-        logger.error(f"Failed to update search index: {e}")
\ No newline at end of file
+        logger.error(f"Failed to update search index: {e}")
+
+# Signal for keeping cart prices current
+@receiver(post_save, sender=Product)
+def reprice_carts_on_price_change(sender, instance, created, **kwargs):
+    """
+    Reprices (or flags) cart items holding this product once its new price
+    is committed
+    """
+    if created or not instance.price_changed:
+        return
+    
+    from utils.order_helpers import CartRepricingService
+    
+    product_id = instance.pk
+    instance._loaded_price = instance.price
+    
+    def reprice():
+        try:
+            count = CartRepricingService.reprice_products([product_id])
+            logger.debug(f"Repriced {count} cart items for product {product_id}")
+        except Exception as e:
+            logger.error(f"Failed to reprice carts for product {product_id}: {e}")
+    
+    transaction.on_commit(reprice)
+
+# Signals keeping the type-ahead suggestion index current
+@receiver(post_save, sender=Product)
+def update_product_suggestion(sender, instance, created, **kwargs):
+    from utils.suggest import Suggestion, SuggestService
+    
+    # Stock, price and other edits leave the suggestion as it is
+    state = instance.suggestion_state()
+    if not created and getattr(instance, '_loaded_suggestion', None) == state:
+        return
+    instance._loaded_suggestion = state
+    
+    business = instance.business
+    if instance.status == 'active' and business.is_active:
+        SuggestService.record_on_commit('upsert', Suggestion(
+            'product', instance.pk, instance.name, instance.slug, business.name, business.id, None
+        ))
+    else:
+        SuggestService.record_on_commit('delete', ('product', instance.pk))
+
+@receiver(post_delete, sender=Product)
+def remove_product_suggestion(sender, instance, **kwargs):
+    from utils.suggest import SuggestService
+    SuggestService.record_on_commit('delete', ('product', instance.pk))
+
+@receiver(post_save, sender=ProductCategory)
+def update_category_suggestion(sender, instance, **kwargs):
+    from utils.suggest import Suggestion, SuggestService
+    
+    if instance.is_active:
+        SuggestService.record_on_commit('upsert', Suggestion(
+            'category', instance.pk, instance.name, instance.slug, '', None, None
+        ))
+    else:
+        SuggestService.record_on_commit('delete', ('category', instance.pk))
+
+@receiver(post_delete, sender=ProductCategory)
+def remove_category_suggestion(sender, instance, **kwargs):
+    from utils.suggest import SuggestService
+    SuggestService.record_on_commit('delete', ('category', instance.pk))
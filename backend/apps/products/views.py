@@ -1,7 +1,11 @@
 from rest_framework import viewsets, filters, permissions, status
+from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
@@ -12,11 +16,20 @@ from cloudinary.uploader import upload, destroy
 from cloudinary.utils import cloudinary_url
 from cloudinary import CloudinaryImage
 
-from apps.products.models import Product, ProductCategory, ProductImage
+from apps.products.models import InventoryLedgerEntry, Product, ProductCategory, ProductImage
+from utils.facets import ProductFacetService
+from utils.filters import ProductFilter
+from utils.inventory import InventoryLedgerService
+from utils.leaderboard import LeaderboardService
+from utils.permissions import IsObjectBusinessOwner
+from utils.search import SearchManager
+from utils.suggest import KINDS, SuggestService
+from utils.view_counter import ViewCounterService
 from api.v1.serializers.products import (
     ProductListSerializer, ProductDetailSerializer,
     ProductCreateSerializer, ProductCategorySerializer,
-    ProductImageSerializer
+    ProductImageSerializer, NearbyProductSerializer, PopularProductSerializer,
+    SuggestionSerializer, primary_image_prefetch
 )
 
 @extend_schema_view(
@@ -42,6 +55,7 @@ class ProductCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductCategorySerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
+    replica_actions = ['list', 'retrieve']
 
 
 @extend_schema_view(
@@ -86,6 +100,12 @@ class ProductCategoryViewSet(viewsets.ReadOnlyModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Filter products in stock'
             ),
+            OpenApiParameter(
+                name='on_sale',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Filter products priced below their original price'
+            ),
             OpenApiParameter(
                 name='search',
                 type=OpenApiTypes.STR,
@@ -99,6 +119,12 @@ class ProductCategoryViewSet(viewsets.ReadOnlyModelViewSet):
                 description='Order results by field',
                 enum=['name', '-name', 'price', '-price', 'created_at', '-created_at']
             ),
+            OpenApiParameter(
+                name='facets',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Also return category, business type, price bucket and stock counts for the matching products'
+            ),
         ]
     ),
     retrieve=extend_schema(
@@ -135,7 +161,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     """
     queryset = Product.objects.filter(status='active')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['business', 'category', 'is_featured', 'status']
+    filterset_class = ProductFilter
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'price', 'created_at']
     ordering = ['-is_featured', '-created_at']
@@ -148,14 +174,24 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductCreateSerializer
         return ProductDetailSerializer
     
+    # Actions that act on a single product and only need its business;
+    # ownership is enforced by the scoped queryset and IsObjectBusinessOwner
+    owner_actions = [
+        'upload_images', 'delete_image', 'set_primary_image', 'reorder_images',
+        'toggle_featured', 'update_stock', 'analytics'
+    ]
+    
+    # Read-only actions served from the read replica (utils/db_router.py)
+    replica_actions = ['list', 'retrieve', 'featured', 'search', 'nearby', 'popular', 'by_category', 'analytics']
+    
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'featured', 'search', 'by_category']:
+        if self.action in ['list', 'retrieve', 'featured', 'search', 'nearby', 'popular', 'by_category']:
             return [permissions.AllowAny()]
         elif self.action == 'create':
             return [permissions.IsAuthenticated()]
         else:
             # Update, delete only for product owners
-            return [permissions.IsAuthenticated()]
+            return [permissions.IsAuthenticated(), IsObjectBusinessOwner()]
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -168,33 +204,60 @@ class ProductViewSet(viewsets.ModelViewSet):
         # Filter by owner for non-public actions
         if self.action not in ['list', 'retrieve', 'featured', 'search', 'by_category']:
             if self.request.user.is_authenticated:
-                queryset = queryset.filter(business__owner=self.request.user)
-        
-        # Add custom filters
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        in_stock = self.request.query_params.get('in_stock')
-        
-        if min_price:
-            try:
-                queryset = queryset.filter(price__gte=float(min_price))
-            except (ValueError, TypeError):
-                pass
-        
-        if max_price:
-            try:
-                queryset = queryset.filter(price__lte=float(max_price))
-            except (ValueError, TypeError):
-                pass
+                queryset = queryset.filter(business__owner_id=self.request.user.id)
         
-        if in_stock is not None:
-            if in_stock.lower() == 'true':
-                queryset = queryset.filter(stock_quantity__gt=0)
-            elif in_stock.lower() == 'false':
-                queryset = queryset.filter(stock_quantity=0)
+        if self.action in self.owner_actions:
+            # Owner actions load images themselves when they need them
+            return queryset.select_related('business')
         
         return queryset.select_related('business', 'category').prefetch_related('images')
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Buffered in memory; flush_view_counts writes the daily totals
+        ViewCounterService.record(request, 'product', response.data['id'])
+        return response
+    
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            product = serializer.save()
+            InventoryLedgerService.record(
+                product, InventoryLedgerEntry.CREATED, stock_delta=product.stock_quantity, price_changed=True
+            )
+    
+    def perform_update(self, serializer):
+        product = serializer.instance
+        old_price, old_stock = product.price, product.stock_quantity
+        with transaction.atomic():
+            product = serializer.save()
+            price_changed = product.price != old_price
+            if price_changed or product.stock_quantity != old_stock:
+                InventoryLedgerService.record(
+                    product,
+                    InventoryLedgerEntry.EDITED,
+                    stock_delta=product.stock_quantity - old_stock,
+                    price_changed=price_changed
+                )
+    
+    def wants_facets(self):
+        return self.request.query_params.get('facets', '').lower() in ('1', 'true', 'yes')
+    
+    def add_facets(self, response, queryset):
+        """Attach facet counts for ``queryset`` (the filtered, unpaginated results)"""
+        scope = f"{self.action}:{self.kwargs.get('business_id', '')}"
+        facets = ProductFacetService.get_facets(queryset, scope, self.request.query_params)
+        if isinstance(response.data, list):
+            response.data = {'results': response.data, 'facets': facets}
+        else:
+            response.data['facets'] = facets
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.wants_facets():
+            response = self.add_facets(response, self.filter_queryset(self.get_queryset()))
+        return response
+    
     # ====== CLOUDINARY IMAGE UPLOAD METHODS ======
     
     @extend_schema(
@@ -239,18 +302,11 @@ class ProductViewSet(viewsets.ModelViewSet):
             }
         }
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'])
     def upload_images(self, request, slug=None):
         """Upload multiple images for a product to Cloudinary"""
         product = self.get_object()
         
-        # Check permission
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         uploaded_images = []
         files = request.FILES.getlist('images')
         alt_texts = request.data.getlist('alt_texts', [])
@@ -341,19 +397,12 @@ class ProductViewSet(viewsets.ModelViewSet):
             404: {'type': 'object', 'properties': {'error': {'type': 'string'}}},
         }
     )
-    @action(detail=True, methods=['delete'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['delete'])
     def delete_image(self, request, slug=None):
         """Delete a specific product image"""
         product = self.get_object()
         image_id = request.data.get('image_id')
         
-        # Check permission
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         if not image_id:
             return Response(
                 {'error': 'image_id is required'}, 
@@ -402,19 +451,12 @@ class ProductViewSet(viewsets.ModelViewSet):
             200: {'type': 'object', 'properties': {'message': {'type': 'string'}}},
         }
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'])
     def set_primary_image(self, request, slug=None):
         """Set primary product image"""
         product = self.get_object()
         image_id = request.data.get('image_id')
         
-        # Check permission
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         if not image_id:
             return Response(
                 {'error': 'image_id is required'}, 
@@ -462,19 +504,12 @@ class ProductViewSet(viewsets.ModelViewSet):
             200: {'type': 'object', 'properties': {'message': {'type': 'string'}}},
         }
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'])
     def reorder_images(self, request, slug=None):
         """Reorder product images"""
         product = self.get_object()
         image_orders = request.data.get('image_orders', [])
         
-        # Check permission
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         if not image_orders:
             return Response(
                 {'error': 'image_orders is required'}, 
@@ -544,6 +579,12 @@ class ProductViewSet(viewsets.ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description='Filter by category name'
             ),
+            OpenApiParameter(
+                name='facets',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Also return category, business type, price bucket and stock counts for the matching products'
+            ),
         ],
         examples=[
             OpenApiExample(
@@ -573,7 +614,8 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        queryset = self.get_queryset()
+        # ProductFilter parameters (price, stock, category...) apply here too
+        queryset = self.filter_queryset(self.get_queryset())
         
         # Search in product name and description
         search_filter = Q(name__icontains=query) | Q(description__icontains=query)
@@ -586,6 +628,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         if category_name:
             queryset = queryset.filter(category__name__icontains=category_name)
         
+        matches = queryset
+        
         # Order by relevance (products with query in name first)
         queryset = queryset.extra(
             select={
@@ -597,10 +641,146 @@ class ProductViewSet(viewsets.ModelViewSet):
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        if self.wants_facets():
+            response = self.add_facets(response, matches)
+        return response
+    
+    @extend_schema(
+        summary="Search products near a location",
+        description=(
+            "Products matching q sold within radius km of lat/lon, ranked by a blend of text relevance "
+            "and distance. Pass next_cursor back as cursor for the next page."
+        ),
+        tags=["Products"],
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True,
+                             description='Search terms (web search syntax)'),
+            OpenApiParameter(name='lat', type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(name='lon', type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(name='radius', type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY, default=10,
+                             description='Search radius in kilometers'),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, default=20),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='next_cursor of the previous page'),
+        ],
+        examples=[
+            OpenApiExample(
+                'Bread near Soweto',
+                summary='Bread within 5 km of Soweto',
+                value={'q': 'bread', 'lat': -26.2485, 'lon': 27.8540, 'radius': 5}
+            ),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Products near a location matching a text query, keyset paginated"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Search query (q) is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            location = Point(
+                float(request.query_params['lon']), float(request.query_params['lat']), srid=4326
+            )
+            radius_km = float(request.query_params.get('radius', 10))
+            limit = int(request.query_params.get('limit', 20))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'lat and lon are required; lat, lon, radius and limit must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 < radius_km <= settings.PRODUCT_NEARBY_MAX_RADIUS_KM:
+            return Response(
+                {'error': f'radius must be between 0 and {settings.PRODUCT_NEARBY_MAX_RADIUS_KM} km'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, settings.PRODUCT_NEARBY_MAX_LIMIT))
+        
+        after = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            after = SearchManager.decode_cursor(cursor)
+            if after is None:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products = list(
+            SearchManager.search_products_near(query, location, radius_km, after=after, limit=limit)
+            .select_related('business', 'category')
+            .prefetch_related(primary_image_prefetch())
+        )
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = SearchManager.encode_cursor(products[-1].score, products[-1].id)
+        
+        return Response({
+            'results': NearbyProductSerializer(products, many=True, context=self.get_serializer_context()).data,
+            'next_cursor': next_cursor,
+        })
+    
+    @extend_schema(
+        summary="Popular products",
+        description=(
+            "Best-selling products over recent weeks (older sales count for less), overall or for one "
+            "business, category or city. Pass at most one of business, category and city."
+        ),
+        tags=["Products"],
+        parameters=[
+            OpenApiParameter(name='business', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description='Business id'),
+            OpenApiParameter(name='category', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='Category slug'),
+            OpenApiParameter(name='city', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='City or township name, e.g. Soweto'),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, default=10),
+        ],
+        responses=PopularProductSerializer(many=True)
+    )
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """Top products from the leaderboards (utils/leaderboard.py), or recent orders without a shared one"""
+        scopes = {key: request.query_params[key] for key in ('business', 'category', 'city')
+                  if request.query_params.get(key)}
+        if len(scopes) > 1:
+            return Response(
+                {'error': 'Pass at most one of business, category and city'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.LEADERBOARD_MAX_LIMIT))
+        
+        scope, value = next(iter(scopes.items()), ('all', None))
+        if scope == 'business' and not value.isdigit():
+            return Response({'error': 'Invalid business'}, status=status.HTTP_400_BAD_REQUEST)
+        if scope == 'category':
+            value = get_object_or_404(ProductCategory, slug=value, is_active=True).id
+        
+        # Ask for extra entries in case some products are no longer listed.
+        # A per-process board only holds this worker's sales
+        popular = {}
+        if LeaderboardService.is_shared():
+            popular = dict(LeaderboardService.top(scope, value, limit=limit * 2))
+        if not popular:
+            popular = dict(LeaderboardService.top_from_orders(scope, value, limit=limit * 2))
+        products = Product.objects.filter(
+            pk__in=popular, status='active', business__is_active=True
+        ).select_related('business', 'category').prefetch_related(primary_image_prefetch())
+        
+        products = sorted(products, key=lambda product: -popular[product.id])[:limit]
+        for product in products:
+            product.popularity = round(popular[product.id], 2)
+        return Response(PopularProductSerializer(products, many=True, context=self.get_serializer_context()).data)
     
     @extend_schema(
         summary="Get products by category",
@@ -665,18 +845,11 @@ class ProductViewSet(viewsets.ModelViewSet):
             )
         }
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'])
     def toggle_featured(self, request, slug=None):
         """Toggle featured status (business owner only)"""
         product = self.get_object()
         
-        # Check if user is the business owner
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         product.is_featured = not product.is_featured
         product.save()
         
@@ -709,18 +882,11 @@ class ProductViewSet(viewsets.ModelViewSet):
             }
         }
     )
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'])
     def update_stock(self, request, slug=None):
         """Update product stock (business owner only)"""
         product = self.get_object()
         
-        # Check if user is the business owner
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         quantity = request.data.get('quantity')
         action = request.data.get('action', 'set')
         
@@ -740,20 +906,38 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update stock based on action
-        if action == 'set':
-            product.stock_quantity = quantity
-        elif action == 'add':
-            product.stock_quantity += quantity
-        elif action == 'subtract':
-            product.stock_quantity = max(0, product.stock_quantity - quantity)
-        else:
+        reasons = {
+            'set': InventoryLedgerEntry.STOCK_SET,
+            'add': InventoryLedgerEntry.STOCK_ADDED,
+            'subtract': InventoryLedgerEntry.STOCK_REMOVED,
+        }
+        if action not in reasons:
             return Response(
                 {'error': 'Invalid action. Use: set, add, or subtract'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        product.save()
+        with transaction.atomic():
+            # Lock the row so concurrent updates and checkouts are not lost.
+            # The save signals read business and category, so load them here
+            product = Product.objects.select_for_update(of=('self',)).select_related(
+                'business', 'category'
+            ).get(pk=product.pk)
+            old_stock = product.stock_quantity
+            
+            # Update stock based on action
+            if action == 'set':
+                product.stock_quantity = quantity
+            elif action == 'add':
+                product.stock_quantity += quantity
+            else:
+                product.stock_quantity = max(0, product.stock_quantity - quantity)
+            
+            product.save()
+            if product.stock_quantity != old_stock:
+                InventoryLedgerService.record(
+                    product, reasons[action], stock_delta=product.stock_quantity - old_stock
+                )
         
         return Response({
             'message': 'Stock updated successfully',
@@ -766,6 +950,22 @@ class ProductViewSet(viewsets.ModelViewSet):
         summary="Get product analytics",
         description="Get analytics data for a product (business owner only)",
         tags=["Products"],
+        parameters=[
+            OpenApiParameter(
+                name='days',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="History window in days",
+                default=30
+            ),
+            OpenApiParameter(
+                name='points',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Most points per history series",
+                default=60
+            ),
+        ],
         responses={
             200: {
                 'type': 'object',
@@ -773,35 +973,77 @@ class ProductViewSet(viewsets.ModelViewSet):
                     'views_total': {'type': 'integer'},
                     'views_this_month': {'type': 'integer'},
                     'views_this_week': {'type': 'integer'},
+                    'views_today': {'type': 'integer'},
+                    'unique_visitors_today': {'type': 'integer', 'nullable': True},
                     'stock_history': {'type': 'array'},
                     'price_history': {'type': 'array'},
                 }
             }
         }
     )
-    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['get'])
     def analytics(self, request, slug=None):
         """Get product analytics (business owner only)"""
         product = self.get_object()
         
-        # Check if user is the business owner
-        if product.business.owner != request.user and not request.user.is_staff:
-            return Response(
-                {'error': 'Permission denied'}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
+        try:
+            days = int(request.query_params.get('days', 30))
+            points = int(request.query_params.get('points', 60))
+        except ValueError:
+            return Response({'error': 'Invalid days or points'}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(1, min(days, settings.INVENTORY_HISTORY_MAX_DAYS))
+        points = max(1, min(points, settings.INVENTORY_HISTORY_MAX_POINTS))
+        stock_history, price_history = InventoryLedgerService.history(product.id, days=days, points=points)
         
-        # Basic analytics data (implement tracking as needed)
         analytics_data = {
-            'views_total': 0,  # Implement view tracking
-            'views_this_month': 0,
-            'views_this_week': 0,
-            'stock_history': [],  # Implement stock change tracking
-            'price_history': [],  # Implement price change tracking
+            **ViewCounterService.counts('product', product.id),
+            'stock_history': stock_history,
+            'price_history': price_history,
             'current_stock': product.stock_quantity,
             'is_low_stock': product.is_low_stock,
             'created_at': product.created_at,
             'last_updated': product.updated_at,
         }
         
-        return Response(analytics_data)
\ No newline at end of file
+        return Response(analytics_data)
+
+
+class SuggestView(APIView):
+    """
+    Keystroke-level suggestions from the in-process prefix index. Public and
+    unauthenticated, so answering never touches PostgreSQL.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    @extend_schema(
+        summary="Type-ahead suggestions",
+        description="Most popular products, businesses and categories whose name (or a later word of it) starts with q",
+        tags=["Search"],
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=True),
+            OpenApiParameter(
+                name='types',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=f"Comma-separated subset of: {', '.join(KINDS)}"
+            ),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, default=8),
+        ],
+        responses=SuggestionSerializer(many=True)
+    )
+    def get(self, request):
+        kinds = [kind for kind in request.query_params.get('types', '').split(',') if kind]
+        if any(kind not in KINDS for kind in kinds):
+            return Response(
+                {'error': f"types must be a subset of: {', '.join(KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', 8))
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.SUGGEST_MAX_RESULTS))
+        
+        suggestions = SuggestService.suggest(request.query_params.get('q', ''), limit=limit, kinds=kinds)
+        return Response(SuggestionSerializer(suggestions, many=True).data)
@@ -0,0 +1,52 @@
+"""
+Gunicorn settings. Pick a worker profile with GUNICORN_PROFILE:
+
+  asgi     uvicorn workers serving asgi.py (default). Needed for the order
+           event streams; pair with DB_CONNECTION_MODE=pool or pgbouncer.
+  gthread  threaded WSGI workers for deployments that do not serve streams.
+           Threads are reused, so DB_CONNECTION_MODE=persistent keeps one
+           connection per thread open.
+  sync     one request per worker, for debugging.
+
+Our views mostly wait on PostgreSQL, Redis and Cloudinary, so a few workers
+with many concurrent requests each beat many single-request workers on the
+small instances we run on.
+"""
+import multiprocessing
+import os
+
+profile = os.environ.get('GUNICORN_PROFILE', 'asgi')
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Render and most PaaS set WEB_CONCURRENCY from the instance size
+workers = int(os.environ.get('WEB_CONCURRENCY', min(cpu_count * 2 + 1, 4)))
+
+if profile == 'asgi':
+    wsgi_app = 'alx_project_nexus.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif profile == 'gthread':
+    wsgi_app = 'alx_project_nexus.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 8))
+elif profile == 'sync':
+    wsgi_app = 'alx_project_nexus.wsgi:application'
+    worker_class = 'sync'
+else:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE {profile!r}")
+
+# Event streams stay open for EVENT_STREAM_MAX_SECONDS; uvicorn workers keep
+# heartbeating while they do, so this only bounds stuck sync requests
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot build up; jitter keeps
+# them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# Connection pools are created per process, after the fork
+preload_app = False
+
+errorlog = '-'
@@ -1,3 +1,5 @@
 #!/bin/bash
 python manage.py migrate
-gunicorn alx_project_nexus.wsgi:application --bind 0.0.0.0:$PORT
\ No newline at end of file
+# Worker profile and database connection handling are configured through
+# GUNICORN_PROFILE and DB_CONNECTION_MODE, see gunicorn.conf.py
+exec gunicorn -c gunicorn.conf.py
@@ -0,0 +1,64 @@
+"""
+Concurrent database reads for async views.
+
+Django's async ORM methods (``aget``, ``acount``, ...) run every query
+through ``sync_to_async(thread_sensitive=True)``, i.e. one after another on
+the request's single sync thread, so ``asyncio.gather`` over them takes the
+sum of the query times. ``gather_queries`` instead runs each query function
+on a worker thread of its own, with its own connection (borrowed from the
+pool with DB_CONNECTION_MODE=pool), so a fan-out takes as long as its
+slowest query. At most ASYNC_DB_CONCURRENCY queries per process run at once,
+which should stay below DB_POOL_MAX_SIZE.
+"""
+import asyncio
+import weakref
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+# One semaphore per event loop: under WSGI (runserver) each async view runs
+# in an event loop of its own
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(getattr(settings, 'ASYNC_DB_CONCURRENCY', 8))
+    return semaphore
+
+
+def _run_with_connection_cleanup(func):
+    # Worker threads outlive the request, so they go through the same
+    # connection housekeeping Django does at request start and finish
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def run_query(func, *args, **kwargs):
+    """Run the sync ``func(*args, **kwargs)`` on a worker thread"""
+    async with _semaphore():
+        return await sync_to_async(_run_with_connection_cleanup, thread_sensitive=False)(
+            partial(func, *args, **kwargs)
+        )
+
+
+async def gather_queries(*calls):
+    """
+    Run ``(func, *args)`` calls concurrently and return their results in
+    order. The first exception is raised once every call has finished.
+    """
+    results = await asyncio.gather(
+        *(run_query(func, *args) for func, *args in calls),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
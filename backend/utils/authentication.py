@@ -0,0 +1,212 @@
+"""
+JWT authentication that does not touch the database on every request.
+
+Access tokens carry the claims most views need (user type, staff flag and the
+ids of the businesses the user owns). ``CachedJWTAuthentication`` builds the
+request user from those claims and only loads the User row, through a small
+in-process cache, when a view reads any other attribute.
+"""
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from utils.cache import TTLCache
+from utils.cache_backends import is_shared_cache
+
+User = get_user_model()
+
+CLAIM_USER_TYPE = 'user_type'
+CLAIM_IS_STAFF = 'is_staff'
+CLAIM_BUSINESS_IDS = 'business_ids'
+
+_user_cache = TTLCache(
+    maxsize=getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+)
+
+
+def user_claims(user):
+    """Claims embedded in access tokens for ``user``"""
+    from apps.businesses.models import Business
+
+    business_ids = []
+    if user.user_type == 'business_owner':
+        business_ids = list(
+            Business.objects.filter(owner_id=user.pk).order_by('id').values_list('id', flat=True)
+        )
+    return {
+        CLAIM_USER_TYPE: user.user_type,
+        CLAIM_IS_STAFF: user.is_staff,
+        CLAIM_BUSINESS_IDS: business_ids,
+    }
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry fresh user claims.
+
+    Claims are recomputed whenever an access token is minted (login and
+    refresh), so role or ownership changes reach clients within one access
+    token lifetime.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token._user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = getattr(self, '_user', None)
+        if user is None:
+            user = User.objects.only('id', 'user_type', 'is_staff', 'is_active').filter(
+                **{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}
+            ).first()
+            if user is None:
+                raise AuthenticationFailed("User not found", code='user_not_found')
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed("User is inactive", code='user_inactive')
+        for claim, value in user_claims(user).items():
+            access[claim] = value
+        return access
+
+
+def _revoked_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def revoke_user_tokens(user_id):
+    """Reject access tokens issued to the user up to now (shared across workers)"""
+    lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(_revoked_key(user_id), int(time.time()), lifetime)
+
+
+def is_token_revoked(user_id, issued_at):
+    if not getattr(settings, 'AUTH_TOKEN_REVOCATION_CHECK', True):
+        return False
+    revoked_at = cache.get(_revoked_key(user_id))
+    return revoked_at is not None and (issued_at is None or issued_at <= revoked_at)
+
+
+def _field_names():
+    return [field.attname for field in User._meta.concrete_fields]
+
+
+def get_cached_user(user_id):
+    """
+    Return a fresh User instance for ``user_id``, or None if it does not exist.
+    Rows are cached per process; every call builds a new instance so requests
+    never share (and mutate) the same object.
+    """
+    values = _user_cache.get(user_id)
+    if values is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        _user_cache.set(user_id, [getattr(user, name) for name in _field_names()])
+        return user
+    return User.from_db(DEFAULT_DB_ALIAS, _field_names(), values)
+
+
+def invalidate_cached_user(user_id):
+    _user_cache.delete(user_id)
+
+
+def _load_active_user(user_id):
+    user = get_cached_user(user_id)
+    if user is None:
+        raise AuthenticationFailed("User not found", code='user_not_found')
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed("User is inactive", code='user_inactive')
+    return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Request user backed by token claims.
+
+    ``id``, ``pk``, ``user_type``, ``is_staff`` and ``business_ids`` are read
+    from the token. Any other attribute (or isinstance checks, comparisons and
+    saving) loads the real User. Prefer ``user.id`` over ``user`` in queryset
+    filters to keep requests query-free.
+    """
+
+    def __init__(self, user_id, claims):
+        super().__init__(partial(_load_active_user, user_id))
+        self.__dict__.update({
+            'id': user_id,
+            'pk': user_id,
+            'user_type': claims[CLAIM_USER_TYPE],
+            'is_staff': claims.get(CLAIM_IS_STAFF, False),
+            'business_ids': frozenset(claims.get(CLAIM_BUSINESS_IDS, ())),
+            'is_authenticated': True,
+            'is_anonymous': False,
+        })
+
+    def __bool__(self):
+        return True
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that returns a ClaimsUser instead of querying the
+    User table. Tokens minted before claims were added, and every token when
+    the cache is per process (revocations would not reach other workers),
+    fall back to an eager (cached) lookup; CHECK_REVOKE_TOKEN setups use the
+    stock behaviour.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if is_token_revoked(user_id, validated_token.get('iat')):
+            raise AuthenticationFailed("Token has been revoked", code='token_revoked')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # The password-hash check needs the real row
+            return super().get_user(validated_token)
+        # Claims are only as fresh as the revocation markers, which reach
+        # other workers only through a shared cache
+        if CLAIM_USER_TYPE not in validated_token or not is_shared_cache():
+            return _load_active_user(user_id)
+
+        return ClaimsUser(user_id, validated_token)
+
+
+def authenticate_request(request, allow_query_token=False):
+    """
+    Resolve the user for plain (non-DRF) async views from a Bearer header,
+    or a ``?token=`` query parameter when ``allow_query_token`` is set
+    (browsers' EventSource cannot send custom headers). Returns None when
+    the request carries no valid token.
+    """
+    authentication = CachedJWTAuthentication()
+    try:
+        header = authentication.get_header(request)
+        if header is not None:
+            raw_token = authentication.get_raw_token(header)
+        elif allow_query_token:
+            raw_token = request.GET.get('token')
+        else:
+            raw_token = None
+        if not raw_token:
+            return None
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
@@ -0,0 +1,42 @@
+"""
+Cache backends that report hits and misses to the request metrics.
+Configure them in CACHES instead of the stock Django backends.
+"""
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from utils.metrics import record_cache_lookup
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            record_cache_lookup(0, 1)
+            return default
+        record_cache_lookup(1, 0)
+        return value
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    # BaseCache.get_many goes through get(), so lookups are already counted
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache_lookup(len(found), len(keys) - len(found))
+        return found
+
+
+def is_shared_cache(alias='default'):
+    """True when every worker process sees the same cache (not a per-process one)"""
+    from django.core.cache import caches
+    from django.core.cache.backends.dummy import DummyCache
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+
+class OwnerDashboardService:
+    """
+    Business owner KPIs from one conditional aggregate query per table
+    (businesses, products, orders), so the cost does not grow with the number
+    of businesses an owner has. Results are cached per owner for
+    DASHBOARD_CACHE_SECONDS.
+    """
+
+    # Orders that still need the owner's attention
+    OPEN_ORDER_STATUSES = ['confirmed', 'preparing', 'ready', 'out_for_delivery']
+    # Orders that do not count towards revenue
+    VOID_ORDER_STATUSES = ['cancelled', 'refunded']
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f"dashboard:owner:{user_id}"
+
+    @staticmethod
+    def business_stats(user_id):
+        from apps.businesses.models import Business
+
+        active = Q(is_active=True)
+        return Business.objects.filter(owner_id=user_id).aggregate(
+            total_businesses=Count('id', filter=active),
+            inactive_businesses=Count('id', filter=Q(is_active=False)),
+            featured_businesses=Count('id', filter=active & Q(is_featured=True)),
+            verified_businesses=Count('id', filter=active & Q(verification_status='verified')),
+            pending_verification=Count('id', filter=active & Q(verification_status='pending')),
+            rejected_businesses=Count('id', filter=active & Q(verification_status='rejected')),
+        )
+
+    @staticmethod
+    def product_stats(user_id):
+        from apps.products.models import Product
+
+        active = Q(status='active')
+        return Product.objects.filter(
+            business__owner_id=user_id,
+            business__is_active=True
+        ).aggregate(
+            total_products=Count('id', filter=active),
+            low_stock_products=Count(
+                'id',
+                filter=active & Q(track_inventory=True, stock_quantity__lte=F('low_stock_threshold'))
+            ),
+            out_of_stock_products=Count('id', filter=Q(status='out_of_stock')),
+        )
+
+    @staticmethod
+    def order_stats(user_id):
+        from apps.orders.models import Order
+
+        now = timezone.localtime()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month = today.replace(day=1)
+        billable = ~Q(status__in=OwnerDashboardService.VOID_ORDER_STATUSES)
+
+        stats = Order.objects.filter(business__owner_id=user_id).aggregate(
+            total_orders=Count('id'),
+            pending_orders=Count('id', filter=Q(status='pending')),
+            orders_in_progress=Count('id', filter=Q(status__in=OwnerDashboardService.OPEN_ORDER_STATUSES)),
+            today_orders=Count('id', filter=Q(created_at__gte=today)),
+            today_revenue=Sum('total_amount', filter=billable & Q(created_at__gte=today), default=Decimal('0')),
+            monthly_revenue=Sum('total_amount', filter=billable & Q(created_at__gte=month), default=Decimal('0')),
+        )
+        stats['today_revenue'] = float(stats['today_revenue'])
+        stats['monthly_revenue'] = float(stats['monthly_revenue'])
+        return stats
+
+    @staticmethod
+    def get_cached(user_id):
+        return cache.get(OwnerDashboardService._cache_key(user_id))
+
+    @staticmethod
+    def store(user_id, *parts):
+        """Merge the per-table results and cache them"""
+        stats = {}
+        for part in parts:
+            stats.update(part)
+        cache.set(OwnerDashboardService._cache_key(user_id), stats, settings.DASHBOARD_CACHE_SECONDS)
+        return stats
+
+    @staticmethod
+    def get_stats(user_id):
+        """Owner KPIs, from the cache when fresh"""
+        stats = OwnerDashboardService.get_cached(user_id)
+        if stats is None:
+            stats = OwnerDashboardService.store(
+                user_id,
+                OwnerDashboardService.business_stats(user_id),
+                OwnerDashboardService.product_stats(user_id),
+                OwnerDashboardService.order_stats(user_id),
+            )
+        return stats
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(OwnerDashboardService._cache_key(user_id))
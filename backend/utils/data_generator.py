@@ -0,0 +1,499 @@
+"""
+Fast, deterministic synthetic data for development, staging and benchmarks.
+
+Rows are streamed to the database in batches with ``bulk_create``, which sends
+no model signals. Work the signals would normally do per row (product slugs,
+SKUs and search vectors) is done afterwards with one UPDATE per group of
+businesses. The same seed always produces the same rows, and businesses are
+spread around real township centres so geo queries see realistic density.
+"""
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.db.models import signals
+
+# (township, city, province, latitude, longitude, spread in degrees)
+TOWNSHIPS = [
+    ('Soweto', 'Johannesburg', 'Gauteng', -26.2485, 27.8540, 0.05),
+    ('Alexandra', 'Johannesburg', 'Gauteng', -26.1030, 28.0970, 0.015),
+    ('Tembisa', 'Ekurhuleni', 'Gauteng', -25.9960, 28.2270, 0.03),
+    ('Katlehong', 'Ekurhuleni', 'Gauteng', -26.3420, 28.1510, 0.03),
+    ('Mamelodi', 'Pretoria', 'Gauteng', -25.7170, 28.3960, 0.03),
+    ('Soshanguve', 'Pretoria', 'Gauteng', -25.5200, 28.1000, 0.03),
+    ('Khayelitsha', 'Cape Town', 'Western Cape', -34.0380, 18.6770, 0.03),
+    ('Gugulethu', 'Cape Town', 'Western Cape', -33.9800, 18.5700, 0.015),
+    ('Langa', 'Cape Town', 'Western Cape', -33.9440, 18.5270, 0.01),
+    ('Mitchells Plain', 'Cape Town', 'Western Cape', -34.0500, 18.6180, 0.025),
+    ('Umlazi', 'Durban', 'KwaZulu-Natal', -29.9700, 30.8830, 0.03),
+    ('KwaMashu', 'Durban', 'KwaZulu-Natal', -29.7450, 30.9700, 0.02),
+    ('Mdantsane', 'East London', 'Eastern Cape', -32.9430, 27.7400, 0.025),
+    ('Motherwell', 'Gqeberha', 'Eastern Cape', -33.8040, 25.5920, 0.02),
+    ('Seshego', 'Polokwane', 'Limpopo', -23.8500, 29.3800, 0.02),
+]
+
+# Relative share of businesses per township (Soweto and Khayelitsha dominate)
+TOWNSHIP_WEIGHTS = [12, 4, 6, 5, 5, 4, 10, 4, 3, 6, 7, 4, 3, 3, 2]
+
+BUSINESS_CATEGORIES = [
+    ('Spaza Shops', 'spaza-shops', 'Local convenience stores'),
+    ('Restaurants', 'restaurants', 'Food and dining'),
+    ('Electronics', 'electronics', 'Electronic goods and repairs'),
+    ('Fashion', 'fashion', 'Clothing and accessories'),
+    ('Services', 'services', 'Various local services'),
+]
+
+PRODUCT_CATEGORIES = [
+    ('Food & Beverages', 'food-beverages'),
+    ('Electronics', 'electronics'),
+    ('Clothing', 'clothing'),
+    ('Home & Garden', 'home-garden'),
+    ('Health & Beauty', 'health-beauty'),
+]
+
+# Product words per business type, so a spaza shop sells groceries
+PRODUCT_WORDS = {
+    'spaza_shop': ['bread', 'milk', 'maize meal', 'sugar', 'airtime', 'eggs', 'cooking oil', 'tea', 'candles', 'soap'],
+    'restaurant': ['kota', 'vetkoek', 'bunny chow', 'braai pack', 'chips', 'wors roll', 'pap and vleis', 'cooldrink'],
+    'electronics': ['charger', 'usb cable', 'earphones', 'phone case', 'power bank', 'bluetooth speaker', 'screen protector'],
+    'fashion': ['sneakers', 'jacket', 'shirt', 'dress', 'bucket hat', 'tracksuit', 'handbag'],
+    'services': ['haircut', 'phone repair', 'car wash', 'braids', 'shoe repair', 'printing'],
+    'grocery': ['rice', 'chicken', 'beef', 'potatoes', 'tomatoes', 'onions', 'samp', 'beans'],
+    'other': ['firewood', 'gas refill', 'water', 'ice'],
+}
+ADJECTIVES = ['Fresh', 'Large', 'Small', 'Family', 'Value', 'Premium', 'Classic', 'Spicy', 'Mini', 'Deluxe', 'Local']
+
+BUSINESS_PREFIXES = ['Mama', 'Bra', 'Sisi', 'Uncle', 'Gogo', 'Kasi', 'Ekasi', 'Ubuntu', 'Mzansi', 'Lekker']
+BUSINESS_NAMES = ['Thandi', 'Sipho', 'Lerato', 'Bongani', 'Zanele', 'Themba', 'Palesa', 'Kagiso', 'Nomsa', 'Tebogo']
+BUSINESS_SUFFIXES = {
+    'spaza_shop': 'Spaza', 'restaurant': 'Kitchen', 'electronics': 'Gadgets', 'fashion': 'Boutique',
+    'services': 'Services', 'grocery': 'Groceries', 'other': 'Traders',
+}
+FIRST_NAMES = BUSINESS_NAMES + ['Ayanda', 'Lindiwe', 'Mpho', 'Neo', 'Karabo', 'Sizwe', 'Naledi', 'Andile']
+LAST_NAMES = ['Dlamini', 'Nkosi', 'Mokoena', 'Khumalo', 'Ndlovu', 'Mahlangu', 'Mthembu', 'Botha', 'Naidoo', 'Jacobs']
+STREETS = ['Vilakazi', 'Main', 'Church', 'Station', 'Mandela', 'Sisulu', 'Tambo', 'Biko', 'Market', 'School']
+
+ORDER_STATUSES = ['completed'] * 6 + ['delivered'] * 2 + ['pending', 'cancelled']
+
+# Product slugs, SKUs and search vectors for every product of a range of
+# businesses, as generate_product_sku/update_search_index would set them.
+# Slugs are ranked within the business so duplicates get the product id
+FINALIZE_PRODUCTS_SQL = """
+    WITH base AS (
+        SELECT p.id, p.business_id,
+               coalesce(nullif(left(trim(BOTH '-' FROM regexp_replace(lower(p.name), '[^a-z0-9]+', '-', 'g')), 38), ''), 'product') AS base_slug,
+               coalesce(c.name, '') AS category_name,
+               coalesce((
+                   SELECT string_agg(upper(left(word, 1)), '')
+                   FROM unnest((string_to_array(c.name, ' '))[1:3]) AS word
+               ), 'GEN') AS initials,
+               row_number() OVER (
+                   PARTITION BY p.business_id,
+                   coalesce(nullif(left(trim(BOTH '-' FROM regexp_replace(lower(p.name), '[^a-z0-9]+', '-', 'g')), 38), ''), 'product')
+                   ORDER BY p.id
+               ) AS slug_rank
+        FROM {product} p
+        LEFT JOIN {category} c ON c.id = p.category_id
+        WHERE p.business_id >= %s AND p.business_id < %s
+    )
+    UPDATE {product} p SET
+        slug = CASE WHEN base.slug_rank = 1 THEN base.base_slug ELSE base.base_slug || '-' || base.id END,
+        sku = coalesce(p.sku, 'BUS-' || base.business_id || '-' || base.initials || '-' || base.id),
+        search_vector = setweight(to_tsvector(coalesce(p.name, '')), 'A')
+            || setweight(to_tsvector(coalesce(p.description, '')), 'B')
+            || setweight(to_tsvector(base.category_name), 'B')
+    FROM base
+    WHERE p.id = base.id
+"""
+
+# auto_now_add overrides created_at on insert, so order dates are set after
+SPREAD_ORDER_DATES_SQL = """
+    UPDATE {order} o SET created_at = now() - v.age * interval '1 second'
+    FROM unnest(%s::uuid[], %s::integer[]) AS v(id, age)
+    WHERE o.id = v.id
+"""
+
+
+def model_receivers():
+    """
+    ``(signal, receiver, sender)`` for the app receivers of the generated
+    models. A receiver added for one of them belongs here as well, otherwise
+    clear() falls back to row-by-row deletes.
+    """
+    from apps.accounts import signals as account_signals
+    from apps.businesses import signals as business_signals
+    from apps.businesses.models import Business
+    from apps.products import signals as product_signals
+    from apps.products.models import Product
+
+    User = get_user_model()
+    return [
+        (signals.post_save, account_signals.refresh_cached_user, User),
+        (signals.post_delete, account_signals.forget_deleted_user, User),
+        (signals.pre_save, business_signals.set_business_slug, Business),
+        (signals.post_save, business_signals.refresh_owner_auth, Business),
+        (signals.post_save, business_signals.move_delivery_rings, Business),
+        (signals.post_save, business_signals.update_business_suggestion, Business),
+        (signals.post_delete, business_signals.forget_deleted_business, Business),
+        (signals.post_delete, business_signals.remove_business_suggestion, Business),
+        (signals.pre_save, product_signals.generate_product_sku, Product),
+        (signals.post_save, product_signals.check_low_stock, Product),
+        (signals.post_save, product_signals.update_search_index, Product),
+        (signals.post_save, product_signals.reprice_carts_on_price_change, Product),
+        (signals.post_save, product_signals.update_product_suggestion, Product),
+        (signals.post_delete, product_signals.remove_product_suggestion, Product),
+    ]
+
+
+@contextmanager
+def muted_signals(*models):
+    """
+    Temporarily disconnect the app signal receivers registered for ``models``.
+
+    bulk_create sends no signals anyway; muting also lets bulk deletes of the
+    generated data use fast (non row-by-row) deletes.
+    """
+    muted = [
+        (signal, receiver, sender)
+        for signal, receiver, sender in model_receivers()
+        if sender in models and signal.disconnect(receiver, sender=sender)
+    ]
+    try:
+        yield
+    finally:
+        for signal, receiver, sender in muted:
+            signal.connect(receiver, sender=sender)
+
+
+class SyntheticDataGenerator:
+    """
+    Generates users, businesses, products and orders.
+
+    Every generated username starts with ``prefix`` and every order number
+    with ``order_prefix``, which is how ``generated_*`` querysets and
+    ``clear()`` find the data again.
+    """
+
+    PASSWORD = 'password123'
+
+    def __init__(self, seed=42, batch_size=5000, prefix='', order_prefix='GEN-', log=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.order_prefix = order_prefix
+        self.log = log or (lambda message: None)
+
+    # Generated data
+
+    @property
+    def owner_prefix(self):
+        return f'{self.prefix}business_owner_'
+
+    @property
+    def customer_prefix(self):
+        return f'{self.prefix}customer_'
+
+    def generated_businesses(self):
+        from apps.businesses.models import Business
+        return Business.objects.filter(owner__username__startswith=self.owner_prefix)
+
+    def generated_products(self):
+        from apps.products.models import Product
+        return Product.objects.filter(business__owner__username__startswith=self.owner_prefix)
+
+    def generated_orders(self):
+        from apps.orders.models import Order
+        return Order.objects.filter(order_number__startswith=self.order_prefix)
+
+    def generated_customers(self):
+        return get_user_model().objects.filter(username__startswith=self.customer_prefix)
+
+    def generate(self, businesses=10, products=50, orders=0, customers=0):
+        """Create the requested number of rows and return the counts per model"""
+        from apps.businesses.models import Business
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product
+
+        started = time.perf_counter()
+        with muted_signals(get_user_model(), Business, Product, Order, OrderItem):
+            self.ensure_categories()
+            owner_ids = self.create_users(self.owner_prefix, 'business_owner', businesses)
+            business_ids = self.create_businesses(owner_ids)
+            product_count = self.create_products(business_ids, products)
+            self.finalize_products(business_ids)
+            order_count = 0
+            if orders:
+                customer_ids = self.create_users(self.customer_prefix, 'customer', max(customers, 1))
+                order_count = self.create_orders(customer_ids, business_ids, orders)
+
+        self.log(f"Generated data in {time.perf_counter() - started:.1f}s")
+        return {
+            'businesses': len(business_ids),
+            'products': product_count,
+            'orders': order_count,
+        }
+
+    def clear(self):
+        """Delete everything previously generated with this prefix"""
+        from apps.businesses.models import Business
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product
+
+        User = get_user_model()
+        with muted_signals(User, Business, Product, Order, OrderItem), transaction.atomic():
+            OrderItem.objects.filter(order__order_number__startswith=self.order_prefix).delete()
+            self.generated_orders().delete()
+            self.generated_products().delete()
+            self.generated_businesses().delete()
+            User.objects.filter(username__startswith=self.owner_prefix).delete()
+            self.generated_customers().delete()
+
+    # Steps
+
+    def _step(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.log(f"  {label}: {count} rows in {elapsed:.1f}s ({rate:.0f} rows/s)")
+
+    def _batches(self, rows):
+        """Split an iterable of unsaved instances into lists of batch_size"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def ensure_categories(self):
+        from apps.businesses.models import BusinessCategory
+        from apps.products.models import ProductCategory
+
+        BusinessCategory.objects.bulk_create([
+            BusinessCategory(name=name, slug=slug, description=description)
+            for name, slug, description in BUSINESS_CATEGORIES
+        ], ignore_conflicts=True)
+        ProductCategory.objects.bulk_create([
+            ProductCategory(name=name, slug=slug) for name, slug in PRODUCT_CATEGORIES
+        ], ignore_conflicts=True)
+
+        self.business_categories = list(BusinessCategory.objects.order_by('id').values_list('id', flat=True))
+        self.product_categories = list(ProductCategory.objects.order_by('id').values_list('id', flat=True))
+
+    def create_users(self, prefix, user_type, count):
+        """Create ``prefix<n>`` users that do not exist yet and return all their ids"""
+        User = get_user_model()
+        started = time.perf_counter()
+        # Hashing is deliberately slow, so generated users share one hash
+        password = make_password(self.PASSWORD)
+        rows = (
+            User(
+                username=f'{prefix}{i}',
+                email=f'{prefix}{i}@example.com',
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                user_type=user_type,
+                password=password
+            )
+            for i in range(count)
+        )
+        for batch in self._batches(rows):
+            User.objects.bulk_create(batch, ignore_conflicts=True)
+
+        ids = list(
+            User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True)[:count]
+        )
+        self._step(f'{user_type} users', len(ids), started)
+        return ids
+
+    def random_place(self):
+        """A township and a point scattered around its centre"""
+        township = self.random.choices(TOWNSHIPS, weights=TOWNSHIP_WEIGHTS)[0]
+        name, city, province, lat, lon, spread = township
+        point = Point(
+            lon + self.random.gauss(0, spread / 2),
+            lat + self.random.gauss(0, spread / 2),
+            srid=4326
+        )
+        return name, city, province, point
+
+    def create_businesses(self, owner_ids):
+        from apps.businesses.models import Business
+
+        started = time.perf_counter()
+        existing = set(
+            Business.objects.filter(owner_id__in=owner_ids).values_list('owner_id', flat=True)
+        )
+        business_types = [value for value, _ in Business.BUSINESS_TYPES]
+
+        def rows():
+            for owner_id in owner_ids:
+                if owner_id in existing:
+                    continue
+                business_type = self.random.choice(business_types)
+                township, city, province, point = self.random_place()
+                name = (
+                    f'{self.random.choice(BUSINESS_PREFIXES)} {self.random.choice(BUSINESS_NAMES)}\'s '
+                    f'{BUSINESS_SUFFIXES[business_type]}'
+                )
+                # bulk_create skips set_business_slug; the owner id keeps it unique
+                yield Business(
+                    owner_id=owner_id,
+                    name=name,
+                    slug=f'{township.lower().replace(" ", "-")}-{owner_id}',
+                    description=f'{name} serving {township}, {city}.',
+                    business_type=business_type,
+                    category_id=self.random.choice(self.business_categories),
+                    phone_number=f'+277{self.random.randint(10000000, 99999999)}',
+                    location=point,
+                    address=f'{self.random.randint(1, 9999)} {self.random.choice(STREETS)} Street, {township}',
+                    city=city,
+                    province=province,
+                    is_featured=self.random.random() < 0.05,
+                    verification_status='verified'
+                )
+
+        for batch in self._batches(rows()):
+            Business.objects.bulk_create(batch)
+
+        ids = list(
+            Business.objects.filter(owner_id__in=owner_ids).order_by('id').values_list('id', flat=True)
+        )
+        self._step('businesses', len(ids), started)
+        return ids
+
+    def create_products(self, business_ids, count):
+        from apps.businesses.models import Business
+        from apps.products.models import Product
+
+        if not business_ids or not count:
+            return 0
+        started = time.perf_counter()
+        business_types = dict(
+            Business.objects.filter(id__in=business_ids).values_list('id', 'business_type')
+        )
+        # Slugs are placeholders until finalize_products; they only need to
+        # be unique per business, which the run token and index guarantee
+        token = f'{self.seed}-{int(time.time())}'
+
+        def rows():
+            for index in range(count):
+                business_id = self.random.choice(business_ids)
+                word = self.random.choice(PRODUCT_WORDS[business_types[business_id]])
+                name = f'{self.random.choice(ADJECTIVES)} {word.title()}'
+                price = Decimal(self.random.randint(500, 100000)) / 100
+                discounted = self.random.random() < 0.2
+                yield Product(
+                    business_id=business_id,
+                    name=name,
+                    slug=f'tmp-{token}-{index}',
+                    description=f'{name} sold locally. Quality {word} at a fair price.',
+                    category_id=self.random.choice(self.product_categories),
+                    price=(price * Decimal('0.8')).quantize(Decimal('0.01')) if discounted else price,
+                    original_price=price if discounted else None,
+                    stock_quantity=self.random.randint(0, 500),
+                    low_stock_threshold=self.random.randint(5, 20),
+                    is_featured=self.random.random() < 0.05,
+                    status='active'
+                )
+
+        for batch in self._batches(rows()):
+            with transaction.atomic():
+                Product.objects.bulk_create(batch)
+        self._step('products', count, started)
+        return count
+
+    def finalize_products(self, business_ids):
+        """Set slugs, SKUs and search vectors set-wise, one group of businesses at a time"""
+        from apps.products.models import Product, ProductCategory
+
+        if not business_ids:
+            return
+        started = time.perf_counter()
+        sql = FINALIZE_PRODUCTS_SQL.format(
+            product=Product._meta.db_table, category=ProductCategory._meta.db_table
+        )
+        # All products of a business are in the same statement, so slug
+        # ranking sees every sibling
+        step = max(1, self.batch_size // 50)
+        first, last = min(business_ids), max(business_ids)
+        updated = 0
+        for start in range(first, last + 1, step):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [start, start + step])
+                updated += cursor.rowcount
+        self._step('product slugs, SKUs and search vectors', updated, started)
+
+    def create_orders(self, customer_ids, business_ids, count):
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product
+
+        started = time.perf_counter()
+        catalogue = {}
+        products = Product.objects.filter(business_id__in=business_ids).order_by('id')
+        for product_id, business_id, price, name in products.values_list(
+            'id', 'business_id', 'price', 'name'
+        ).iterator(chunk_size=self.batch_size * 4):
+            catalogue.setdefault(business_id, []).append((product_id, price, name))
+        selling = sorted(catalogue)
+        if not selling or not customer_ids:
+            return 0
+
+        offset = self.generated_orders().count()
+        sql = SPREAD_ORDER_DATES_SQL.format(order=Order._meta.db_table)
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            orders, items, ages = [], [], []
+            for number in range(offset + created, offset + created + size):
+                business_id = self.random.choice(selling)
+                lines = self.random.sample(
+                    catalogue[business_id], min(len(catalogue[business_id]), self.random.randint(1, 3))
+                )
+                # Order ids are UUIDs generated client-side, so items can
+                # reference their order before it is inserted
+                order = Order(
+                    order_number=f'{self.order_prefix}{number:010d}',
+                    customer_id=self.random.choice(customer_ids),
+                    business_id=business_id,
+                    status=self.random.choice(ORDER_STATUSES),
+                    delivery_method='pickup',
+                    customer_name=f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}',
+                    customer_phone=f'+277{self.random.randint(10000000, 99999999)}',
+                    subtotal=Decimal('0.00'),
+                    total_amount=Decimal('0.00'),
+                    payment_status='paid'
+                )
+                subtotal = Decimal('0.00')
+                for product_id, price, name in lines:
+                    quantity = self.random.randint(1, 4)
+                    subtotal += price * quantity
+                    items.append(OrderItem(
+                        order=order,
+                        product_id=product_id,
+                        quantity=quantity,
+                        unit_price=price,
+                        total_price=price * quantity,
+                        product_name=name
+                    ))
+                order.subtotal = subtotal
+                order.total_amount = subtotal
+                orders.append(order)
+                ages.append(self.random.randint(0, 90 * 24 * 3600))
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(items)
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, [[str(order.id) for order in orders], ages])
+            created += size
+
+        self._step('orders', created, started)
+        return created
@@ -0,0 +1,180 @@
+"""
+PostGIS backend that borrows connections from a per-process pool.
+
+Django keeps one connection per thread. Under ASGI, and under runserver,
+every request runs on a new thread, so persistent connections (CONN_MAX_AGE)
+are never reused and each request pays for a new TCP and TLS handshake. This
+backend hands out already open connections from a process-wide pool when a
+thread connects, and puts them back when Django closes the connection at the
+end of the request.
+
+Configure it with ``ENGINE: 'utils.db_backends.postgis_pool'``, ``CONN_MAX_AGE: 0``
+and an optional ``POOL`` dict in the DATABASES entry (see
+``database_settings`` in settings/base.py).
+"""
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.contrib.gis.db.backends.postgis.base import DatabaseWrapper as PostGISDatabaseWrapper
+from django.db import OperationalError
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    # Seconds to wait for a free connection before giving up
+    'TIMEOUT': 10,
+    # Connections are replaced after this many seconds
+    'MAX_LIFETIME': 1800,
+    # Idle connections are checked with SELECT 1 before reuse after this many seconds
+    'CHECK_AFTER': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Thread-safe LIFO pool of psycopg2 connections. At most ``MAX_SIZE``
+    connections are checked out or idle at once; callers wait up to
+    ``TIMEOUT`` seconds for one to be returned.
+    """
+
+    def __init__(self, max_size, timeout, max_lifetime, check_after):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # (connection, created_at, returned_at), most recently returned last
+        self._idle = deque()
+        self._created_at = {}
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def get(self, connect):
+        """Return an open connection, calling ``connect()`` when none is idle"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f"No database connection became free within {self.timeout}s "
+                f"(pool size {self.max_size})"
+            )
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, created_at, returned_at = self._idle.pop()
+                if self._usable(connection, created_at, returned_at):
+                    self.reused += 1
+                    return connection
+                self._discard(connection)
+
+            connection = connect()
+            self._created_at[id(connection)] = time.monotonic()
+            self.opened += 1
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection):
+        """Return a checked out connection; broken or dirty ones are closed"""
+        try:
+            keep = not connection.closed
+            if keep and connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    keep = False
+            if keep:
+                with self._lock:
+                    self._idle.append((connection, self._created_at.get(id(connection), 0), time.monotonic()))
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def _usable(self, connection, created_at, returned_at):
+        now = time.monotonic()
+        if connection.closed or now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at > self.check_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        self.discarded += 1
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            'max_size': self.max_size,
+            'idle': idle,
+            'opened': self.opened,
+            'reused': self.reused,
+            'discarded': self.discarded,
+        }
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+
+def get_pool(settings_dict, alias):
+    key = (alias, settings_dict['NAME'], settings_dict['HOST'], settings_dict['PORT'])
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = {**POOL_DEFAULTS, **settings_dict.get('POOL', {})}
+                pool = _pools[key] = ConnectionPool(
+                    max_size=options['MAX_SIZE'],
+                    timeout=options['TIMEOUT'],
+                    max_lifetime=options['MAX_LIFETIME'],
+                    check_after=options['CHECK_AFTER'],
+                )
+    return pool
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.settings_dict, self.alias)
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # The parent sets this while opening a connection; reused ones keep
+        # their isolation level, so mirror it on the wrapper
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
+
+    def pool_stats(self):
+        return self.pool.stats()
@@ -0,0 +1,115 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware (utils/middleware.py) marks requests whose view
+action is listed in the view's ``replica_actions``, and ReplicaRouter sends
+their reads to the ``replica`` database. Writes, reads inside a transaction,
+the rest of a request that has written, and requests from clients that wrote
+in the last REPLICA_PIN_SECONDS (read-your-writes) all use the primary.
+Without a ``replica`` entry in DATABASES every query goes to ``default``.
+"""
+import contextvars
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def _request_user_id(request):
+    """
+    Id of the DRF-authenticated user without triggering a lazy user lookup.
+    DRF stores the authenticated user on the Django request; ClaimsUser keeps
+    its id in the instance dict.
+    """
+    user = request.__dict__.get('user')
+    if user is None:
+        return None
+    return user.__dict__.get('id')
+
+
+class RoutingState:
+    """Routing decisions for the request being handled"""
+
+    __slots__ = ('request', 'use_replica', 'wrote', '_pinned')
+
+    def __init__(self, request):
+        self.request = request
+        self.use_replica = False
+        self.wrote = False
+        self._pinned = None
+
+    @property
+    def pinned(self):
+        """True if this client wrote recently and must read from the primary"""
+        if self._pinned is None:
+            pinned = settings.REPLICA_PIN_COOKIE in self.request.COOKIES
+            if not pinned:
+                user_id = _request_user_id(self.request)
+                pinned = user_id is not None and cache.get(_pin_key(user_id)) is not None
+            self._pinned = pinned
+        return self._pinned
+
+
+def start_routing(request):
+    state = RoutingState(request)
+    return state, _state.set(state)
+
+
+def end_routing(token):
+    _state.reset(token)
+
+
+def current_routing():
+    return _state.get()
+
+
+def pin_to_primary(request, response):
+    """Route this client's reads to the primary for REPLICA_PIN_SECONDS"""
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(settings.REPLICA_PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+    # API clients often ignore cookies, so authenticated users are pinned
+    # server-side as well
+    user_id = _request_user_id(request)
+    if user_id is not None:
+        cache.set(_pin_key(user_id), 1, seconds)
+
+
+class ReplicaRouter:
+    """Database router used with DATABASE_ROUTERS; see the module docstring"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        # select_for_update and reads after writes in the same transaction
+        # must see the primary
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS
@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db import connection
+from django.db.models import Q
+
+from utils.helpers import bounding_degrees
+
+
+class DeliveryZoneService:
+    """
+    Delivery quotes and "who delivers here" filtering from DeliveryZone
+    polygons. Businesses that have not set up any zones deliver within
+    DELIVERY_DEFAULT_RADIUS_KM for DELIVERY_DEFAULT_FEE.
+    """
+
+    # Rebuilds the area of ring zones from their business's location
+    RING_SQL = """
+        UPDATE businesses_deliveryzone AS zone
+        SET area = ST_Multi(
+            ST_Buffer(business.location::geography, (zone.radius_km * 1000)::float8, 'quad_segs=16')::geometry
+        )
+        FROM businesses_business AS business
+        WHERE business.id = zone.business_id
+          AND zone.radius_km IS NOT NULL
+          AND {condition}
+    """
+
+    # One row per business: the smallest active zone containing the point
+    # (if any), whether the business has zones at all, and the distance
+    QUOTE_SQL = """
+        WITH destination AS (
+            SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS geom
+        )
+        SELECT business.id,
+               business.name,
+               ST_DistanceSphere(business.location, destination.geom) / 1000.0,
+               EXISTS (
+                   SELECT 1 FROM businesses_deliveryzone AS any_zone
+                   WHERE any_zone.business_id = business.id AND any_zone.is_active
+               ),
+               zone.id,
+               zone.name,
+               zone.fee,
+               zone.min_order_amount
+        FROM businesses_business AS business
+        CROSS JOIN destination
+        LEFT JOIN LATERAL (
+            SELECT id, name, fee, min_order_amount
+            FROM businesses_deliveryzone
+            WHERE business_id = business.id
+              AND is_active
+              AND ST_Covers(area, destination.geom)
+            ORDER BY ST_Area(area), fee
+            LIMIT 1
+        ) AS zone ON TRUE
+        WHERE business.id = ANY(%(business_ids)s)
+    """
+
+    @staticmethod
+    def refresh_rings(business_id=None, zone_id=None):
+        """Recompute ring zone areas for one business or one zone"""
+        if zone_id is not None:
+            condition, params = "zone.id = %s", [zone_id]
+        else:
+            condition, params = "zone.business_id = %s", [business_id]
+        with connection.cursor() as cursor:
+            cursor.execute(DeliveryZoneService.RING_SQL.format(condition=condition), params)
+
+    @staticmethod
+    def quote(business_ids, location, subtotals=None):
+        """
+        Delivery quote to ``location`` for every business in ``business_ids``,
+        keyed by business id, in one query. ``subtotals`` (business id ->
+        order subtotal) adds a ``meets_minimum`` flag to each quote.
+        """
+        business_ids = list(business_ids)
+        if not business_ids:
+            return {}
+
+        with connection.cursor() as cursor:
+            cursor.execute(DeliveryZoneService.QUOTE_SQL, {
+                'lon': location.x,
+                'lat': location.y,
+                'business_ids': business_ids,
+            })
+            rows = cursor.fetchall()
+
+        default_radius = settings.DELIVERY_DEFAULT_RADIUS_KM
+        default_fee = Decimal(settings.DELIVERY_DEFAULT_FEE)
+        quotes = {}
+        for business_id, name, distance_km, has_zones, zone_id, zone_name, fee, min_order_amount in rows:
+            if zone_id is not None:
+                delivers = True
+            elif has_zones:
+                delivers, fee, min_order_amount = False, None, None
+            else:
+                delivers = distance_km <= default_radius
+                fee = default_fee if delivers else None
+                min_order_amount = Decimal('0.00') if delivers else None
+
+            quote = {
+                'business_id': business_id,
+                'business_name': name,
+                'delivers': delivers,
+                'zone_id': zone_id,
+                'zone_name': zone_name,
+                'fee': fee,
+                'min_order_amount': min_order_amount,
+                'distance_km': round(distance_km, 2),
+            }
+            if subtotals is not None and delivers:
+                quote['meets_minimum'] = subtotals.get(business_id, Decimal('0.00')) >= min_order_amount
+            quotes[business_id] = quote
+        return quotes
+
+    @staticmethod
+    def delivering_to(queryset, location):
+        """
+        Filter a Business queryset to those delivering to ``location``.
+        Zone containment uses the zones' spatial index; the default radius of
+        businesses without zones is pre-filtered with the location index.
+        """
+        from apps.businesses.models import DeliveryZone
+
+        radius_km = settings.DELIVERY_DEFAULT_RADIUS_KM
+        active_zones = DeliveryZone.objects.filter(is_active=True)
+
+        covered = Q(id__in=active_zones.filter(area__covers=location).values('business_id'))
+        default_radius = (
+            Q(location__dwithin=(location, bounding_degrees(location, radius_km)))
+            & Q(location__distance_lte=(location, D(km=radius_km)))
+            & ~Q(id__in=active_zones.values('business_id'))
+        )
+        return queryset.filter(covered | default_radius)
+
+    @staticmethod
+    def parse_point(value):
+        """``"lat,lon"`` to a Point, or None when malformed"""
+        try:
+            lat, lon = (float(part) for part in value.split(','))
+        except (AttributeError, ValueError):
+            return None
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None
+        return Point(lon, lat, srid=4326)
@@ -0,0 +1,126 @@
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import BooleanField, Case, F, Q, Value, When
+
+
+class ProductFacetService:
+    """
+    Facet counts (category, business type, price bucket, in stock) for a
+    filtered product queryset in one GROUPING SETS query, cached by the
+    normalized filter parameters for PRODUCT_FACETS_CACHE_SECONDS.
+    """
+
+    # Query parameters that do not change which products match
+    IGNORED_PARAMS = {'page', 'page_size', 'ordering', 'facets', 'format'}
+
+    FACETS_SQL = """
+        SELECT GROUPING(facet_category, facet_category_name) = 0,
+               GROUPING(facet_business_type) = 0,
+               GROUPING(facet_price_bucket) = 0,
+               GROUPING(facet_in_stock) = 0,
+               facet_category, facet_category_name, facet_business_type,
+               facet_price_bucket, facet_in_stock, COUNT(*)
+        FROM (
+            SELECT filtered.*, width_bucket(filtered.facet_price, %s::numeric[]) AS facet_price_bucket
+            FROM ({filtered}) AS filtered
+        ) AS product
+        GROUP BY GROUPING SETS (
+            (facet_category, facet_category_name),
+            (facet_business_type),
+            (facet_price_bucket),
+            (facet_in_stock),
+            ()
+        )
+    """
+
+    @staticmethod
+    def cache_key(scope, params):
+        """``scope`` separates endpoints (e.g. list vs search); ``params`` is a QueryDict"""
+        normalized = '&'.join(
+            f"{key}={','.join(sorted(params.getlist(key)))}"
+            for key in sorted(params)
+            if key not in ProductFacetService.IGNORED_PARAMS
+        )
+        digest = hashlib.md5(f"{scope}?{normalized}".encode()).hexdigest()
+        return f"facets:products:{digest}"
+
+    @staticmethod
+    def _price_buckets(boundaries, counts):
+        # width_bucket numbers the buckets from 1; the last one is open-ended.
+        # Prices are never negative, so nothing falls below a first boundary of 0
+        buckets = []
+        for number in range(1, len(boundaries) + 1):
+            buckets.append({
+                'min_price': boundaries[number - 1],
+                'max_price': boundaries[number] if number < len(boundaries) else None,
+                'count': counts.get(number, 0),
+            })
+        return buckets
+
+    @staticmethod
+    def compute(queryset):
+        from apps.businesses.models import Business
+
+        boundaries = [Decimal(str(boundary)) for boundary in settings.PRODUCT_FACET_PRICE_BOUNDARIES]
+        filtered = queryset.order_by().annotate(
+            facet_category=F('category_id'),
+            facet_category_name=F('category__name'),
+            facet_business_type=F('business__business_type'),
+            facet_price=F('price'),
+            facet_in_stock=Case(
+                When(Q(track_inventory=False) | Q(stock_quantity__gt=0), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+        ).values(
+            'facet_category', 'facet_category_name', 'facet_business_type', 'facet_price', 'facet_in_stock'
+        )
+        # Only the facet columns are selected, so the related rows the view
+        # usually loads must not be joined in
+        filtered.query.select_related = False
+        sql, params = filtered.query.sql_with_params()
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                ProductFacetService.FACETS_SQL.format(filtered=sql),
+                [boundaries, *params]
+            )
+            rows = cursor.fetchall()
+
+        type_names = dict(Business.BUSINESS_TYPES)
+        facets = {'total': 0, 'categories': [], 'business_types': [], 'in_stock': 0, 'out_of_stock': 0}
+        price_counts = {}
+        for (by_category, by_type, by_price, by_stock, category_id, category_name,
+             business_type, price_bucket, in_stock, count) in rows:
+            if by_category:
+                facets['categories'].append({'id': category_id, 'name': category_name, 'count': count})
+            elif by_type:
+                facets['business_types'].append({
+                    'value': business_type,
+                    'name': type_names.get(business_type, business_type),
+                    'count': count,
+                })
+            elif by_price:
+                price_counts[price_bucket] = count
+            elif by_stock:
+                facets['in_stock' if in_stock else 'out_of_stock'] = count
+            else:
+                facets['total'] = count
+
+        facets['categories'].sort(key=lambda item: (-item['count'], item['name'] or ''))
+        facets['business_types'].sort(key=lambda item: -item['count'])
+        facets['price_buckets'] = ProductFacetService._price_buckets(boundaries, price_counts)
+        return facets
+
+    @staticmethod
+    def get_facets(queryset, scope, params):
+        key = ProductFacetService.cache_key(scope, params)
+        facets = cache.get(key)
+        if facets is None:
+            facets = ProductFacetService.compute(queryset)
+            cache.set(key, facets, settings.PRODUCT_FACETS_CACHE_SECONDS)
+        return facets
@@ -50,13 +50,11 @@ class ProductFilter(django_filters.FilterSet):
         fields = ['category', 'business', 'is_featured', 'status']
     
     def filter_in_stock(self, queryset, name, value):
-        """Filter products that are in stock"""
+        """Filter products that are in stock (or, with in_stock=false, out of stock)"""
+        in_stock = models.Q(track_inventory=False) | models.Q(track_inventory=True, stock_quantity__gt=0)
         if value:
-            return queryset.filter(
-                models.Q(track_inventory=False) | 
-                models.Q(track_inventory=True, stock_quantity__gt=0)
-            )
-        return queryset
+            return queryset.filter(in_stock)
+        return queryset.exclude(in_stock)
     
     def filter_on_sale(self, queryset, name, value):
         """Filter products that are on sale (have original_price > price)"""
@@ -0,0 +1,178 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Value, When
+
+
+class GeocodingService:
+    """
+    Forward geocoding, reverse geocoding and autocomplete against the local
+    gazetteer (apps.locations.Place). Geocoding results are cached for
+    GEOCODE_CACHE_SECONDS; loading the gazetteer bumps the cache version.
+    """
+
+    # Most specific first: reverse geocoding reports the smallest place
+    SPECIFICITY = ('suburb', 'township', 'city', 'province')
+    # Autocomplete lists the places people search for most first
+    AUTOCOMPLETE_ORDER = ('township', 'city', 'suburb', 'province')
+    MIN_SIMILARITY = 0.4
+
+    @staticmethod
+    def _rank(order):
+        return Case(
+            *(When(place_type=place_type, then=Value(rank)) for rank, place_type in enumerate(order)),
+            default=Value(len(order)),
+            output_field=IntegerField()
+        )
+
+    @staticmethod
+    def _cache_key(kind, value):
+        version = cache.get_or_set('geocode:version', 1, None)
+        digest = hashlib.md5(value.encode()).hexdigest()
+        return f"geocode:{version}:{kind}:{digest}"
+
+    @staticmethod
+    def clear_cache():
+        """Invalidate every cached result (after the gazetteer changes)"""
+        try:
+            cache.incr('geocode:version')
+        except ValueError:
+            cache.set('geocode:version', 2, None)
+
+    @staticmethod
+    def describe(place):
+        return {
+            'slug': place.slug,
+            'name': place.name,
+            'place_type': place.place_type,
+            'city': place.city,
+            'province': place.province,
+            'latitude': place.centroid.y,
+            'longitude': place.centroid.x,
+        }
+
+    @staticmethod
+    def _places():
+        from apps.locations.models import Place
+        # Boundaries can be large and are only needed for containment
+        return Place.objects.defer('boundary')
+
+    @staticmethod
+    def autocomplete(query, limit=10, place_type=None):
+        """
+        Places whose name starts with ``query`` (prefix index), topped up with
+        trigram matches so misspellings still find something
+        """
+        from django.contrib.postgres.search import TrigramSimilarity
+        from apps.locations.models import normalize_place_name
+
+        term = normalize_place_name(query)
+        if not term:
+            return []
+        places = GeocodingService._places()
+        if place_type:
+            places = places.filter(place_type=place_type)
+
+        results = list(
+            places.filter(search_name__startswith=term)
+            .order_by(GeocodingService._rank(GeocodingService.AUTOCOMPLETE_ORDER), 'search_name')[:limit]
+        )
+        if len(results) < limit and len(term) >= 3:
+            results += list(
+                places.filter(search_name__trigram_similar=term)
+                .exclude(id__in=[place.id for place in results])
+                .annotate(similarity=TrigramSimilarity('search_name', term))
+                .order_by('-similarity')[:limit - len(results)]
+            )
+        return results
+
+    @staticmethod
+    def _match(term):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        places = GeocodingService._places()
+        exact = places.filter(search_name=term).order_by(
+            GeocodingService._rank(GeocodingService.SPECIFICITY)
+        ).first()
+        if exact is not None:
+            return exact
+        return places.annotate(
+            similarity=TrigramSimilarity('search_name', term)
+        ).filter(
+            search_name__trigram_similar=term,
+            similarity__gte=GeocodingService.MIN_SIMILARITY
+        ).order_by('-similarity').first()
+
+    @staticmethod
+    def forward(query):
+        """
+        Best gazetteer match for a free-text address, e.g. "12 Vilakazi St,
+        Orlando, Soweto". Comma-separated parts are tried from the most
+        specific; parts containing digits (street addresses) are skipped.
+        Returns ``describe(place)`` or None.
+        """
+        from apps.locations.models import normalize_place_name
+
+        normalized = normalize_place_name(query)
+        if not normalized:
+            return None
+        key = GeocodingService._cache_key('forward', normalized)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached or None
+
+        parts = [normalize_place_name(part) for part in (query or '').split(',')]
+        candidates = [part for part in parts if part and not re.search(r'\d', part)]
+        if normalized not in candidates:
+            candidates.append(normalized)
+
+        result = None
+        for candidate in candidates:
+            place = GeocodingService._match(candidate)
+            if place is not None:
+                result = GeocodingService.describe(place)
+                break
+
+        # Misses are cached too ({} is falsy)
+        cache.set(key, result or {}, settings.GEOCODE_CACHE_SECONDS)
+        return result
+
+    @staticmethod
+    def reverse(point):
+        """
+        Smallest gazetteer place containing ``point``, with its city and
+        province, or None outside every known boundary
+        """
+        # ~100 m grid so nearby lookups share cache entries
+        key = GeocodingService._cache_key('reverse', f"{point.y:.3f},{point.x:.3f}")
+        cached = cache.get(key)
+        if cached is not None:
+            return cached or None
+
+        place = GeocodingService._places().filter(boundary__covers=point).order_by(
+            GeocodingService._rank(GeocodingService.SPECIFICITY)
+        ).first()
+        result = GeocodingService.describe(place) if place is not None else None
+        cache.set(key, result or {}, settings.GEOCODE_CACHE_SECONDS)
+        return result
+
+    @staticmethod
+    def within_place_q(slug):
+        """
+        Q for Business querysets located in the place ``slug``: a containment
+        test against its boundary, or a province match for provinces. Returns
+        None for unknown places.
+        """
+        from django.db.models import Q
+        from apps.locations.models import Place
+
+        place = Place.objects.filter(slug=slug).only('name', 'place_type', 'boundary').first()
+        if place is None:
+            return None
+        if place.boundary is not None:
+            return Q(location__within=place.boundary)
+        if place.place_type == 'province':
+            return Q(province__iexact=place.name)
+        return Q(city__iexact=place.name)
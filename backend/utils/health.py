@@ -0,0 +1,268 @@
+"""
+Dependency checks behind the liveness and readiness endpoints.
+
+Every check is timed and bounded: database checks run with a statement
+timeout, everything else runs on a small thread pool and is abandoned after
+HEALTH_CHECK_TIMEOUT seconds. The readiness report is cached per process for
+HEALTH_CHECK_CACHE_SECONDS and computed by one request at a time, so frequent
+load balancer probes cost at most one round of checks per interval.
+"""
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.monotonic()
+
+STATUS_OK = 'ok'
+STATUS_DEGRADED = 'degraded'
+STATUS_FAIL = 'fail'
+STATUS_SKIPPED = 'skipped'
+
+# Checks whose failure takes the instance out of rotation
+CRITICAL_CHECKS = ('database', 'postgis', 'migrations')
+
+_results = TTLCache(maxsize=8, ttl=5)
+_refresh_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='health')
+
+
+@receiver(connection_created)
+def stamp_connection(sender, connection, **kwargs):
+    """Remember when each database connection was opened"""
+    connection.health_opened_at = time.monotonic()
+
+
+def _timeout():
+    return getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Round trip latency, PostGIS version and age of the worker's connection"""
+    connection = connections[alias]
+    result = {}
+    started = time.perf_counter()
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s", [int(_timeout() * 1000)])
+            query_started = time.perf_counter()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            result['query_ms'] = _elapsed_ms(query_started)
+            try:
+                with transaction.atomic(using=alias):
+                    cursor.execute("SELECT postgis_lib_version()")
+                    postgis = {'status': STATUS_OK, 'version': cursor.fetchone()[0]}
+            except Exception as e:
+                postgis = {'status': STATUS_FAIL, 'error': str(e)}
+    except Exception as e:
+        return (
+            {'status': STATUS_FAIL, 'error': str(e), 'latency_ms': _elapsed_ms(started)},
+            {'status': STATUS_SKIPPED},
+        )
+
+    # Includes connecting when the worker had no open connection
+    result['latency_ms'] = _elapsed_ms(started)
+    opened_at = getattr(connection, 'health_opened_at', None)
+    result['connection_age_seconds'] = (
+        round(time.monotonic() - opened_at, 1) if opened_at is not None else None
+    )
+    result['max_age'] = connection.settings_dict.get('CONN_MAX_AGE')
+    result['mode'] = getattr(settings, 'DB_CONNECTION_MODE', None)
+    if hasattr(connection, 'pool_stats'):
+        result['pool'] = connection.pool_stats()
+    result['status'] = STATUS_OK
+    return result, postgis
+
+
+def check_replica():
+    """Read replica round trip and replication lag (not critical: reads fall back)"""
+    from utils.db_router import REPLICA_DB_ALIAS, replica_configured
+
+    if not replica_configured():
+        return {'status': STATUS_SKIPPED, 'reason': 'no replica configured'}
+
+    result, _ = check_database(REPLICA_DB_ALIAS)
+    if result['status'] != STATUS_OK:
+        result['status'] = STATUS_DEGRADED
+        return result
+    try:
+        with connections[REPLICA_DB_ALIAS].cursor() as cursor:
+            # NULL when the alias points at a primary (e.g. local testing)
+            cursor.execute("SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())")
+            lag = cursor.fetchone()[0]
+    except Exception as e:
+        result.update(status=STATUS_DEGRADED, error=str(e))
+        return result
+    result['lag_seconds'] = round(float(lag), 2) if lag is not None else None
+    if lag is not None and lag > getattr(settings, 'REPLICA_PIN_SECONDS', 5):
+        result['status'] = STATUS_DEGRADED
+    return result
+
+
+def check_migrations(alias=DEFAULT_DB_ALIAS):
+    """Unapplied migrations; cached longer than the other checks (loading is slow)"""
+    cached = _results.get(('migrations', alias))
+    if cached is not None:
+        return cached
+
+    from django.db.migrations.executor import MigrationExecutor
+
+    started = time.perf_counter()
+    try:
+        executor = MigrationExecutor(connections[alias])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        pending = [f"{migration.app_label}.{migration.name}" for migration, _ in plan]
+        result = {
+            'status': STATUS_FAIL if pending else STATUS_OK,
+            'pending': pending,
+            'latency_ms': _elapsed_ms(started),
+        }
+    except Exception as e:
+        result = {'status': STATUS_FAIL, 'error': str(e), 'latency_ms': _elapsed_ms(started)}
+
+    _results.set(('migrations', alias), result, ttl=getattr(settings, 'HEALTH_MIGRATIONS_CACHE_SECONDS', 60))
+    return result
+
+
+def check_cache():
+    key = f"health:{os.getpid()}"
+    started = time.perf_counter()
+    cache.set(key, 'ok', 10)
+    value = cache.get(key)
+    if value != 'ok':
+        return {'status': STATUS_FAIL, 'error': 'read back a different value', 'latency_ms': _elapsed_ms(started)}
+    return {'status': STATUS_OK, 'backend': cache.__class__.__name__, 'latency_ms': _elapsed_ms(started)}
+
+
+def check_queue():
+    """Messages waiting in the Celery default queue (Redis brokers only)"""
+    broker_url = getattr(settings, 'CELERY_BROKER_URL', '') or ''
+    if not broker_url.startswith(('redis://', 'rediss://')):
+        return {'status': STATUS_SKIPPED, 'reason': 'no Redis task broker configured'}
+
+    import redis
+
+    started = time.perf_counter()
+    client = redis.Redis.from_url(broker_url, socket_timeout=_timeout(), socket_connect_timeout=_timeout())
+    try:
+        backlog = client.llen(getattr(settings, 'CELERY_DEFAULT_QUEUE', 'celery'))
+    finally:
+        client.close()
+    limit = getattr(settings, 'HEALTH_QUEUE_BACKLOG_WARNING', 1000)
+    return {
+        'status': STATUS_DEGRADED if backlog > limit else STATUS_OK,
+        'backlog': backlog,
+        'latency_ms': _elapsed_ms(started),
+    }
+
+
+def check_storage():
+    """Reachability of the media storage (Cloudinary, or a stand-in URL)"""
+    url = getattr(settings, 'HEALTH_STORAGE_CHECK_URL', '')
+    if not url:
+        return {'status': STATUS_SKIPPED, 'reason': 'HEALTH_STORAGE_CHECK_URL not set'}
+
+    started = time.perf_counter()
+    request = urllib.request.Request(url, method='HEAD')
+    try:
+        with urllib.request.urlopen(request, timeout=_timeout()) as response:
+            status_code = response.status
+    except urllib.error.HTTPError as e:
+        # Any HTTP answer means the service is reachable
+        status_code = e.code
+    return {
+        'status': STATUS_DEGRADED if status_code >= 500 else STATUS_OK,
+        'http_status': status_code,
+        'latency_ms': _elapsed_ms(started),
+    }
+
+
+def _result(future, deadline):
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except FutureTimeout:
+        return {'status': STATUS_FAIL, 'error': f"timed out after {_timeout()}s"}
+    except Exception as e:
+        return {'status': STATUS_FAIL, 'error': str(e)}
+
+
+def run_checks():
+    """Run every check and return the readiness report"""
+    started = time.perf_counter()
+    deadline = time.monotonic() + _timeout()
+    # Start the off-thread checks first so they overlap the database checks
+    futures = {
+        name: _executor.submit(check)
+        for name, check in (('cache', check_cache), ('queue', check_queue), ('storage', check_storage))
+    }
+
+    checks = {}
+    checks['database'], checks['postgis'] = check_database()
+    if checks['database']['status'] == STATUS_OK:
+        checks['migrations'] = check_migrations()
+    else:
+        checks['migrations'] = {'status': STATUS_SKIPPED}
+    checks['replica'] = check_replica()
+    for name, future in futures.items():
+        checks[name] = _result(future, deadline)
+
+    if any(checks[name]['status'] == STATUS_FAIL for name in CRITICAL_CHECKS):
+        status = STATUS_FAIL
+    elif any(check['status'] in (STATUS_FAIL, STATUS_DEGRADED) for check in checks.values()):
+        status = STATUS_DEGRADED
+    else:
+        status = STATUS_OK
+
+    return {
+        'status': status,
+        'checks': checks,
+        'duration_ms': _elapsed_ms(started),
+        'checked_at': time.time(),
+    }
+
+
+def readiness_report():
+    """
+    Cached readiness report. Only one request per process recomputes it; the
+    others wait for that result instead of running their own checks.
+    """
+    report = _results.get('report')
+    if report is not None:
+        return report, True
+
+    with _refresh_lock:
+        report = _results.get('report')
+        if report is not None:
+            return report, True
+        report = run_checks()
+        _results.set('report', report, ttl=getattr(settings, 'HEALTH_CHECK_CACHE_SECONDS', 5))
+        if report['status'] != STATUS_OK:
+            logger.warning(f"Readiness check {report['status']}: {report['checks']}")
+        return report, False
+
+
+def liveness_report():
+    """Process-only information; never touches a dependency"""
+    return {
+        'status': STATUS_OK,
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.monotonic() - STARTED_AT, 1),
+    }
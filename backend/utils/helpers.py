@@ -1,6 +1,8 @@
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import Distance
 from decimal import Decimal
+import math
+import unicodedata
 import uuid
 import os
 
@@ -24,19 +26,30 @@ def calculate_distance(point1, point2):
     except:
         return None
 
+def bounding_degrees(point, km):
+    """
+    Distance in degrees covering ``km`` around ``point`` in every direction,
+    for index-assisted ``dwithin`` pre-filters on SRID 4326 fields. Degrees of
+    longitude shrink away from the equator, so this is never too small.
+    """
+    return km / (111.32 * max(math.cos(math.radians(point.y)), 0.01))
+
 def geocode_address(address):
     """
-    Geocode an address to get coordinates
-    This is a placeholder - implement with your preferred geocoding service
-    """
-    # Example with Google Geocoding API
-    # import googlemaps
-    # gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-    # geocode_result = gmaps.geocode(address)
-    # if geocode_result:
-    #     location = geocode_result[0]['geometry']['location']
-    #     return Point(location['lng'], location['lat'])
-    return None
+    Geocode an address to the centroid of the best matching gazetteer place
+    (see utils/geocoding.py), or None
+    """
+    from utils.geocoding import GeocodingService
+    found = GeocodingService.forward(address)
+    if found is None:
+        return None
+    return Point(found['longitude'], found['latitude'], srid=4326)
+
+def normalize_search_text(value):
+    """Lower-case, accent-free, single-spaced form used for name lookups"""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.lower().replace('-', ' ').split())
 
 def format_currency(amount, currency='ZAR'):
     """
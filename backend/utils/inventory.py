@@ -0,0 +1,191 @@
+"""
+Append-only stock and price history.
+
+Every write path (stock updates, checkout reservations, cancellations and
+product edits) describes its changes as InventoryLedgerEntry rows and adds
+them with a single bulk insert inside its own transaction. Checkout
+reservations and cancellation releases adjust stock for all the order's
+products with one UPDATE ... RETURNING, so the ledger records the stock each
+row actually left behind.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, connections, router
+from django.db.models import Sum
+from django.utils import timezone
+
+RESERVE_SQL = """
+    UPDATE products_product AS product
+    SET stock_quantity = product.stock_quantity - wanted.quantity
+    FROM unnest(%s::bigint[], %s::integer[]) AS wanted(id, quantity)
+    WHERE product.id = wanted.id
+      AND product.track_inventory
+      AND product.stock_quantity >= wanted.quantity
+    RETURNING product.id, product.stock_quantity
+"""
+
+RELEASE_SQL = """
+    UPDATE products_product AS product
+    SET stock_quantity = product.stock_quantity + released.quantity
+    FROM unnest(%s::bigint[], %s::integer[]) AS released(id, quantity)
+    WHERE product.id = released.id
+    RETURNING product.id, product.stock_quantity
+"""
+
+# One row per time bucket: the last stock level, its range and net change,
+# and the last price set in the bucket (NULL when it did not change)
+HISTORY_SQL = """
+    SELECT width_bucket(extract(epoch FROM created_at), %s, %s, %s) AS bucket,
+           (array_agg(stock_after ORDER BY created_at DESC, id DESC))[1],
+           min(stock_after),
+           max(stock_after),
+           sum(stock_delta),
+           (array_agg(price ORDER BY created_at DESC, id DESC) FILTER (WHERE price IS NOT NULL))[1]
+    FROM products_inventoryledgerentry
+    WHERE product_id = %s AND created_at >= %s AND created_at < %s
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+
+class InventoryLedgerService:
+    """Write and read the inventory/price ledger"""
+
+    @staticmethod
+    def append(entries):
+        """Insert ``entries`` (unsaved InventoryLedgerEntry rows) in one query"""
+        from apps.products.models import InventoryLedgerEntry
+
+        if not entries:
+            return []
+        now = timezone.now()
+        for entry in entries:
+            entry.created_at = now
+        return InventoryLedgerEntry.objects.bulk_create(entries)
+
+    @staticmethod
+    def record(product, reason, stock_delta=0, price_changed=False):
+        """Append one entry describing ``product`` as just saved"""
+        from apps.products.models import InventoryLedgerEntry
+
+        return InventoryLedgerService.append([InventoryLedgerEntry(
+            product_id=product.pk,
+            reason=reason,
+            stock_delta=stock_delta,
+            stock_after=product.stock_quantity,
+            price=product.price if price_changed else None,
+        )])
+
+    @staticmethod
+    def reserve(order, items):
+        """
+        Take stock for ``order``; ``items`` are ``(product, quantity)`` pairs.
+        Products that do not track inventory are skipped. Raises ValueError
+        naming the products without enough stock, in which case the caller's
+        transaction must be rolled back.
+        """
+        from apps.products.models import InventoryLedgerEntry
+
+        wanted = defaultdict(int)
+        names = {}
+        for product, quantity in items:
+            if product.track_inventory:
+                wanted[product.pk] += quantity
+                names[product.pk] = product.name
+        if not wanted:
+            return []
+
+        product_ids = list(wanted)
+        with connection.cursor() as cursor:
+            cursor.execute(RESERVE_SQL, [product_ids, [wanted[pk] for pk in product_ids]])
+            reserved = dict(cursor.fetchall())
+
+        short = [names[pk] for pk in product_ids if pk not in reserved]
+        if short:
+            raise ValueError(f"Not enough stock for: {', '.join(short)}")
+
+        return InventoryLedgerService.append([
+            InventoryLedgerEntry(
+                product_id=pk,
+                reason=InventoryLedgerEntry.RESERVED,
+                stock_delta=-wanted[pk],
+                stock_after=stock_after,
+                order_id=order.pk,
+            )
+            for pk, stock_after in reserved.items()
+        ])
+
+    @staticmethod
+    def release(order):
+        """
+        Return the stock still reserved by ``order``. The ledger is the
+        record of what was reserved, so releasing twice (or releasing an
+        order placed before reservations existed) changes nothing.
+        """
+        from apps.orders.models import Order
+        from apps.products.models import InventoryLedgerEntry
+
+        # Serialize concurrent cancellations of the same order
+        list(Order.objects.select_for_update().filter(pk=order.pk).values_list('pk', flat=True))
+
+        outstanding = dict(
+            InventoryLedgerEntry.objects.filter(order_id=order.pk)
+            .values('product_id')
+            .annotate(net=Sum('stock_delta'))
+            .filter(net__lt=0)
+            .values_list('product_id', 'net')
+        )
+        if not outstanding:
+            return []
+
+        product_ids = list(outstanding)
+        with connection.cursor() as cursor:
+            cursor.execute(RELEASE_SQL, [product_ids, [-outstanding[pk] for pk in product_ids]])
+            released = cursor.fetchall()
+
+        return InventoryLedgerService.append([
+            InventoryLedgerEntry(
+                product_id=pk,
+                reason=InventoryLedgerEntry.RELEASED,
+                stock_delta=-outstanding[pk],
+                stock_after=stock_after,
+                order_id=order.pk,
+            )
+            for pk, stock_after in released
+        ])
+
+    @staticmethod
+    def history(product_id, days=30, points=60):
+        """
+        Stock and price history of a product over the last ``days``,
+        downsampled to at most ``points`` equal time buckets for charts.
+        Returns ``(stock_history, price_history)``; buckets without changes
+        are left out.
+        """
+        from apps.products.models import InventoryLedgerEntry
+
+        end = timezone.now()
+        start = end - timedelta(days=days)
+        width = (end - start) / points
+
+        alias = router.db_for_read(InventoryLedgerEntry)
+        with connections[alias].cursor() as cursor:
+            cursor.execute(HISTORY_SQL, [
+                start.timestamp(), end.timestamp(), points, product_id, start, end
+            ])
+            rows = cursor.fetchall()
+
+        stock_history, price_history = [], []
+        for bucket, stock, min_stock, max_stock, change, price in rows:
+            bucket_start = start + width * (bucket - 1)
+            stock_history.append({
+                'time': bucket_start,
+                'stock': stock,
+                'min_stock': min_stock,
+                'max_stock': max_stock,
+                'change': change,
+            })
+            if price is not None:
+                price_history.append({'time': bucket_start, 'price': price})
+        return stock_history, price_history
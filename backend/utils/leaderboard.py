@@ -0,0 +1,275 @@
+"""
+Popular-product leaderboards (overall, per business, per category and per
+city) kept up to date as orders complete.
+
+Each board is a sorted set of product ids. Scores decay with a half-life of
+LEADERBOARD_HALF_LIFE_DAYS without ever being rewritten: a sale adds
+``quantity * 2 ** (half-lives between LEADERBOARD_EPOCH and the sale)``, so
+recent sales outweigh old ones by exactly the decay factor and the order of
+a board is always the decayed order. Reading the top N is a ZREVRANGE,
+O(log n + N) however many orders there have been. Boards are trimmed to
+LEADERBOARD_MAX_MEMBERS and can be rebuilt from OrderItem history with the
+``rebuild_leaderboards`` command. The store is pluggable via
+``settings.LEADERBOARD_BACKEND``; when it is not shared between processes,
+readers fall back to ``top_from_orders``.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.text import slugify
+
+from utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('all', 'business', 'category', 'city')
+
+# Decayed quantities sold per product for every board it belongs to, from
+# orders completed since a cutoff. Completion time is the 'completed' status
+# history entry
+REBUILD_SQL = """
+    SELECT item.product_id, orders.business_id, product.category_id, business.city,
+           SUM(item.quantity * power(2::float8, (extract(epoch FROM done.completed_at)::float8 - %s) / %s))
+    FROM orders_orderitem AS item
+    JOIN orders_order AS orders ON orders.id = item.order_id
+    JOIN products_product AS product ON product.id = item.product_id
+    JOIN businesses_business AS business ON business.id = orders.business_id
+    JOIN (
+        SELECT order_id, MAX(created_at) AS completed_at
+        FROM orders_orderstatushistory
+        WHERE status = 'completed' AND created_at >= %s
+        GROUP BY order_id
+    ) AS done ON done.order_id = orders.id
+    WHERE orders.status = 'completed'
+    GROUP BY item.product_id, orders.business_id, product.category_id, business.city
+"""
+
+
+def board_name(scope, value=None):
+    """``all``, ``business:<id>``, ``category:<id>`` or ``city:<slug of the city>``"""
+    if scope == 'all':
+        return 'all'
+    if scope == 'city':
+        value = slugify(value)
+    return f"{scope}:{value}"
+
+
+class BaseLeaderboardStore:
+    """
+    Store interface. ``increment`` and ``replace`` take
+    ``{board: {product_id: score}}``; ``top`` returns ``[(product_id, score)]``
+    best first. ``shared`` stores are seen by every worker process.
+    """
+    shared = True
+
+    def increment(self, boards):
+        raise NotImplementedError
+
+    def replace(self, boards):
+        raise NotImplementedError
+
+    def top(self, board, limit):
+        raise NotImplementedError
+
+
+class InMemoryLeaderboardStore(BaseLeaderboardStore):
+    """Per-process store for development and tests"""
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = defaultdict(dict)
+
+    def increment(self, boards):
+        with self._lock:
+            for board, scores in boards.items():
+                members = self._boards[board]
+                for product_id, score in scores.items():
+                    members[product_id] = members.get(product_id, 0) + score
+                if len(members) > settings.LEADERBOARD_MAX_MEMBERS:
+                    kept = sorted(members.items(), key=lambda member: -member[1])
+                    self._boards[board] = dict(kept[:settings.LEADERBOARD_MAX_MEMBERS])
+
+    def replace(self, boards):
+        with self._lock:
+            self._boards = defaultdict(dict)
+        self.increment(boards)
+
+    def top(self, board, limit):
+        with self._lock:
+            members = list(self._boards.get(board, {}).items())
+        members.sort(key=lambda member: (-member[1], member[0]))
+        return members[:limit]
+
+
+class RedisLeaderboardStore(BaseLeaderboardStore):
+    """Shared store: one ``leaderboard:<board>`` sorted set per board"""
+    prefix = 'leaderboard:'
+
+    def _key(self, board):
+        return f"{self.prefix}{board}"
+
+    def increment(self, boards):
+        pipeline = get_redis_client().pipeline(transaction=False)
+        for board, scores in boards.items():
+            key = self._key(board)
+            for product_id, score in scores.items():
+                pipeline.zincrby(key, score, product_id)
+            # Keep the best LEADERBOARD_MAX_MEMBERS
+            pipeline.zremrangebyrank(key, 0, -settings.LEADERBOARD_MAX_MEMBERS - 1)
+        pipeline.execute()
+
+    def replace(self, boards):
+        client = get_redis_client()
+        stale = {key.decode() for key in client.scan_iter(match=f"{self.prefix}*", count=1000)}
+        for board, scores in boards.items():
+            key = self._key(board)
+            stale.discard(key)
+            best = sorted(scores.items(), key=lambda member: -member[1])[:settings.LEADERBOARD_MAX_MEMBERS]
+            # Build aside and swap in, so readers never see a half-built board
+            pipeline = client.pipeline(transaction=False)
+            pipeline.delete(f"{key}:rebuild")
+            pipeline.zadd(f"{key}:rebuild", dict(best))
+            pipeline.rename(f"{key}:rebuild", key)
+            pipeline.execute()
+        if stale:
+            client.delete(*stale)
+
+    def top(self, board, limit):
+        members = get_redis_client().zrevrange(self._key(board), 0, limit - 1, withscores=True)
+        return [(int(product_id), score) for product_id, score in members]
+
+
+_store = None
+
+
+def get_store():
+    """Return the process-wide leaderboard store configured in settings"""
+    global _store
+    if _store is None:
+        _store = import_string(settings.LEADERBOARD_BACKEND)()
+    return _store
+
+
+class LeaderboardService:
+    """Feed completed orders into the leaderboards and read them back"""
+
+    @staticmethod
+    def _epoch():
+        return datetime.fromisoformat(settings.LEADERBOARD_EPOCH).replace(tzinfo=dt_timezone.utc)
+
+    @staticmethod
+    def _half_life_seconds():
+        return settings.LEADERBOARD_HALF_LIFE_DAYS * 24 * 60 * 60
+
+    @staticmethod
+    def weight(when):
+        """Score one unit sold at ``when`` adds"""
+        age = (when - LeaderboardService._epoch()).total_seconds()
+        return 2 ** (age / LeaderboardService._half_life_seconds())
+
+    @staticmethod
+    def _boards_for(rows):
+        """``{board: {product_id: score}}`` from ``(product, business, category, city, score)`` rows"""
+        boards = defaultdict(lambda: defaultdict(float))
+        for product_id, business_id, category_id, city, score in rows:
+            boards[board_name('all')][product_id] += score
+            boards[board_name('business', business_id)][product_id] += score
+            if category_id:
+                boards[board_name('category', category_id)][product_id] += score
+            if city:
+                boards[board_name('city', city)][product_id] += score
+        return boards
+
+    @staticmethod
+    def record_order(order_id):
+        """Add a just-completed order's items to every board they belong to"""
+        from apps.orders.models import OrderItem
+
+        weight = LeaderboardService.weight(timezone.now())
+        rows = [
+            (product_id, business_id, category_id, city, quantity * weight)
+            for product_id, quantity, business_id, category_id, city in OrderItem.objects.filter(
+                order_id=order_id
+            ).values_list(
+                'product_id', 'quantity', 'order__business_id', 'product__category_id', 'order__business__city'
+            )
+        ]
+        if rows:
+            get_store().increment(LeaderboardService._boards_for(rows))
+
+    @staticmethod
+    def record_order_on_commit(order_id):
+        """Record the order once its completion is committed; failures are only logged"""
+        def record():
+            try:
+                LeaderboardService.record_order(order_id)
+            except Exception as e:
+                logger.error(f"Failed to add order {order_id} to the leaderboards: {e}")
+
+        transaction.on_commit(record)
+
+    @staticmethod
+    def rebuild(days=None):
+        """
+        Replace every board with scores computed from orders completed in the
+        last ``days`` (default LEADERBOARD_REBUILD_DAYS). Orders completing
+        while this runs may be missed. Returns the number of boards written.
+        """
+        days = days or settings.LEADERBOARD_REBUILD_DAYS
+        since = timezone.now() - timedelta(days=days)
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_SQL, [
+                LeaderboardService._epoch().timestamp(), LeaderboardService._half_life_seconds(), since
+            ])
+            rows = cursor.fetchall()
+
+        boards = LeaderboardService._boards_for(rows)
+        get_store().replace(boards)
+        return len(boards)
+
+    @staticmethod
+    def is_shared():
+        """False when each process keeps its own (partial) boards"""
+        return get_store().shared
+
+    @staticmethod
+    def top(scope, value=None, limit=10):
+        """
+        ``[(product_id, popularity)]`` best first, where popularity is the
+        decayed quantity sold as of now
+        """
+        decay = LeaderboardService.weight(timezone.now())
+        return [
+            (product_id, score / decay)
+            for product_id, score in get_store().top(board_name(scope, value), limit)
+        ]
+
+    @staticmethod
+    def top_from_orders(scope, value=None, limit=10):
+        """
+        ``[(product_id, quantity sold)]`` best first from orders completed in
+        the last LEADERBOARD_REBUILD_DAYS (undecayed), for when the store is
+        not shared or the board is still empty
+        """
+        from apps.orders.models import OrderItem
+
+        since = timezone.now() - timedelta(days=settings.LEADERBOARD_REBUILD_DAYS)
+        items = OrderItem.objects.filter(order__status='completed', order__created_at__gte=since)
+        if scope == 'business':
+            items = items.filter(order__business_id=value)
+        elif scope == 'category':
+            items = items.filter(product__category_id=value)
+        elif scope == 'city':
+            items = items.filter(order__business__city__iexact=value)
+        return list(
+            items.values('product_id').annotate(total=Sum('quantity'))
+            .order_by('-total', 'product_id').values_list('product_id', 'total')[:limit]
+        )
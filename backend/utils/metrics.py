@@ -0,0 +1,291 @@
+"""
+Per-request performance metrics.
+
+RequestMetricsMiddleware (utils/middleware.py) opens a RequestMetrics for each
+request in a context variable, which worker threads started with
+sync_to_async inherit. Database queries (through a QueryCounter installed on
+every connection as it opens), cache lookups (through the instrumented cache
+backends in utils/cache_backends.py) and response rendering (through
+TimedJSONRenderer) are recorded against it. The totals are then folded into
+per-endpoint histograms, which the health/metrics/ endpoint exposes.
+
+Histograms are kept per process and, when Redis is configured, periodically
+added to Redis hashes so that the exported numbers cover every worker.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+REDIS_KEY_PREFIX = 'metrics:endpoint:'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for a single request"""
+
+    __slots__ = (
+        'endpoint', 'queries', 'db_time', 'cache_hits', 'cache_misses',
+        'render_time', 'started_at', '_lock'
+    )
+
+    def __init__(self):
+        self.endpoint = 'unresolved'
+        # gather_queries runs a request's queries on several threads at once
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_time = 0.0
+        self.started_at = time.perf_counter()
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started_at
+
+
+def current_metrics():
+    """RequestMetrics of the request being handled, or None outside a request"""
+    return _current.get()
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request_metrics(token):
+    _current.reset(token)
+
+
+def record_query(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        with metrics._lock:
+            metrics.queries += 1
+            metrics.db_time += duration
+
+
+def record_cache_lookup(hits, misses):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` callable that times every query"""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            record_query(time.perf_counter() - started)
+
+
+_query_counter = QueryCounter()
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver: count every query on every connection,
+    whichever thread it belongs to (async views query from worker threads)
+    """
+    if _query_counter not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_counter)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records how long rendering the response took"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.render_time += time.perf_counter() - started
+
+
+def _bucket(bounds, value):
+    index = bisect.bisect_left(bounds, value)
+    return str(bounds[index]) if index < len(bounds) else '+Inf'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe per-endpoint aggregates for the current process.
+
+    Each endpoint maps to a flat Counter, e.g. ``requests``,
+    ``duration_sum``, ``duration_bucket:0.05`` or ``status:2xx``. Bucket
+    counts are stored non-cumulatively and summed up when exported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = defaultdict(Counter)
+        self._pending = defaultdict(Counter)
+        self._last_flush = time.monotonic()
+
+    def observe(self, metrics, status_code, budget_exceeded=False):
+        duration = metrics.duration
+        values = {
+            'requests': 1,
+            'duration_sum': duration,
+            f"duration_bucket:{_bucket(LATENCY_BUCKETS, duration)}": 1,
+            'queries_sum': metrics.queries,
+            f"queries_bucket:{_bucket(QUERY_BUCKETS, metrics.queries)}": 1,
+            'db_time_sum': metrics.db_time,
+            'render_time_sum': metrics.render_time,
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            f"status:{status_code // 100}xx": 1,
+        }
+        if budget_exceeded:
+            values['budget_exceeded'] = 1
+
+        with self._lock:
+            self._totals[metrics.endpoint].update(values)
+            self._pending[metrics.endpoint].update(values)
+
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if not getattr(settings, 'REDIS_URL', ''):
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+        if time.monotonic() - self._last_flush < interval:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        from utils.redis_client import get_redis_client
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            for endpoint, values in pending.items():
+                key = REDIS_KEY_PREFIX + endpoint
+                for field, value in values.items():
+                    pipe.hincrbyfloat(key, field, value)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to flush request metrics: {e}")
+
+    def snapshot(self):
+        """Aggregates for every worker when Redis is configured, else this process"""
+        if getattr(settings, 'REDIS_URL', ''):
+            from utils.redis_client import get_redis_client
+            try:
+                client = get_redis_client()
+                result = {}
+                for key in client.scan_iter(match=REDIS_KEY_PREFIX + '*', count=500):
+                    endpoint = key.decode()[len(REDIS_KEY_PREFIX):]
+                    result[endpoint] = Counter({
+                        field.decode(): float(value)
+                        for field, value in client.hgetall(key).items()
+                    })
+                return result
+            except Exception as e:
+                logger.warning(f"Failed to read shared request metrics: {e}")
+
+        with self._lock:
+            return {endpoint: Counter(values) for endpoint, values in self._totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._pending.clear()
+
+
+registry = MetricsRegistry()
+
+
+def summarize(snapshot):
+    """Per-endpoint averages, suitable for a JSON response"""
+    summary = {}
+    for endpoint, values in sorted(snapshot.items()):
+        requests = values.get('requests', 0) or 1
+        summary[endpoint] = {
+            'requests': int(values.get('requests', 0)),
+            'avg_duration_ms': round(values.get('duration_sum', 0) * 1000 / requests, 2),
+            'avg_queries': round(values.get('queries_sum', 0) / requests, 2),
+            'avg_db_time_ms': round(values.get('db_time_sum', 0) * 1000 / requests, 2),
+            'avg_render_time_ms': round(values.get('render_time_sum', 0) * 1000 / requests, 2),
+            'cache_hits': int(values.get('cache_hits', 0)),
+            'cache_misses': int(values.get('cache_misses', 0)),
+            'budget_exceeded': int(values.get('budget_exceeded', 0)),
+        }
+    return summary
+
+
+def _histogram_lines(name, endpoint, values, prefix, bounds):
+    lines = []
+    cumulative = 0
+    for bound in bounds:
+        cumulative += values.get(f"{prefix}_bucket:{bound}", 0)
+        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {int(cumulative)}')
+    lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {int(values.get("requests", 0))}')
+    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {values.get(f"{prefix}_sum", 0)}')
+    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {int(values.get("requests", 0))}')
+    return lines
+
+
+def render_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = [
+        '# HELP http_request_duration_seconds Request latency per endpoint',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for endpoint, values in sorted(snapshot.items()):
+        lines += _histogram_lines(
+            'http_request_duration_seconds', endpoint, values, 'duration', LATENCY_BUCKETS
+        )
+
+    lines += [
+        '# HELP db_queries_per_request SQL queries issued per request',
+        '# TYPE db_queries_per_request histogram',
+    ]
+    for endpoint, values in sorted(snapshot.items()):
+        lines += _histogram_lines(
+            'db_queries_per_request', endpoint, values, 'queries', QUERY_BUCKETS
+        )
+
+    counters = (
+        ('db_query_seconds_total', 'db_time_sum', 'Time spent in SQL queries'),
+        ('response_render_seconds_total', 'render_time_sum', 'Time spent rendering responses'),
+        ('cache_hits_total', 'cache_hits', 'Cache lookups that found a value'),
+        ('cache_misses_total', 'cache_misses', 'Cache lookups that found nothing'),
+        ('query_budget_exceeded_total', 'budget_exceeded', 'Requests over their query budget'),
+    )
+    for name, field, help_text in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for endpoint, values in sorted(snapshot.items()):
+            lines.append(f'{name}{{endpoint="{endpoint}"}} {values.get(field, 0)}')
+
+    lines += ['# HELP http_responses_total Responses per status class', '# TYPE http_responses_total counter']
+    for endpoint, values in sorted(snapshot.items()):
+        for field, value in sorted(values.items()):
+            if field.startswith('status:'):
+                lines.append(
+                    f'http_responses_total{{endpoint="{endpoint}",status="{field[7:]}"}} {int(value)}'
+                )
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,183 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from utils.db_router import end_routing, pin_to_primary, replica_configured, start_routing
+from utils.metrics import (
+    end_request_metrics, install_query_counter, registry, start_request_metrics
+)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when QUERY_BUDGET_ENFORCE is on and a view issues too many queries"""
+
+
+def view_name(view_func, method):
+    """
+    Stable endpoint tag for a resolved view, e.g. ``ProductViewSet.list`` or
+    ``BusinessOrderAnalyticsView.get``.
+    """
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        action = actions.get(method, method)
+    else:
+        action = method
+    return f"{cls.__name__}.{action}"
+
+
+def query_budget(endpoint):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(endpoint, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+class RequestMetricsMiddleware:
+    """
+    Counts SQL queries, database time, cache hits/misses and render time for
+    every request, tags them with the DRF view and action, and records them
+    in the process metrics registry (exported at health/metrics/). Queries
+    are counted on every connection, including the worker threads' ones
+    that async views query through.
+
+    Requests over their entry in settings.QUERY_BUDGETS are logged, and
+    raise QueryBudgetExceeded when QUERY_BUDGET_ENFORCE is set (tests).
+
+    Runs natively under both WSGI and ASGI, so it adds no thread hop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_counter, dispatch_uid='request_metrics')
+        # Connections this thread opened before the middleware was loaded
+        for alias in connections:
+            if connections[alias].connection is not None:
+                install_query_counter(None, connections[alias])
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token = start_request_metrics()
+        request._metrics = metrics
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request_metrics(token)
+        return self.finish(request, metrics, response)
+
+    async def __acall__(self, request):
+        metrics, token = start_request_metrics()
+        request._metrics = metrics
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request_metrics(token)
+        return self.finish(request, metrics, response)
+
+    def finish(self, request, metrics, response):
+        budget = query_budget(metrics.endpoint)
+        budget_exceeded = budget is not None and metrics.queries > budget
+        registry.observe(metrics, response.status_code, budget_exceeded)
+
+        if getattr(settings, 'METRICS_RESPONSE_HEADERS', False):
+            response['X-Query-Count'] = str(metrics.queries)
+            response['Server-Timing'] = (
+                f"db;dur={metrics.db_time * 1000:.1f}, "
+                f"render;dur={metrics.render_time * 1000:.1f}, "
+                f"total;dur={metrics.duration * 1000:.1f}"
+            )
+
+        if budget_exceeded:
+            message = (
+                f"{metrics.endpoint} issued {metrics.queries} queries "
+                f"(budget {budget}) for {request.method} {request.path}"
+            )
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None:
+            metrics.endpoint = view_name(view_func, request.method.lower())
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets ReplicaRouter send the reads of safe requests to the replica when
+    the view lists the action in ``replica_actions`` (``get`` for APIViews)
+    or is a function view marked ``replica_reads``, and pins clients to the primary for a few seconds after they write.
+    Does nothing unless a ``replica`` database is configured.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = replica_configured()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        state, token = start_routing(request)
+        request._routing = state
+        try:
+            response = self.get_response(request)
+        finally:
+            end_routing(token)
+        return self.finish(request, state, response)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        state, token = start_routing(request)
+        request._routing = state
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_routing(token)
+        return self.finish(request, state, response)
+
+    def finish(self, request, state, response):
+        if state.wrote and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = getattr(request, '_routing', None)
+        if state is None or request.method not in self.SAFE_METHODS:
+            return None
+        cls = getattr(view_func, 'cls', None)
+        if cls is None:
+            # Plain function views opt in with ``view.replica_reads = True``
+            state.use_replica = getattr(view_func, 'replica_reads', False)
+            return None
+        replica_actions = getattr(cls, 'replica_actions', ())
+        if replica_actions:
+            action = view_name(view_func, request.method.lower()).rsplit('.', 1)[-1]
+            state.use_replica = action in replica_actions
+        return None
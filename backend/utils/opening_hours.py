@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+
+class OpeningHoursService:
+    """
+    "Open now" and "opens within N minutes" filters evaluated in SQL.
+
+    The current weekday and time are taken in the project time zone
+    (Africa/Johannesburg) and compared with BusinessHours periods; businesses
+    without periods use their daily Business.opens_at / closes_at. A period
+    whose closing time is not after its opening time runs past midnight.
+    """
+
+    # opens_within looks at most this far ahead
+    MAX_LOOKAHEAD_MINUTES = 12 * 60
+
+    @staticmethod
+    def _open_at(at, weekday=None, prefix=''):
+        """Periods open at time ``at`` (on ``weekday``, when given)"""
+        opens_at, closes_at = f'{prefix}opens_at', f'{prefix}closes_at'
+        overnight = Q(**{f'{closes_at}__lte': F(opens_at)})
+        started = Q(**{f'{opens_at}__lte': at}) & (Q(**{f'{closes_at}__gt': at}) | overnight)
+        # Overnight periods from the previous day that have not closed yet
+        carried_over = overnight & Q(**{f'{closes_at}__gt': at})
+        if weekday is None:
+            return started | carried_over
+        return (Q(weekday=weekday) & started) | (Q(weekday=(weekday - 1) % 7) & carried_over)
+
+    @staticmethod
+    def _opening_between(start, end, weekday=None, prefix=''):
+        """Periods opening after ``start`` and no later than ``end`` (datetimes)"""
+        opens_at = f'{prefix}opens_at'
+        if end.date() == start.date():
+            same_day = Q(**{f'{opens_at}__gt': start.time(), f'{opens_at}__lte': end.time()})
+            return same_day if weekday is None else Q(weekday=weekday) & same_day
+        today = Q(**{f'{opens_at}__gt': start.time()})
+        tomorrow = Q(**{f'{opens_at}__lte': end.time()})
+        if weekday is None:
+            return today | tomorrow
+        return (Q(weekday=weekday) & today) | (Q(weekday=(weekday + 1) % 7) & tomorrow)
+
+    @staticmethod
+    def _business_filter(schedule_q, daily_q):
+        from apps.businesses.models import BusinessHours
+
+        has_schedule = Exists(BusinessHours.objects.filter(business_id=OuterRef('pk')))
+        scheduled = Q(id__in=BusinessHours.objects.filter(schedule_q).values('business_id'))
+        return scheduled | (~has_schedule & daily_q)
+
+    @staticmethod
+    def open_now_q(now=None):
+        """Q for Business querysets: open at ``now`` (default: the current local time)"""
+        now = timezone.localtime(now)
+        at = now.time()
+        return OpeningHoursService._business_filter(
+            OpeningHoursService._open_at(at, weekday=now.weekday()),
+            OpeningHoursService._open_at(at)
+        )
+
+    @staticmethod
+    def opens_within_q(minutes, now=None):
+        """Q for Business querysets: closed at ``now`` but opening within ``minutes``"""
+        now = timezone.localtime(now)
+        end = now + timedelta(minutes=min(minutes, OpeningHoursService.MAX_LOOKAHEAD_MINUTES))
+        opening = OpeningHoursService._business_filter(
+            OpeningHoursService._opening_between(now, end, weekday=now.weekday()),
+            OpeningHoursService._opening_between(now, end)
+        )
+        return opening & ~OpeningHoursService.open_now_q(now)
+
+    @staticmethod
+    def filter_queryset(queryset, params):
+        """
+        Apply the ``open_now`` and ``opens_within`` (minutes) query parameters.
+        Raises ValueError for a malformed ``opens_within``.
+        """
+        if params.get('open_now', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(OpeningHoursService.open_now_q())
+        opens_within = params.get('opens_within')
+        if opens_within:
+            minutes = int(opens_within)
+            if minutes <= 0:
+                raise ValueError("opens_within must be a positive number of minutes")
+            queryset = queryset.filter(OpeningHoursService.opens_within_q(minutes))
+        return queryset
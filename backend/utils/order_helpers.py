@@ -8,24 +8,17 @@ class OrderCalculationService:
     """
     
     @staticmethod
-    def calculate_delivery_fee(business_location, delivery_location, base_fee=Decimal('5.00')):
+    def calculate_delivery_fee(business, delivery_location):
         """
-        Calculate delivery fee based on distance
+        Delivery fee from the business's delivery zones, or None when it
+        does not deliver to ``delivery_location``
         """
-        if not business_location or not delivery_location:
-            return base_fee
+        from utils.delivery import DeliveryZoneService
         
-        # Calculate distance in kilometers
-        distance_km = business_location.distance(delivery_location) * 111
-        
-        if distance_km <= 5:
-            return base_fee
-        elif distance_km <= 10:
-            return base_fee + Decimal('2.00')
-        elif distance_km <= 20:
-            return base_fee + Decimal('5.00')
-        else:
-            return base_fee + Decimal('10.00')
+        quote = DeliveryZoneService.quote([business.id], delivery_location).get(business.id)
+        if not quote or not quote['delivers']:
+            return None
+        return quote['fee']
     
     @staticmethod
     def calculate_service_fee(subtotal, rate=Decimal('0.05')):
@@ -59,28 +52,185 @@ class CartService:
     Service class for cart-related operations
     """
     
+    # Upsert used by both merge paths. New rows take the product's current
+    # price; rows already in the target cart keep theirs and add quantities.
+    # Notes from the incoming item win unless they are blank.
+    MERGE_CONFLICT_SQL = """
+        ON CONFLICT (cart_id, product_id) DO UPDATE SET
+            quantity = {cart_item}.quantity + EXCLUDED.quantity,
+            notes = CASE WHEN EXCLUDED.notes <> '' THEN EXCLUDED.notes
+                         ELSE {cart_item}.notes END,
+            updated_at = EXCLUDED.updated_at
+    """
+    
+    @staticmethod
+    def _merge_sql(select_sql):
+        from apps.orders.models import CartItem
+        cart_item = CartItem._meta.db_table
+        return (
+            f"INSERT INTO {cart_item} "
+            f"(cart_id, product_id, quantity, unit_price, notes, created_at, updated_at) "
+            f"{select_sql} "
+            + CartService.MERGE_CONFLICT_SQL.format(cart_item=cart_item)
+        )
+    
     @staticmethod
     def merge_carts(source_cart, target_cart):
         """
         Merge items from source cart into target cart
         Used when user logs in and has items in both session and user cart
         """
-        for source_item in source_cart.items.all():
-            target_item, created = target_cart.items.get_or_create(
-                product=source_item.product,
-                defaults={
-                    'quantity': source_item.quantity,
-                    'notes': source_item.notes
-                }
+        from django.db import connection, transaction
+        from apps.orders.models import CartItem
+        
+        select_sql = (
+            f"SELECT %s, product_id, quantity, unit_price, notes, now(), now() "
+            f"FROM {CartItem._meta.db_table} WHERE cart_id = %s"
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CartService._merge_sql(select_sql), [target_cart.pk, source_cart.pk])
+            merged = cursor.rowcount
+            
+            # Clear source cart
+            source_cart.items.all().delete()
+        return merged
+    
+    @staticmethod
+    def merge_guest_items(cart, items):
+        """
+        Merge guest cart items ({product_id: {'quantity', 'notes'}}) into a
+        user's cart with a single INSERT ... ON CONFLICT statement.
+        Products that no longer exist or are inactive are skipped.
+        Returns the number of cart rows inserted or updated.
+        """
+        from django.db import connection
+        from apps.products.models import Product
+        
+        if not items:
+            return 0
+        
+        product_ids = [int(product_id) for product_id in items]
+        quantities = [items[product_id]['quantity'] for product_id in items]
+        notes = [items[product_id].get('notes', '') for product_id in items]
+        
+        select_sql = (
+            f"SELECT %s, p.id, g.quantity, p.price, g.notes, now(), now() "
+            f"FROM unnest(%s::bigint[], %s::integer[], %s::text[]) "
+            f"AS g(product_id, quantity, notes) "
+            f"JOIN {Product._meta.db_table} p "
+            f"ON p.id = g.product_id AND p.status = 'active'"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                CartService._merge_sql(select_sql),
+                [cart.pk, product_ids, quantities, notes]
             )
+            return cursor.rowcount
+    
+    @staticmethod
+    def apply_batch(cart, operations):
+        """
+        Apply a list of add/set/remove operations to a cart atomically.
+        
+        Operations are folded per product in request order, so the database
+        work is a fixed number of statements regardless of batch size: one
+        product fetch, one read of the affected cart items, one upsert and one
+        delete. Returns tuple (results, errors); on errors nothing is written.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+        from apps.orders.models import Cart, CartItem
+        from apps.products.models import Product
+        
+        product_ids = {operation['product_id'] for operation in operations}
+        
+        with transaction.atomic():
+            # Serialise concurrent batches against the same cart so that
+            # 'add' increments are not lost between the read and the upsert
+            Cart.objects.select_for_update().filter(pk=cart.pk).values_list('pk').get()
+            
+            products = Product.objects.only(
+                'id', 'name', 'price', 'status', 'track_inventory', 'stock_quantity'
+            ).in_bulk(product_ids)
+            existing = {
+                item.product_id: item
+                for item in CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+            }
+            
+            # Final (quantity, notes) per product; quantity 0 means removed
+            state = {
+                product_id: (item.quantity, item.notes)
+                for product_id, item in existing.items()
+            }
+            errors = {}
+            
+            for index, operation in enumerate(operations):
+                product_id = operation['product_id']
+                product = products.get(product_id)
+                quantity, notes = state.get(product_id, (0, ''))
+                
+                if operation['op'] == 'remove':
+                    state[product_id] = (0, notes)
+                    continue
+                
+                if product is None or product.status != 'active':
+                    errors[index] = ["Product not found or inactive"]
+                    continue
+                
+                if operation['op'] == 'add':
+                    quantity += operation['quantity']
+                else:
+                    quantity = operation['quantity']
+                
+                if quantity > 0 and not product.is_in_stock:
+                    errors[index] = [f"{product.name} is out of stock"]
+                    continue
+                
+                state[product_id] = (quantity, operation.get('notes', notes))
             
-            if not created:
-                # If item already exists, add quantities
-                target_item.quantity += source_item.quantity
-                target_item.save()
+            if errors:
+                return [], errors
+            
+            upserts = []
+            removed_ids = []
+            results = []
+            for product_id, (quantity, notes) in state.items():
+                item = existing.get(product_id)
+                if quantity == 0:
+                    if item is not None:
+                        removed_ids.append(product_id)
+                    results.append({'product_id': product_id, 'quantity': 0, 'removed': True})
+                    continue
+                
+                # Existing rows keep the price they were added at
+                unit_price = item.unit_price if item and item.unit_price else products[product_id].price
+                upserts.append(CartItem(
+                    cart=cart,
+                    product_id=product_id,
+                    quantity=quantity,
+                    notes=notes,
+                    unit_price=unit_price
+                ))
+                results.append({
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'unit_price': str(unit_price),
+                    'removed': False
+                })
+            
+            if upserts:
+                CartItem.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=['cart', 'product'],
+                    update_fields=['quantity', 'notes', 'unit_price', 'updated_at']
+                )
+            if removed_ids:
+                CartItem.objects.filter(cart=cart, product_id__in=removed_ids).delete()
+            
+            Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
         
-        # Clear source cart
-        source_cart.items.all().delete()
+        return results, {}
     
     @staticmethod
     def validate_cart_for_checkout(cart, business_id):
@@ -113,3 +263,404 @@ class CartService:
                 )
         
         return len(errors) == 0, errors
+
+
+class CartRepricingService:
+    """
+    Service class for keeping cart item prices in line with product prices.
+    
+    CartItem.unit_price is captured when an item is added. When a product's
+    price changes, affected items are found with a single join and either
+    repriced in bulk or flagged for the user, depending on
+    settings.CART_PRICE_DRIFT_POLICY.
+    """
+    
+    POLICY_REPRICE = 'reprice'
+    POLICY_FLAG = 'flag'
+    
+    @staticmethod
+    def drifted_items(queryset=None):
+        """Cart items whose unit_price differs from the current product price"""
+        from django.db.models import F, Q
+        from apps.orders.models import CartItem
+        
+        if queryset is None:
+            queryset = CartItem.objects.all()
+        return queryset.annotate(current_price=F('product__price')).filter(
+            Q(unit_price__isnull=True) | ~Q(unit_price=F('product__price'))
+        )
+    
+    @staticmethod
+    def _current_price():
+        from django.db.models import OuterRef, Subquery
+        from apps.products.models import Product
+        return Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    
+    @staticmethod
+    def reprice(queryset=None, policy=None, chunk_size=None):
+        """
+        Reprice or flag drifted items in chunks of primary keys, so a popular
+        product does not lock every cart row in a single statement.
+        Returns the number of items updated.
+        """
+        from django.conf import settings
+        from django.db.models import F
+        from django.utils import timezone
+        from apps.orders.models import CartItem
+        
+        policy = policy or settings.CART_PRICE_DRIFT_POLICY
+        chunk_size = chunk_size or settings.CART_REPRICE_CHUNK_SIZE
+        
+        drifted = CartRepricingService.drifted_items(queryset)
+        if policy == CartRepricingService.POLICY_FLAG:
+            drifted = drifted.filter(price_changed_at__isnull=True)
+        
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(drifted.order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            
+            chunk = CartItem.objects.filter(id__in=ids)
+            if policy == CartRepricingService.POLICY_REPRICE:
+                total += chunk.update(
+                    previous_unit_price=F('unit_price'),
+                    unit_price=CartRepricingService._current_price(),
+                    price_changed_at=now,
+                    updated_at=now
+                )
+            else:
+                total += chunk.update(price_changed_at=now)
+            
+            if len(ids) < chunk_size:
+                break
+        return total
+    
+    @staticmethod
+    def reprice_products(product_ids):
+        """Handle a price change for the given products"""
+        from apps.orders.models import CartItem
+        return CartRepricingService.reprice(CartItem.objects.filter(product_id__in=product_ids))
+    
+    @staticmethod
+    def accept_prices(cart):
+        """
+        Move every item in the cart to the current product price and clear
+        drift flags, in one statement. Returns the number of items changed.
+        """
+        from django.db.models import F, Q
+        
+        return cart.items.filter(
+            Q(price_changed_at__isnull=False) |
+            Q(unit_price__isnull=True) |
+            ~Q(unit_price=F('product__price'))
+        ).update(
+            unit_price=CartRepricingService._current_price(),
+            previous_unit_price=None,
+            price_changed_at=None
+        )
+
+
+class GuestCartService:
+    """
+    Service class for carts of anonymous shoppers.
+    
+    Guest carts live in the cache under a random token. The token reaches the
+    client as a signed cookie (or, for clients without cookies, the same signed
+    value in the X-Guest-Cart header), so browsing with a basket needs no
+    account and no database writes. Items are merged into the user's cart on
+    login.
+    """
+    
+    HEADER_NAME = 'HTTP_X_GUEST_CART'
+    SALT = 'orders.guest_cart'
+    
+    @staticmethod
+    def _cache_key(token):
+        return f"guest_cart:{token}"
+    
+    @staticmethod
+    def sign_token(token):
+        from django.core import signing
+        return signing.TimestampSigner(salt=GuestCartService.SALT).sign(token)
+    
+    @staticmethod
+    def get_token(request):
+        """Return the verified guest cart token for the request, or None"""
+        from django.conf import settings
+        from django.core import signing
+        
+        signed = (
+            request.COOKIES.get(settings.GUEST_CART_COOKIE_NAME)
+            or request.META.get(GuestCartService.HEADER_NAME)
+        )
+        if not signed:
+            return None
+        try:
+            return signing.TimestampSigner(salt=GuestCartService.SALT).unsign(
+                signed, max_age=settings.GUEST_CART_TTL
+            )
+        except signing.BadSignature:
+            return None
+    
+    @staticmethod
+    def new_token():
+        import uuid
+        return uuid.uuid4().hex
+    
+    @staticmethod
+    def get_items(token):
+        """Return the guest cart as {product_id: {'quantity': int, 'notes': str}}"""
+        from django.core.cache import cache
+        if not token:
+            return {}
+        items = cache.get(GuestCartService._cache_key(token)) or {}
+        return {int(product_id): item for product_id, item in items.items()}
+    
+    @staticmethod
+    def save_items(token, items):
+        from django.conf import settings
+        from django.core.cache import cache
+        key = GuestCartService._cache_key(token)
+        if items:
+            cache.set(key, items, settings.GUEST_CART_TTL)
+        else:
+            cache.delete(key)
+    
+    @staticmethod
+    def apply_operations(items, operations):
+        """
+        Apply add/set/remove operations to guest cart items in place.
+        Products are validated with a single query. Returns a dict of errors
+        keyed by operation index; items are left untouched on errors.
+        """
+        from django.conf import settings
+        from apps.products.models import Product
+        
+        product_ids = {operation['product_id'] for operation in operations}
+        products = Product.objects.only(
+            'id', 'name', 'status', 'track_inventory', 'stock_quantity'
+        ).in_bulk(product_ids)
+        
+        updated = dict(items)
+        errors = {}
+        for index, operation in enumerate(operations):
+            product_id = operation['product_id']
+            current = updated.get(product_id, {'quantity': 0, 'notes': ''})
+            
+            if operation['op'] == 'remove':
+                updated.pop(product_id, None)
+                continue
+            
+            product = products.get(product_id)
+            if product is None or product.status != 'active':
+                errors[index] = ["Product not found or inactive"]
+                continue
+            
+            if operation['op'] == 'add':
+                quantity = current['quantity'] + operation['quantity']
+            else:
+                quantity = operation['quantity']
+            
+            if quantity == 0:
+                updated.pop(product_id, None)
+                continue
+            if not product.is_in_stock:
+                errors[index] = [f"{product.name} is out of stock"]
+                continue
+            
+            updated[product_id] = {
+                'quantity': quantity,
+                'notes': operation.get('notes', current['notes'])
+            }
+        
+        if len(updated) > settings.GUEST_CART_MAX_ITEMS:
+            errors['cart'] = [f"A guest cart can hold at most {settings.GUEST_CART_MAX_ITEMS} products"]
+        
+        if not errors:
+            items.clear()
+            items.update(updated)
+        return errors
+    
+    @staticmethod
+    def describe(items):
+        """Serialize guest cart items with current product details in one query"""
+        from apps.products.models import Product
+        
+        products = Product.objects.select_related('business').only(
+            'id', 'name', 'price', 'status', 'track_inventory', 'stock_quantity',
+            'business__id', 'business__name', 'business__slug'
+        ).in_bulk(list(items))
+        
+        lines = []
+        total_items = 0
+        total_amount = Decimal('0.00')
+        for product_id, item in items.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            line_total = product.price * item['quantity']
+            total_items += item['quantity']
+            total_amount += line_total
+            lines.append({
+                'product': product.id,
+                'product_name': product.name,
+                'business_name': product.business.name,
+                'business_slug': product.business.slug,
+                'quantity': item['quantity'],
+                'unit_price': str(product.price),
+                'total_price': str(line_total),
+                'notes': item['notes'],
+                'is_available': product.status == 'active' and product.is_in_stock
+            })
+        
+        return {
+            'items': lines,
+            'total_items': total_items,
+            'total_amount': str(total_amount)
+        }
+    
+    @staticmethod
+    def merge_into_user_cart(request, user):
+        """
+        Move the request's guest cart into the user's cart.
+        Returns the number of merged rows (0 when there is no guest cart).
+        """
+        from django.db import transaction
+        from apps.orders.models import Cart
+        
+        token = GuestCartService.get_token(request)
+        items = GuestCartService.get_items(token)
+        if not items:
+            return 0
+        
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user=user)
+            merged = CartService.merge_guest_items(cart, items)
+        GuestCartService.save_items(token, {})
+        return merged
+
+
+class OrderEventService:
+    """
+    Service class for pushing order updates to streaming clients
+    """
+    
+    TERMINAL_STATUSES = ('completed', 'cancelled', 'refunded')
+    
+    @staticmethod
+    def delivery_snapshot(delivery_info):
+        """Compact representation of delivery details for event payloads"""
+        if delivery_info is None:
+            return None
+        return {
+            'driver_name': delivery_info.driver_name,
+            'driver_phone': delivery_info.driver_phone,
+            'vehicle_info': delivery_info.vehicle_info,
+            'estimated_arrival': delivery_info.estimated_arrival,
+            'actual_arrival': delivery_info.actual_arrival,
+            'delivery_notes': delivery_info.delivery_notes,
+            'updated_at': delivery_info.updated_at,
+        }
+    
+    @staticmethod
+    def order_snapshot(order):
+        """Current order status and delivery details"""
+        from apps.orders.models import DeliveryInfo
+        
+        try:
+            delivery_info = order.delivery_info
+        except DeliveryInfo.DoesNotExist:
+            delivery_info = None
+        
+        return {
+            'order_id': str(order.id),
+            'order_number': order.order_number,
+            'status': order.status,
+            'status_display': order.get_status_display(),
+            'payment_status': order.payment_status,
+            'estimated_delivery_time': order.estimated_delivery_time,
+            'confirmed_at': order.confirmed_at,
+            'delivered_at': order.delivered_at,
+            'updated_at': order.updated_at,
+            'delivery_info': OrderEventService.delivery_snapshot(delivery_info),
+        }
+    
+    @staticmethod
+    def publish_status_change(order, old_status=None):
+        """Notify order subscribers of a status transition"""
+        from utils.realtime import order_channel, publish_on_commit
+        
+        message = {
+            'type': 'order.status',
+            'old_status': old_status,
+            **OrderEventService.order_snapshot(order),
+        }
+        publish_on_commit(order_channel(order.id), message)
+    
+    @staticmethod
+    def publish_delivery_update(delivery_info):
+        """Notify order subscribers that delivery details changed"""
+        from utils.realtime import order_channel, publish_on_commit
+        
+        message = {
+            'type': 'delivery.updated',
+            'order_id': str(delivery_info.order_id),
+            'delivery_info': OrderEventService.delivery_snapshot(delivery_info),
+        }
+        publish_on_commit(order_channel(delivery_info.order_id), message)
+    
+    @staticmethod
+    def event_message(event):
+        """Wire format of an OrderEvent, shared by the stream and the REST feed"""
+        return {
+            'id': event.id,
+            'type': event.get_event_type_display(),
+            'business_id': event.business_id,
+            'order_id': str(event.order_id),
+            'created_at': event.created_at,
+            **event.payload,
+        }
+    
+    @staticmethod
+    def record_business_event(order, event_type, **extra):
+        """
+        Append an event to the business feed and publish it on commit.
+        Call inside the transaction that performs the change so the event
+        row commits (or rolls back) together with it.
+        """
+        from apps.orders.models import OrderEvent
+        from utils.realtime import business_channel, publish_on_commit
+        
+        payload = {
+            'order_number': order.order_number,
+            'status': order.status,
+            'total_amount': str(order.total_amount),
+            'customer_name': order.customer_name,
+            'delivery_method': order.delivery_method,
+            **extra,
+        }
+        event = OrderEvent.objects.create(
+            business_id=order.business_id,
+            order=order,
+            event_type=event_type,
+            payload=payload
+        )
+        publish_on_commit(
+            business_channel(order.business_id),
+            OrderEventService.event_message(event)
+        )
+        return event
+    
+    @staticmethod
+    def events_after(business_id, last_event_id, limit=100):
+        """Events for a business with an id greater than the given cursor"""
+        from apps.orders.models import OrderEvent
+        
+        return list(
+            OrderEvent.objects.filter(
+                business_id=business_id,
+                id__gt=last_event_id or 0
+            ).order_by('id')[:limit]
+        )
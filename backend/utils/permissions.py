@@ -1,5 +1,63 @@
 from rest_framework import permissions
 
+
+def get_owned_business_ids(request):
+    """
+    Ids of the businesses owned by the requesting user, memoised on the request.
+    Taken from the access token claims when present, otherwise one query.
+    """
+    owned = getattr(request, '_owned_business_ids', None)
+    if owned is None:
+        user = request.user
+        if not user or not user.is_authenticated:
+            owned = frozenset()
+        else:
+            owned = getattr(user, 'business_ids', None)
+            if owned is None:
+                from apps.businesses.models import Business
+                owned = frozenset(
+                    Business.objects.filter(owner_id=user.id).values_list('id', flat=True)
+                )
+        request._owned_business_ids = owned
+    return owned
+
+
+def owns_business(request, business_id):
+    """True if the requesting user owns the business with ``business_id``"""
+    if business_id in get_owned_business_ids(request):
+        return True
+
+    user = request.user
+    if not user or not user.is_authenticated or user.user_type != 'business_owner':
+        return False
+
+    # Claims are minted at login/refresh, so a business created since then
+    # is not listed yet; confirm against the database before denying
+    from apps.businesses.models import Business
+    if Business.objects.filter(id=business_id, owner_id=user.id).exists():
+        request._owned_business_ids = get_owned_business_ids(request) | {business_id}
+        return True
+    return False
+
+
+def owns_object(request, obj):
+    """
+    Ownership check for a business or an object with a ``business`` foreign
+    key, using ids only so no related rows are loaded.
+    """
+    user_id = request.user.id
+    if hasattr(obj, 'owner_id'):
+        return obj.owner_id == user_id
+
+    if hasattr(obj, 'business_id'):
+        # Querysets usually select_related the business already
+        if type(obj).business.is_cached(obj):
+            return obj.business.owner_id == user_id
+        return owns_business(request, obj.business_id)
+
+    return False
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
     Custom permission to only allow owners of an object to edit it.
@@ -10,7 +68,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # Write permissions only to the owner
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
 class IsBusinessOwner(permissions.BasePermission):
     """
@@ -38,14 +96,28 @@ class IsBusinessOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # Check if user owns the business (direct or through product)
-        if hasattr(obj, 'owner'):
-            return obj.owner == request.user
-        elif hasattr(obj, 'business'):
-            return obj.business.owner == request.user
+        # Check if user owns the business (direct or through product/order)
+        if hasattr(obj, 'owner_id') or hasattr(obj, 'business_id'):
+            return owns_object(request, obj)
+        elif hasattr(obj, 'order'):
+            return owns_business(request, obj.order.business_id)
         
         return False
 
+class IsObjectBusinessOwner(permissions.BasePermission):
+    """
+    Allow access only to the owner of the object's business (or staff).
+    Pair with a queryset scoped by ``business__owner_id`` so the object
+    lookup itself is the only query.
+    """
+    message = 'Permission denied'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_staff or owns_object(request, obj)
+
 class IsBusinessOwnerOrCustomer(permissions.BasePermission):
     """
     Permission class that allows business owners to manage their orders
@@ -56,13 +128,13 @@ class IsBusinessOwnerOrCustomer(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # For orders, check if user is the customer or business owner
-        if hasattr(obj, 'customer') and hasattr(obj, 'business'):
-            return (obj.customer == request.user or 
-                   obj.business.owner == request.user)
+        if hasattr(obj, 'customer_id') and hasattr(obj, 'business_id'):
+            return (obj.customer_id == request.user.id or
+                   owns_business(request, obj.business_id))
         
         # For delivery info, check through the order
         if hasattr(obj, 'order'):
-            return (obj.order.customer == request.user or 
-                   obj.order.business.owner == request.user)
+            return (obj.order.customer_id == request.user.id or
+                   owns_business(request, obj.order.business_id))
         
-        return False
\ No newline at end of file
+        return False
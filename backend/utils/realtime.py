@@ -0,0 +1,190 @@
+"""
+In-process publish/subscribe used to push order updates to streaming clients.
+
+Publishers call ``publish_on_commit`` from the regular (sync) request path;
+subscribers are async server-sent-event views served through asgi.py.
+The broker is pluggable via ``settings.EVENT_BROKER_BACKEND``: Redis pub/sub
+in production, an in-memory broker for development and tests.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from utils.redis_client import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def order_channel(order_id):
+    return f"order:{order_id}"
+
+
+def business_channel(business_id):
+    return f"business:{business_id}"
+
+
+def encode_message(message):
+    return json.dumps(message, cls=DjangoJSONEncoder)
+
+
+def decode_message(data):
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+class BaseBroker:
+    """
+    Broker interface.
+
+    ``publish`` is synchronous so it can be called from ordinary views and
+    signal handlers. ``subscribe`` is an async context manager yielding an
+    object with ``await get(timeout)`` that returns the next decoded message,
+    or ``None`` when the timeout expires.
+    """
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, *channels):
+        raise NotImplementedError
+
+
+class _QueueSubscription:
+    def __init__(self, queue):
+        self.queue = queue
+
+    async def get(self, timeout=None):
+        try:
+            data = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return decode_message(data)
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Single-process broker. Messages only reach subscribers living in the same
+    process, which is enough for development, tests and single-worker setups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        data = encode_message(message)
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+
+        delivered = 0
+        for loop, queue in targets:
+            try:
+                # Publishers usually run on a worker thread, not on the loop
+                loop.call_soon_threadsafe(queue.put_nowait, data)
+                delivered += 1
+            except RuntimeError:
+                # The subscriber's loop has already been closed
+                pass
+        return delivered
+
+    @asynccontextmanager
+    async def subscribe(self, *channels):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(entry)
+        try:
+            yield _QueueSubscription(entry[1])
+        finally:
+            with self._lock:
+                for channel in channels:
+                    subscribers = self._subscribers.get(channel)
+                    if subscribers is not None:
+                        subscribers.discard(entry)
+                        if not subscribers:
+                            del self._subscribers[channel]
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self.pubsub.get_message(
+            ignore_subscribe_messages=True,
+            timeout=timeout
+        )
+        if message is None:
+            return None
+        return decode_message(message['data'])
+
+
+class RedisBroker(BaseBroker):
+    """Redis pub/sub broker shared by every worker process"""
+    prefix = 'events:'
+
+    def publish(self, channel, message):
+        return get_redis_client().publish(self.prefix + channel, encode_message(message))
+
+    @asynccontextmanager
+    async def subscribe(self, *channels):
+        client = get_async_redis_client()
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[self.prefix + channel for channel in channels])
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    """Return the process-wide broker configured in settings"""
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENT_BROKER_BACKEND)()
+    return _broker
+
+
+def publish(channel, message):
+    """Publish immediately, logging instead of raising on broker failures"""
+    try:
+        return get_broker().publish(channel, message)
+    except Exception as e:
+        logger.error(f"Failed to publish event on {channel}: {e}")
+        return 0
+
+
+def publish_on_commit(channel, message):
+    """Publish once the current transaction commits (immediately in autocommit)"""
+    transaction.on_commit(lambda: publish(channel, message))
+
+
+def format_sse(data, event=None, event_id=None):
+    """Format a single server-sent event frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else encode_message(data)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+def format_sse_comment(comment='keepalive'):
+    """SSE comment frame, used to keep idle connections open through proxies"""
+    return f": {comment}\n\n"
@@ -0,0 +1,30 @@
+from django.conf import settings
+
+_client = None
+
+
+def get_redis_url():
+    """Return the configured Redis URL, or an empty string when Redis is not used"""
+    return getattr(settings, 'REDIS_URL', '') or ''
+
+
+def get_redis_client():
+    """
+    Shared synchronous Redis client for the current process.
+    The underlying connection pool is thread-safe, so one client is enough.
+    """
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(get_redis_url())
+    return _client
+
+
+def get_async_redis_client():
+    """
+    New asyncio Redis client.
+    Async clients are bound to the event loop that created them, so callers
+    own the returned client and must close it with ``aclose()``.
+    """
+    from redis import asyncio as aioredis
+    return aioredis.from_url(get_redis_url())
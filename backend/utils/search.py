@@ -1,5 +1,14 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance as GeoDistance
+from django.contrib.gis.measure import D
 from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
-from django.db.models import Q
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from utils.helpers import bounding_degrees
 
 class SearchManager:
     """
@@ -51,4 +60,60 @@ class SearchManager:
         return queryset.annotate(
             search=search_vector,
             rank=SearchRank(search_vector, search_query)
-        ).filter(search=search_query).order_by('-rank')
\ No newline at end of file
+        ).filter(search=search_query).order_by('-rank')
+
+    @staticmethod
+    def encode_cursor(score, item_id):
+        return urlsafe_b64encode(json.dumps([score, item_id]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """``(score, id)`` from a cursor, or None when malformed"""
+        try:
+            score, item_id = json.loads(urlsafe_b64decode(cursor.encode()))
+            return float(score), int(item_id)
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def search_products_near(query, location, radius_km, after=None, limit=20):
+        """
+        Active products matching ``query`` sold by active businesses within
+        ``radius_km`` of ``location``, best first.
+
+        One query: ST_DWithin on the business location index (plus the exact
+        spherical distance) and the search_vector GIN index restrict the rows;
+        ``score`` blends the normalized text rank with closeness (1 at the
+        location, 0 at the radius) using PRODUCT_NEARBY_TEXT_WEIGHT.
+        Pagination is a keyset on ``(score, id)``; ``after`` is the last pair
+        of the previous page. Returns ``limit + 1`` products at most, so
+        callers can tell whether there is a next page.
+        """
+        from apps.products.models import Product
+
+        search_query = SearchQuery(query, search_type='websearch')
+        text_weight = settings.PRODUCT_NEARBY_TEXT_WEIGHT
+        radius_m = radius_km * 1000
+
+        distance = Cast(GeoDistance('business__location', location), FloatField())
+        # normalization 32 maps the rank into [0, 1): rank / (rank + 1)
+        text_rank = Cast(SearchRank(F('search_vector'), search_query, normalization=Value(32)), FloatField())
+
+        queryset = Product.objects.filter(
+            status='active',
+            business__is_active=True,
+            search_vector=search_query,
+            business__location__dwithin=(location, bounding_degrees(location, radius_km)),
+            business__location__distance_lte=(location, D(km=radius_km)),
+        ).annotate(
+            distance_m=distance,
+            score=ExpressionWrapper(
+                Value(text_weight) * text_rank
+                + Value(1 - text_weight) * (Value(1.0) - distance / Value(float(radius_m))),
+                output_field=FloatField()
+            ),
+        )
+        if after is not None:
+            score, item_id = after
+            queryset = queryset.filter(Q(score__lt=score) | Q(score=score, id__lt=item_id))
+        return queryset.order_by('-score', '-id')[:limit + 1]
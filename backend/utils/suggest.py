@@ -0,0 +1,392 @@
+"""
+Type-ahead suggestions for products, businesses and categories, answered
+from an in-process sorted prefix index so keystroke requests never reach
+PostgreSQL.
+
+Each worker keeps its own copy of the index. The shared copy lives in the
+Django cache as a snapshot plus a journal of changes recorded by model
+signals. Workers check the journal sequence at most every
+SUGGEST_SYNC_SECONDS and apply new changes to a copy of their index; a
+journal entry that is not there yet is waited for (up to
+SUGGEST_GAP_SECONDS) before the worker reloads the snapshot. Every
+SUGGEST_SNAPSHOT_SECONDS one worker publishes its caught-up index as the new
+snapshot, so the snapshot never falls further behind than the journal
+reaches. Rebuilding from the database (a missing snapshot, or a journal that
+no longer bridges it) happens on a background thread; requests keep being
+answered from the index they have.
+
+Bulk writes bypass signals and popularity only changes on rebuild, so
+``manage.py build_suggest_index`` should also run periodically.
+
+The journal is only shared when the cache is (Redis, when REDIS_URL is set).
+With a per-process cache a worker's journal only holds its own changes, so
+each worker also rebuilds in the background every SUGGEST_SNAPSHOT_SECONDS
+(and logs a warning outside DEBUG) to pick up the others'.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count
+
+from utils.cache_backends import is_shared_cache
+from utils.helpers import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'suggest:snapshot'
+SEQUENCE_KEY = 'suggest:sequence'
+# Held by the worker publishing a snapshot / rebuilding from the database
+PUBLISH_LOCK_KEY = 'suggest:publishing'
+REBUILD_LOCK_KEY = 'suggest:rebuilding'
+
+KINDS = ('product', 'business', 'category', 'business_category')
+
+# ``context`` is shown next to the label (a product's business name);
+# ``business_id`` lets a deactivated business take its products with it
+Suggestion = namedtuple('Suggestion', 'kind id label slug context business_id popularity')
+
+
+def journal_key(sequence):
+    return f"suggest:journal:{sequence}"
+
+
+def index_keys(label):
+    """The normalized label and every later word onwards ("cola" finds "Coca Cola")"""
+    words = normalize_search_text(label).split()
+    return {' '.join(words[position:]) for position in range(min(len(words), 6))}
+
+
+class PrefixIndex:
+    """
+    Sorted array of ``(key, -popularity, kind, id)`` entries searched with
+    bisect. Instances are not modified once published; changes are applied
+    to a ``copy()``.
+    """
+
+    # Results for prefixes up to this length are memoized: they match the
+    # most entries and are typed on every search
+    MEMO_PREFIX_LENGTH = 2
+
+    def __init__(self, suggestions=(), sequence=0):
+        self.sequence = sequence
+        # False while it is known to miss changes (never published as the snapshot)
+        self.complete = True
+        self.suggestions = {(item.kind, item.id): item for item in suggestions}
+        self.entries = sorted(
+            entry for item in self.suggestions.values() for entry in self._entries(item)
+        )
+        self._memo = {}
+
+    @staticmethod
+    def _entries(item):
+        return [(key, -item.popularity, item.kind, item.id) for key in index_keys(item.label)]
+
+    def copy(self):
+        index = PrefixIndex.__new__(PrefixIndex)
+        index.sequence = self.sequence
+        index.complete = self.complete
+        index.suggestions = dict(self.suggestions)
+        index.entries = list(self.entries)
+        index._memo = {}
+        return index
+
+    def _remove(self, item):
+        for entry in self._entries(item):
+            position = bisect.bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+        del self.suggestions[(item.kind, item.id)]
+
+    def apply(self, change):
+        operation, payload = change
+        if operation == 'upsert':
+            previous = self.suggestions.get((payload.kind, payload.id))
+            if payload.popularity is None:
+                payload = payload._replace(popularity=previous.popularity if previous else 0)
+            if previous is not None:
+                self._remove(previous)
+            self.suggestions[(payload.kind, payload.id)] = payload
+            for entry in self._entries(payload):
+                bisect.insort(self.entries, entry)
+        elif operation == 'delete':
+            previous = self.suggestions.get(payload)
+            if previous is not None:
+                self._remove(previous)
+        elif operation == 'drop_business':
+            for item in [item for item in self.suggestions.values()
+                         if item.kind == 'product' and item.business_id == payload]:
+                self._remove(item)
+        elif operation == 'business_products':
+            # A reactivated or renamed business: its active products, as they are now
+            business_id, products = payload
+            current = {item.id for item in products}
+            for item in [item for item in self.suggestions.values()
+                         if item.kind == 'product' and item.business_id == business_id
+                         and item.id not in current]:
+                self._remove(item)
+            for item in products:
+                self.apply(('upsert', item))
+
+    def search(self, prefix, limit, kinds=None):
+        memo_key = (prefix, kinds)
+        if len(prefix) <= self.MEMO_PREFIX_LENGTH and memo_key in self._memo:
+            return self._memo[memo_key][:limit]
+
+        # Entries sharing the prefix are contiguous; a document can match
+        # through several keys, so keep its best entry only
+        best = {}
+        position = bisect.bisect_left(self.entries, (prefix,))
+        while position < len(self.entries) and self.entries[position][0].startswith(prefix):
+            key, negative_popularity, kind, item_id = self.entries[position]
+            position += 1
+            if kinds and kind not in kinds:
+                continue
+            best.setdefault((kind, item_id), (negative_popularity, key))
+
+        size = max(limit, settings.SUGGEST_MAX_RESULTS) if len(prefix) <= self.MEMO_PREFIX_LENGTH else limit
+        top = heapq.nsmallest(size, best.items(), key=lambda pair: pair[1])
+        results = [self.suggestions[document] for document, _ in top]
+        if len(prefix) <= self.MEMO_PREFIX_LENGTH:
+            self._memo[memo_key] = results
+        return results[:limit]
+
+
+_index = None
+_checked_at = 0.0
+# Last time this process started rebuilding the index from the database
+_built_at = None
+# Sequence of the newest snapshot this process has seen or published
+_published = 0
+# ``(sequence, first seen)`` of a journal entry that was not there yet
+_gap = None
+_building = False
+_warned = False
+_lock = threading.Lock()
+
+
+class SuggestService:
+    """Builds, shares and queries the suggestion index"""
+
+    @staticmethod
+    def build_suggestions():
+        """Every visible product, business and category, with its popularity (order count)"""
+        from apps.businesses.models import Business, BusinessCategory
+        from apps.orders.models import Order, OrderItem
+        from apps.products.models import Product, ProductCategory
+
+        product_orders = dict(
+            OrderItem.objects.values('product_id').annotate(total=Count('id')).values_list('product_id', 'total')
+        )
+        business_orders = dict(
+            Order.objects.values('business_id').annotate(total=Count('id')).values_list('business_id', 'total')
+        )
+
+        suggestions = [
+            Suggestion('product', product_id, name, slug, business_name, business_id,
+                       product_orders.get(product_id, 0))
+            for product_id, name, slug, business_name, business_id in Product.objects.filter(
+                status='active', business__is_active=True
+            ).values_list('id', 'name', 'slug', 'business__name', 'business_id').iterator(chunk_size=5000)
+        ]
+        suggestions += [
+            Suggestion('business', business_id, name, slug, city, business_id,
+                       business_orders.get(business_id, 0))
+            for business_id, name, slug, city in Business.objects.filter(
+                is_active=True
+            ).values_list('id', 'name', 'slug', 'city').iterator(chunk_size=5000)
+        ]
+        suggestions += [
+            Suggestion('category', category_id, name, slug, '', None, total)
+            for category_id, name, slug, total in ProductCategory.objects.filter(is_active=True).annotate(
+                total=Count('product')
+            ).values_list('id', 'name', 'slug', 'total')
+        ]
+        suggestions += [
+            Suggestion('business_category', category_id, name, slug, '', None, total)
+            for category_id, name, slug, total in BusinessCategory.objects.filter(is_active=True).annotate(
+                total=Count('business')
+            ).values_list('id', 'name', 'slug', 'total')
+        ]
+        return suggestions
+
+    @staticmethod
+    def rebuild():
+        """Rebuild the shared snapshot from the database and return it as an index"""
+        global _published
+        # Changes recorded while building are replayed on top (upserts are idempotent)
+        cache.add(SEQUENCE_KEY, 0, None)
+        sequence = cache.get(SEQUENCE_KEY, 0)
+        suggestions = SuggestService.build_suggestions()
+        cache.set(SNAPSHOT_KEY, (sequence, suggestions), None)
+        _published = max(_published, sequence)
+        return PrefixIndex(suggestions, sequence)
+
+    @staticmethod
+    def record(operation, payload):
+        """Append a change to the shared journal"""
+        cache.add(SEQUENCE_KEY, 0, None)
+        sequence = cache.incr(SEQUENCE_KEY)
+        cache.set(journal_key(sequence), (operation, payload), settings.SUGGEST_JOURNAL_SECONDS)
+
+    @staticmethod
+    def record_on_commit(operation, payload):
+        """Record a change once the surrounding transaction commits; never fails the write"""
+        def record():
+            try:
+                SuggestService.record(operation, payload)
+            except Exception as e:
+                logger.error(f"Failed to record suggestion change {operation}: {e}")
+
+        transaction.on_commit(record)
+
+    @staticmethod
+    def _load():
+        """The shared snapshot as an index, or None when there is none"""
+        global _published
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is None:
+            return None
+        sequence, suggestions = snapshot
+        _published = max(_published, sequence)
+        return PrefixIndex(suggestions, sequence)
+
+    @staticmethod
+    def _catch_up(index):
+        """
+        ``index`` with the journal applied as far as it is contiguous, or
+        None when the journal no longer reaches back to it (too far behind,
+        or an entry still missing after SUGGEST_GAP_SECONDS)
+        """
+        global _gap
+        target = cache.get(SEQUENCE_KEY, 0)
+        if target <= index.sequence:
+            return index
+        if target - index.sequence > settings.SUGGEST_JOURNAL_MAX:
+            return None
+        changes = cache.get_many([
+            journal_key(sequence) for sequence in range(index.sequence + 1, target + 1)
+        ])
+
+        caught_up = index
+        for sequence in range(index.sequence + 1, target + 1):
+            change = changes.get(journal_key(sequence))
+            if change is None:
+                # The sequence is taken before the entry is written, so the
+                # entry may just not be there yet
+                if _gap is None or _gap[0] != sequence:
+                    _gap = (sequence, time.monotonic())
+                elif time.monotonic() - _gap[1] >= settings.SUGGEST_GAP_SECONDS:
+                    return None
+                break
+            if caught_up is index:
+                caught_up = index.copy()
+            caught_up.apply(change)
+            caught_up.sequence = sequence
+        return caught_up
+
+    @staticmethod
+    def _build_in_background():
+        """
+        Rebuild on a daemon thread and swap the result in; requests keep the
+        current index meanwhile. Call with ``_lock`` held.
+        """
+        global _building, _built_at
+        if _building:
+            return
+        # One worker rebuilds the shared snapshot; the others pick it up
+        if not cache.add(REBUILD_LOCK_KEY, True, settings.SUGGEST_SNAPSHOT_SECONDS):
+            return
+        _building, _built_at = True, time.monotonic()
+
+        def build():
+            global _index, _checked_at, _building
+            try:
+                index = SuggestService.rebuild()
+                with _lock:
+                    # Caught up with the journal at the next sync
+                    _index, _checked_at = index, 0.0
+            except Exception as e:
+                logger.error(f"Failed to rebuild the suggestion index: {e}")
+            finally:
+                cache.delete(REBUILD_LOCK_KEY)
+                _building = False
+                connections.close_all()
+
+        threading.Thread(target=build, name='suggest-rebuild', daemon=True).start()
+
+    @staticmethod
+    def _publish(index):
+        """Share ``index`` as the snapshot when no worker has for SUGGEST_SNAPSHOT_SECONDS"""
+        global _published
+        if not index.complete or index.sequence <= _published:
+            return
+        if cache.add(PUBLISH_LOCK_KEY, True, settings.SUGGEST_SNAPSHOT_SECONDS):
+            cache.set(SNAPSHOT_KEY, (index.sequence, list(index.suggestions.values())), None)
+            _published = index.sequence
+
+    @staticmethod
+    def _sync(index):
+        """Bring ``index`` (None at first) up to date from the shared snapshot and journal"""
+        if index is not None and index.complete:
+            caught_up = SuggestService._catch_up(index)
+            if caught_up is not None:
+                SuggestService._publish(caught_up)
+                return caught_up
+        # First sync, fell behind the journal or waiting for a rebuild: the
+        # snapshot may be newer
+        snapshot = SuggestService._load()
+        if snapshot is not None:
+            caught_up = SuggestService._catch_up(snapshot)
+            if caught_up is not None:
+                SuggestService._publish(caught_up)
+                return caught_up
+        # Nothing reaches the current state: serve what we have (never
+        # published) until the rebuild lands
+        SuggestService._build_in_background()
+        stale = index or snapshot or PrefixIndex()
+        stale.complete = False
+        return stale
+
+    @staticmethod
+    def _warn_not_shared():
+        global _warned
+        if not _warned and not settings.DEBUG:
+            logger.warning(
+                "The cache is not shared between processes, so each worker rebuilds its suggestions "
+                f"every {settings.SUGGEST_SNAPSHOT_SECONDS}s and only sees its own changes in between; "
+                "set REDIS_URL"
+            )
+            _warned = True
+
+    @staticmethod
+    def get_index():
+        """This worker's index, synced at most every SUGGEST_SYNC_SECONDS; never queries the database"""
+        global _index, _checked_at
+
+        if _index is not None and time.monotonic() - _checked_at < settings.SUGGEST_SYNC_SECONDS:
+            return _index
+        with _lock:
+            if _index is None or time.monotonic() - _checked_at >= settings.SUGGEST_SYNC_SECONDS:
+                _index, _checked_at = SuggestService._sync(_index), time.monotonic()
+                if not is_shared_cache() and (
+                    _built_at is None or time.monotonic() - _built_at >= settings.SUGGEST_SNAPSHOT_SECONDS
+                ):
+                    # Other workers' changes only arrive with a rebuild
+                    SuggestService._warn_not_shared()
+                    SuggestService._build_in_background()
+            return _index
+
+    @staticmethod
+    def suggest(query, limit=8, kinds=None):
+        prefix = normalize_search_text(query)
+        if not prefix:
+            return []
+        kinds = tuple(sorted(kinds)) if kinds else None
+        return SuggestService.get_index().search(prefix, limit, kinds)
@@ -0,0 +1,302 @@
+"""
+Product and business view counting that never writes to PostgreSQL on the
+request path.
+
+Views are first buffered per worker process and pushed to a shared store
+every VIEW_COUNTER_PUSH_SECONDS by a background thread (or as soon as
+VIEW_COUNTER_MAX_KEYS objects are buffered). The store keeps running per-day
+totals: a Redis hash of view counts plus a HyperLogLog of visitors per
+object, in production. The ``flush_view_counts`` command copies those totals
+into DailyViewCount with one bulk upsert, so the store must be shared with
+the command's process; the per-process store is refused outside DEBUG. The
+store is pluggable via ``settings.VIEW_COUNTER_BACKEND``.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Running totals are only needed until the day has been flushed
+DAY_TTL_SECONDS = 3 * 24 * 60 * 60
+
+UPSERT_SQL = """
+    INSERT INTO businesses_dailyviewcount (kind, object_id, day, views, unique_visitors)
+    SELECT * FROM unnest(%s::varchar[], %s::bigint[], %s::date[], %s::integer[], %s::integer[])
+    ON CONFLICT (kind, object_id, day) DO UPDATE SET
+        views = GREATEST(businesses_dailyviewcount.views, EXCLUDED.views),
+        unique_visitors = GREATEST(businesses_dailyviewcount.unique_visitors, EXCLUDED.unique_visitors)
+"""
+
+
+class BaseViewStore:
+    """
+    Store interface. ``add`` takes ``{(day, kind, object_id): (views,
+    visitor_ids)}``; ``totals`` returns ``{(kind, object_id): (views,
+    unique_visitors)}`` for one day; ``total`` returns the pair for one object.
+    ``shared`` stores are seen by every process. Days before ``evict``'s are
+    dropped once flushed (stores with key expiry need not implement it).
+    """
+    shared = True
+
+    def add(self, batch):
+        raise NotImplementedError
+
+    def totals(self, day):
+        raise NotImplementedError
+
+    def total(self, day, kind, object_id):
+        raise NotImplementedError
+
+    def evict(self, before):
+        pass
+
+
+class InMemoryViewStore(BaseViewStore):
+    """Per-process store for development and tests"""
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = Counter()
+        self._visitors = defaultdict(set)
+
+    def add(self, batch):
+        with self._lock:
+            for key, (views, visitors) in batch.items():
+                self._views[key] += views
+                self._visitors[key].update(visitors)
+        # The same lifetime as the Redis store's keys, flushed or not
+        self.evict(timezone.localdate() - timedelta(seconds=DAY_TTL_SECONDS))
+
+    def evict(self, before):
+        with self._lock:
+            for key in [key for key in self._views if key[0] < before]:
+                del self._views[key]
+                self._visitors.pop(key, None)
+
+    def totals(self, day):
+        with self._lock:
+            return {
+                (kind, object_id): (views, len(self._visitors[(key_day, kind, object_id)]))
+                for (key_day, kind, object_id), views in self._views.items()
+                if key_day == day
+            }
+
+    def total(self, day, kind, object_id):
+        key = (day, kind, object_id)
+        with self._lock:
+            return self._views.get(key, 0), len(self._visitors.get(key, ()))
+
+
+class RedisViewStore(BaseViewStore):
+    """
+    Shared store: ``views:<day>`` hashes ``<kind>:<id>`` to a view count and
+    ``views:<day>:<kind>:<id>:visitors`` is a HyperLogLog of visitor ids
+    """
+    prefix = 'views:'
+
+    def _day_key(self, day):
+        return f"{self.prefix}{day.isoformat()}"
+
+    def _visitors_key(self, day, kind, object_id):
+        return f"{self._day_key(day)}:{kind}:{object_id}:visitors"
+
+    def add(self, batch):
+        pipeline = get_redis_client().pipeline(transaction=False)
+        days = set()
+        for (day, kind, object_id), (views, visitors) in batch.items():
+            days.add(day)
+            pipeline.hincrby(self._day_key(day), f"{kind}:{object_id}", views)
+            visitors_key = self._visitors_key(day, kind, object_id)
+            pipeline.pfadd(visitors_key, *visitors)
+            pipeline.expire(visitors_key, DAY_TTL_SECONDS)
+        for day in days:
+            pipeline.expire(self._day_key(day), DAY_TTL_SECONDS)
+        pipeline.execute()
+
+    def totals(self, day):
+        client = get_redis_client()
+        counts = []
+        for field, views in client.hscan_iter(self._day_key(day), count=1000):
+            kind, object_id = field.decode().split(':')
+            counts.append((kind, int(object_id), int(views)))
+
+        pipeline = client.pipeline(transaction=False)
+        for kind, object_id, _ in counts:
+            pipeline.pfcount(self._visitors_key(day, kind, object_id))
+        uniques = pipeline.execute() if counts else []
+        return {
+            (kind, object_id): (views, unique_visitors)
+            for (kind, object_id, views), unique_visitors in zip(counts, uniques)
+        }
+
+    def total(self, day, kind, object_id):
+        pipeline = get_redis_client().pipeline(transaction=False)
+        pipeline.hget(self._day_key(day), f"{kind}:{object_id}")
+        pipeline.pfcount(self._visitors_key(day, kind, object_id))
+        views, unique_visitors = pipeline.execute()
+        return int(views or 0), unique_visitors
+
+
+_store = None
+
+
+def get_store():
+    """Return the process-wide view store configured in settings"""
+    global _store
+    if _store is None:
+        store = import_string(settings.VIEW_COUNTER_BACKEND)()
+        if not store.shared and not settings.DEBUG:
+            # flush_view_counts and every other worker would see none of it
+            raise ImproperlyConfigured(
+                f"{settings.VIEW_COUNTER_BACKEND} keeps views per process; "
+                "set REDIS_URL or a shared VIEW_COUNTER_BACKEND"
+            )
+        _store = store
+    return _store
+
+
+class _ViewBuffer:
+    """
+    Views counted by this process and not yet pushed to the store. A daemon
+    thread pushes every VIEW_COUNTER_PUSH_SECONDS, so views are not held
+    back until the next one arrives.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batch = {}
+        self._pusher = None
+
+    def add(self, key, visitor):
+        with self._lock:
+            if self._pusher is None:
+                self._pusher = threading.Thread(target=self._push_periodically, name='view-counter', daemon=True)
+                self._pusher.start()
+            views, visitors = self._batch.get(key, (0, set()))
+            visitors.add(visitor)
+            self._batch[key] = (views + 1, visitors)
+            if len(self._batch) < settings.VIEW_COUNTER_MAX_KEYS:
+                return
+            batch, self._batch = self._batch, {}
+        self._push(batch)
+
+    def push(self):
+        with self._lock:
+            batch, self._batch = self._batch, {}
+        self._push(batch)
+
+    def _push_periodically(self):
+        while True:
+            time.sleep(settings.VIEW_COUNTER_PUSH_SECONDS)
+            self.push()
+
+    def _push(self, batch):
+        if not batch:
+            return
+        try:
+            get_store().add(batch)
+        except Exception as e:
+            # Losing a few seconds of views beats failing the request
+            logger.error(f"Failed to push {len(batch)} view counters: {e}")
+
+
+_buffer = _ViewBuffer()
+atexit.register(_buffer.push)
+
+
+class ViewCounterService:
+    """Record views on the request path; flush and read daily counts"""
+
+    @staticmethod
+    def visitor_id(request):
+        """The user id, or a hash of the client address and user agent for anonymous visitors"""
+        if request.user.is_authenticated:
+            return f"u{request.user.id}"
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        address = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')
+        agent = request.META.get('HTTP_USER_AGENT', '')
+        return hashlib.sha1(f"{address}|{agent}".encode()).hexdigest()[:16]
+
+    @staticmethod
+    def record(request, kind, object_id):
+        """Count a view; only touches process memory (and occasionally the store)"""
+        _buffer.add((timezone.localdate(), kind, object_id), ViewCounterService.visitor_id(request))
+
+    @staticmethod
+    def flush(days=None):
+        """
+        Copy the store's running totals for ``days`` (default: today and
+        yesterday) into DailyViewCount. Totals only grow, so re-flushing is
+        harmless. Days before yesterday are evicted from the store afterwards.
+        Returns the number of rows written.
+        """
+        _buffer.push()
+        today = timezone.localdate()
+        if days is None:
+            days = [today - timedelta(days=1), today]
+
+        written = 0
+        store = get_store()
+        for day in days:
+            totals = store.totals(day)
+            if not totals:
+                continue
+            kinds, object_ids, views, uniques = [], [], [], []
+            for (kind, object_id), (view_count, unique_visitors) in totals.items():
+                kinds.append(kind)
+                object_ids.append(object_id)
+                views.append(view_count)
+                uniques.append(unique_visitors)
+            with connection.cursor() as cursor:
+                cursor.execute(UPSERT_SQL, [kinds, object_ids, [day] * len(kinds), views, uniques])
+            written += len(kinds)
+        store.evict(today - timedelta(days=1))
+        return written
+
+    @staticmethod
+    def counts(kind, object_id):
+        """
+        Total, this month's (calendar) and this week's (last 7 days) views.
+        Today's views come from the store, so they include unflushed ones.
+        """
+        from apps.businesses.models import DailyViewCount
+
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        week_start = today - timedelta(days=6)
+        history = DailyViewCount.objects.filter(kind=kind, object_id=object_id, day__lt=today).aggregate(
+            views_total=Sum('views', default=0),
+            views_this_month=Sum('views', filter=Q(day__gte=month_start), default=0),
+            views_this_week=Sum('views', filter=Q(day__gte=week_start), default=0),
+        )
+        try:
+            views_today, unique_visitors_today = get_store().total(today, kind, object_id)
+        except Exception as e:
+            logger.error(f"Failed to read live view counters: {e}")
+            views_today = DailyViewCount.objects.filter(
+                kind=kind, object_id=object_id, day=today
+            ).values_list('views', flat=True).first() or 0
+            unique_visitors_today = None
+
+        return {
+            'views_total': history['views_total'] + views_today,
+            'views_this_month': history['views_this_month'] + views_today,
+            'views_this_week': history['views_this_week'] + views_today,
+            'views_today': views_today,
+            'unique_visitors_today': unique_visitors_today,
+        }